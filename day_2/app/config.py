@@ -1,6 +1,6 @@
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, Type
+from typing import Any, Literal, Optional, Type
 
 import yaml
 from pydantic_settings import (
@@ -33,6 +33,15 @@ class Settings(BaseSettings):
     log_level: str = "INFO"
     host: str = "0.0.0.0"
     port: int = 8000
+    # Движок хранения пользователей: dict — объект на пользователя,
+    # columnar — компактные колонки (array/bytearray)
+    storage_engine: Literal["dict", "columnar"] = "dict"
+    # Директория журнала и снапшотов; если не задана, данные живут только в памяти
+    persistence_dir: Optional[str] = None
+    # Через сколько записей журнала сворачивать его в снапшот
+    snapshot_every: int = 100_000
+    # Пауза перед fsync для накопления пачки записей (group commit)
+    group_commit_delay_ms: float = 0.0
 
     model_config = SettingsConfigDict(
         env_file_encoding="utf-8", case_sensitive=False, extra="ignore"
@@ -1,3 +1,15 @@
-from .database import get_db, Database
+from .database import (
+    get_db,
+    BulkOperationError,
+    Database,
+    EmailTakenError,
+    InvalidCursorError,
+)
 
-__all__ = ["get_db", "Database"]
+__all__ = [
+    "get_db",
+    "BulkOperationError",
+    "Database",
+    "EmailTakenError",
+    "InvalidCursorError",
+]
@@ -1,66 +1,383 @@
 import logging
+import threading
+from bisect import bisect_left, bisect_right
 from datetime import datetime
-from typing import Generator, Optional
-from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Generator, Iterator, Literal, Optional, Sequence
+
+from app.config import get_settings
+from .indexes import MAX_AGE, AgeIndex, CreatedAtIndex, SortedIds
+from .locks import RWLock
+from .persistence import Journal, UserDeleteRecord, UserUpdateRecord
+from .storage import STORAGE_ENGINES, DictUserStorage, UserModel, UserStorage
 
 logger = logging.getLogger(__name__)
 
+# Причины отказа для элементов пакетных операций
+EMAIL_TAKEN = "email_taken"
+DUPLICATE_IN_BATCH = "duplicate_in_batch"
+NOT_FOUND = "not_found"
+
+# Начиная с какого размера пакета дешевле перестроить список id целиком
+_REBUILD_IDS_THRESHOLD = 64
+
+# Порядок сортировки в query_users: поле, с минусом — по убыванию
+UserSort = Literal["id", "-id", "age", "-age", "created_at", "-created_at"]
+
+
+class BulkOperationError(Exception):
+    """Пакетная операция отклонена целиком: ни одно изменение не применено."""
+
+    def __init__(self, errors: dict[int, str]):
+        super().__init__(f"{len(errors)} item(s) rejected")
+        # Номер элемента в пакете -> причина отказа
+        self.errors = errors
 
-@dataclass
-class UserModel:
-    """Модель пользователя в 'базе данных'."""
 
-    id: int
-    email: str
-    name: str
-    age: int
-    created_at: datetime = field(default_factory=datetime.now)
-    is_active: bool = True
+class InvalidCursorError(Exception):
+    """Пользователь-курсор не найден: продолжить выдачу с него нельзя."""
+
+    def __init__(self, user_id: int):
+        super().__init__(f"Cursor user {user_id} not found")
+        self.user_id = user_id
+
+
+class EmailTakenError(Exception):
+    """Email уже зарегистрирован на другого пользователя."""
+
+    def __init__(self, email: str):
+        super().__init__(f"Email {email} is already registered")
+        self.email = email
 
 
 class Database:
-    """Простая in-memory база данных для демонстрации."""
+    """
+    Простая in-memory база данных для демонстрации.
 
-    def __init__(self):
-        self._users: dict[int, UserModel] = {}
+    Если передан journal, каждое изменение пишется в журнал на диске,
+    а при создании база восстанавливается из снапшота и хвоста журнала.
+    """
+
+    def __init__(
+        self, storage: Optional[UserStorage] = None, journal: Optional[Journal] = None
+    ):
+        self._users: UserStorage = storage if storage is not None else DictUserStorage()
+        # Вторичный индекс email -> id: проверка уникальности за O(1)
+        self._email_index: dict[str, int] = {}
+        # Отсортированный список id для keyset-пагинации.
+        # id выдаются монотонно, поэтому вставка — это append в конец.
+        self._ids: list[int] = []
+        # Индексы для фильтров и сортировки в query_users
+        self._age_index = AgeIndex()
+        self._created_index = CreatedAtIndex()
+        # Неактивных обычно мало, поэтому храним именно их
+        self._inactive = SortedIds()
         self._next_id: int = 1
+        # Чтения идут параллельно, изменения — эксклюзивно. fsync журнала
+        # ждём уже после снятия блокировки, чтобы не держать читателей.
+        self._lock = RWLock()
+        self._snapshot_lock = threading.Lock()
+        self._journal = journal
+        if journal is not None:
+            self._recover()
         self._connected: bool = True
         logger.info("Database connection opened")
 
     def close(self):
         """Закрыть подключение к базе."""
+        if self._journal is not None:
+            # Дожидаемся фонового снапшота, если он идёт
+            with self._snapshot_lock:
+                self._journal.close()
         self._connected = False
         logger.info("Database connection closed")
 
+    def _recover(self) -> None:
+        """Восстановить состояние из снапшота и хвоста журнала."""
+        self._next_id, records = self._journal.recover()
+        for record in records:
+            if isinstance(record, UserUpdateRecord):
+                self._update(
+                    record.id,
+                    email=record.email,
+                    name=record.name,
+                    age=record.age,
+                    is_active=record.is_active,
+                )
+            elif isinstance(record, UserDeleteRecord):
+                self._delete(record.id)
+            else:
+                self._insert(
+                    record.id,
+                    email=record.email,
+                    name=record.name,
+                    age=record.age,
+                    created_at=record.created_at,
+                    is_active=record.is_active,
+                )
+        self._journal.open()
+        logger.info(
+            "Recovered %d users from %s", len(self._users), self._journal.directory
+        )
+
+    def _commit(self, lsn: int) -> None:
+        """Дождаться записи изменений на диск и при необходимости начать снапшот."""
+        if self._journal is None or not lsn:
+            return
+        self._journal.wait_durable(lsn)
+        if self._journal.needs_snapshot():
+            self._start_snapshot()
+
+    def _start_snapshot(self) -> None:
+        """Снапшот в фоновом потоке: запрос, перешедший порог, его не ждёт."""
+        # Снапшот делает один поток; остальные не ждут и продолжают работу
+        if not self._snapshot_lock.acquire(blocking=False):
+            return
+        threading.Thread(
+            target=self._snapshot_in_background, name="db-snapshot", daemon=True
+        ).start()
+
+    def _snapshot_in_background(self) -> None:
+        try:
+            self._write_snapshot()
+        except Exception:
+            # Журнал цел, снапшот повторится после следующих изменений
+            logger.exception("Background snapshot failed")
+        finally:
+            self._snapshot_lock.release()
+
+    def snapshot(self) -> None:
+        """Свернуть журнал в снапшот текущего состояния."""
+        if self._journal is None:
+            return
+        if not self._snapshot_lock.acquire(blocking=False):
+            return
+        try:
+            self._write_snapshot()
+        finally:
+            self._snapshot_lock.release()
+
+    def _write_snapshot(self) -> None:
+        # Под блокировкой только копируем хранилище (без копирования самих
+        # строк) и запоминаем LSN. Ожидающий писатель задерживает и новых
+        # читателей, поэтому сериализация и fsync идут уже без блокировки.
+        with self._lock.read():
+            users = self._users.copy()
+            next_id = self._next_id
+            lsn = self._journal.last_lsn
+        self._journal.snapshot(
+            users.values(), next_id=next_id, count=len(users), lsn=lsn
+        )
+
     def user_exists(self, email: str) -> bool:
         """Проверить, существует ли пользователь с таким email."""
-        return any(user.email == email for user in self._users.values())
+        with self._lock.read():
+            return email in self._email_index
 
     def get_user_by_email(self, email: str) -> Optional[UserModel]:
         """Найти пользователя по email."""
-        for user in self._users.values():
-            if user.email == email:
-                return user
-        return None
+        with self._lock.read():
+            user_id = self._email_index.get(email)
+            if user_id is None:
+                return None
+            return self._users.get(user_id)
 
     def get_user(self, user_id: int) -> Optional[UserModel]:
         """Получить пользователя по ID."""
-        return self._users.get(user_id)
+        with self._lock.read():
+            return self._users.get(user_id)
 
     def get_all_users(self) -> list[UserModel]:
         """Получить всех пользователей."""
-        return list(self._users.values())
+        with self._lock.read():
+            return list(self._users.values())
 
-    def create_user(self, email: str, name: str, age: int) -> UserModel:
-        """Создать нового пользователя."""
-        user = UserModel(
-            id=self._next_id, email=email, name=name, age=age, created_at=datetime.now()
+    def get_users_page(self, limit: int, after_id: int = 0) -> list[UserModel]:
+        """Получить не более limit пользователей с id > after_id (по возрастанию id)."""
+        with self._lock.read():
+            start = bisect_right(self._ids, after_id)
+            return [
+                self._users.get(user_id) for user_id in self._ids[start : start + limit]
+            ]
+
+    def query_users(
+        self,
+        limit: Optional[int],
+        after_id: Optional[int] = None,
+        is_active: Optional[bool] = None,
+        min_age: Optional[int] = None,
+        max_age: Optional[int] = None,
+        created_after: Optional[datetime] = None,
+        sort: UserSort = "id",
+        after: Optional[UserModel] = None,
+    ) -> list[UserModel]:
+        """
+        Получить не более limit пользователей по фильтрам в порядке sort
+        (limit=None — всех подходящих).
+
+        Выборку ведёт индекс поля сортировки (или, при сортировке по id,
+        самый узкий из подходящих индексов), остальные условия проверяются
+        на найденных строках. Стоимость — O(log N + k), где k — число
+        просмотренных кандидатов.
+
+        after_id — курсор: id последнего пользователя предыдущей страницы.
+        При сортировке не по id позиция курсора берётся из текущих значений
+        его полей; если курсор удалён, выбрасывается InvalidCursorError.
+        Вместо after_id можно передать after — последнюю строку предыдущей
+        страницы: так обход не зависит от удалений между страницами.
+        """
+        field = sort.lstrip("-")
+        reverse = sort.startswith("-")
+        low_age = 0 if min_age is None else min_age
+        high_age = MAX_AGE if max_age is None else min(max_age, MAX_AGE)
+        after_ts = created_after.timestamp() if created_after is not None else None
+
+        with self._lock.read():
+            cursor = after
+            if cursor is not None:
+                after_id = cursor.id
+            elif after_id is not None and field != "id":
+                cursor = self._users.get(after_id)
+                if cursor is None:
+                    raise InvalidCursorError(after_id)
+
+            check_age = min_age is not None or max_age is not None
+            check_created = after_ts is not None
+            check_active = is_active is not None
+            if field == "age":
+                ids = self._age_index.iter(
+                    low_age,
+                    high_age,
+                    after=(cursor.age, cursor.id) if cursor else None,
+                    reverse=reverse,
+                )
+                check_age = False
+            elif field == "created_at":
+                ids = self._created_index.iter(
+                    after_ts,
+                    after=(cursor.created_at.timestamp(), cursor.id)
+                    if cursor
+                    else None,
+                    reverse=reverse,
+                )
+                check_created = False
+            else:
+                # Сортировка по id: выборку ведёт самый узкий из индексов
+                sizes: dict[str, int] = {}
+                if is_active is False:
+                    sizes["inactive"] = len(self._inactive)
+                if check_age:
+                    sizes["age"] = self._age_index.count(low_age, high_age)
+                if check_created:
+                    sizes["created_at"] = self._created_index.count(after_ts)
+                narrowest = min(sizes, key=sizes.__getitem__, default=None)
+                if narrowest == "inactive":
+                    ids = self._inactive.iter(after_id, reverse)
+                    check_active = False
+                elif narrowest == "age":
+                    ids = self._age_index.iter_by_id(
+                        low_age, high_age, after_id, reverse
+                    )
+                    check_age = False
+                elif narrowest == "created_at":
+                    ids = self._created_index.iter_by_id(after_ts, after_id, reverse)
+                    check_created = False
+                else:
+                    ids = self._iter_ids(after_id, reverse)
+
+            def matches(user: UserModel) -> bool:
+                if check_active and user.is_active != is_active:
+                    return False
+                if check_age and not low_age <= user.age <= high_age:
+                    return False
+                if check_created and user.created_at.timestamp() <= after_ts:
+                    return False
+                return True
+
+            users = (self._users.get(user_id) for user_id in ids)
+            return list(islice(filter(matches, users), limit))
+
+    def _iter_ids(self, after_id: Optional[int], reverse: bool) -> Iterator[int]:
+        if not reverse:
+            start = 0 if after_id is None else bisect_right(self._ids, after_id)
+            return islice(self._ids, start, None)
+        stop = len(self._ids) if after_id is None else bisect_left(self._ids, after_id)
+        return (self._ids[pos] for pos in range(stop - 1, -1, -1))
+
+    def iter_users(
+        self, after_id: int = 0, batch_size: int = 1000
+    ) -> Iterator[UserModel]:
+        """
+        Лениво обойти пользователей с id > after_id.
+
+        Читает базу страницами по batch_size, поэтому не держит копию
+        всей таблицы и переживает изменения базы во время обхода.
+        """
+        while page := self.get_users_page(batch_size, after_id):
+            yield from page
+            after_id = page[-1].id
+
+    def _insert(
+        self,
+        user_id: int,
+        email: str,
+        name: str,
+        age: int,
+        created_at: datetime,
+        is_active: bool = True,
+    ) -> UserModel:
+        user = self._users.insert(
+            user_id,
+            email=email,
+            name=name,
+            age=age,
+            created_at=created_at,
+            is_active=is_active,
         )
-        self._users[self._next_id] = user
-        self._next_id += 1
+        self._email_index[email] = user_id
+        self._ids.append(user_id)
+        self._age_index.add(age, user_id)
+        self._created_index.add(created_at.timestamp(), user_id)
+        if not is_active:
+            self._inactive.add(user_id)
+        self._next_id = max(self._next_id, user_id + 1)
         return user
 
-    def update_user(
+    def _create(self, email: str, name: str, age: int) -> tuple[UserModel, int]:
+        """Создать пользователя и записать в журнал. Возвращает (user, LSN)."""
+        user = self._insert(
+            self._next_id, email=email, name=name, age=age, created_at=datetime.now()
+        )
+        lsn = self._journal.log_create(user) if self._journal is not None else 0
+        return user, lsn
+
+    def create_user(self, email: str, name: str, age: int) -> UserModel:
+        """
+        Создать нового пользователя.
+
+        Уникальность email не проверяется — для этого есть create_if_absent.
+        """
+        with self._lock.write():
+            user, lsn = self._create(email, name, age)
+        self._commit(lsn)
+        return user
+
+    def create_if_absent(self, email: str, name: str, age: int) -> Optional[UserModel]:
+        """
+        Атомарно создать пользователя, если email ещё не занят.
+
+        Проверка и вставка выполняются под одной блокировкой, поэтому
+        параллельные запросы с одинаковым email не создадут дубликат.
+        Возвращает None, если email уже зарегистрирован.
+        """
+        with self._lock.write():
+            if email in self._email_index:
+                return None
+            user, lsn = self._create(email, name, age)
+        self._commit(lsn)
+        return user
+
+    def _update(
         self,
         user_id: int,
         email: Optional[str] = None,
@@ -68,31 +385,270 @@ class Database:
         age: Optional[int] = None,
         is_active: Optional[bool] = None,
     ) -> Optional[UserModel]:
-        """Обновить пользователя."""
         user = self._users.get(user_id)
         if not user:
             return None
 
-        if email is not None:
-            user.email = email
-        if name is not None:
-            user.name = name
-        if age is not None:
-            user.age = age
-        if is_active is not None:
-            user.is_active = is_active
+        if email is not None and email != user.email:
+            del self._email_index[user.email]
+            self._email_index[email] = user_id
+        self._reindex(user, age=age, is_active=is_active)
+
+        return self._users.update(
+            user_id, email=email, name=name, age=age, is_active=is_active
+        )
+
+    def _reindex(
+        self, user: UserModel, age: Optional[int], is_active: Optional[bool]
+    ) -> None:
+        """Обновить индексы возраста и активности до изменения строки."""
+        if age is not None and age != user.age:
+            self._age_index.remove(user.age, user.id)
+            self._age_index.add(age, user.id)
+        if is_active is not None and is_active != user.is_active:
+            if is_active:
+                self._inactive.remove(user.id)
+            else:
+                self._inactive.add(user.id)
+
+    def _unindex(self, user: UserModel) -> None:
+        """Убрать удалённого пользователя из вторичных индексов."""
+        del self._email_index[user.email]
+        del self._ids[bisect_left(self._ids, user.id)]
+        self._age_index.remove(user.age, user.id)
+        self._created_index.remove(user.created_at.timestamp(), user.id)
+        if not user.is_active:
+            self._inactive.remove(user.id)
+
+    def _log_update(self, record: UserUpdateRecord) -> int:
+        return self._journal.log_update(record) if self._journal is not None else 0
+
+    def update_user(
+        self,
+        user_id: int,
+        email: Optional[str] = None,
+        name: Optional[str] = None,
+        age: Optional[int] = None,
+        is_active: Optional[bool] = None,
+    ) -> Optional[UserModel]:
+        """
+        Обновить пользователя.
 
+        Если новый email занят другим пользователем, выбрасывает
+        EmailTakenError и ничего не меняет.
+        """
+        with self._lock.write():
+            if user_id not in self._users:
+                return None
+            owner = self._email_index.get(email) if email is not None else None
+            if owner is not None and owner != user_id:
+                raise EmailTakenError(email)
+            user = self._update(
+                user_id, email=email, name=name, age=age, is_active=is_active
+            )
+            lsn = self._log_update(
+                UserUpdateRecord(
+                    id=user_id, email=email, name=name, age=age, is_active=is_active
+                )
+            )
+        self._commit(lsn)
         return user
 
+    def _delete(self, user_id: int) -> bool:
+        user = self._users.delete(user_id)
+        if user is None:
+            return False
+        self._unindex(user)
+        return True
+
+    def _log_delete(self, user_id: int) -> int:
+        return self._journal.log_delete(user_id) if self._journal is not None else 0
+
     def delete_user(self, user_id: int) -> bool:
         """Удалить пользователя."""
-        if user_id in self._users:
-            del self._users[user_id]
-            return True
-        return False
+        with self._lock.write():
+            if not self._delete(user_id):
+                return False
+            lsn = self._log_delete(user_id)
+        self._commit(lsn)
+        return True
+
+    def create_users(self, users: Sequence[tuple[str, str, int]]) -> list[UserModel]:
+        """
+        Атомарно создать пакет пользователей из кортежей (email, name, age).
+
+        Уникальность email проверяется и по базе, и внутри пакета.
+        Если хотя бы один элемент не проходит проверку, ничего не создаётся
+        и выбрасывается BulkOperationError.
+        """
+        with self._lock.write():
+            errors: dict[int, str] = {}
+            seen: set[str] = set()
+            for index, (email, _, _) in enumerate(users):
+                if email in self._email_index:
+                    errors[index] = EMAIL_TAKEN
+                elif email in seen:
+                    errors[index] = DUPLICATE_IN_BATCH
+                seen.add(email)
+            if errors:
+                raise BulkOperationError(errors)
+
+            created = []
+            lsn = 0
+            for email, name, age in users:
+                user, lsn = self._create(email, name, age)
+                created.append(user)
+        # Один fsync на весь пакет
+        self._commit(lsn)
+        return created
+
+    def update_users(self, updates: Sequence[dict[str, Any]]) -> list[UserModel]:
+        """
+        Атомарно обновить пакет пользователей.
+
+        Каждый элемент — словарь с ключом id и изменяемыми полями
+        (email, name, age, is_active). Email проверяется по итоговому
+        состоянию: пользователи пакета могут, например, обменяться email.
+        """
+        with self._lock.write():
+            errors: dict[int, str] = {}
+            seen_ids: set[int] = set()
+            final_emails: dict[int, str] = {}
+            for index, update in enumerate(updates):
+                user_id = update["id"]
+                user = self._users.get(user_id)
+                if user is None:
+                    errors[index] = NOT_FOUND
+                elif user_id in seen_ids:
+                    errors[index] = DUPLICATE_IN_BATCH
+                else:
+                    final_emails[user_id] = update.get("email") or user.email
+                seen_ids.add(user_id)
+
+            owners: dict[str, int] = {}
+            for index, update in enumerate(updates):
+                email = update.get("email")
+                if index in errors or email is None:
+                    continue
+                owner = self._email_index.get(email, update["id"])
+                if owner in final_emails and final_emails[owner] != email:
+                    # Текущий владелец email освобождает его в этом же пакете
+                    owner = update["id"]
+                if owner != update["id"]:
+                    errors[index] = EMAIL_TAKEN
+                elif owners.setdefault(email, owner) != owner:
+                    errors[index] = DUPLICATE_IN_BATCH
+            if errors:
+                raise BulkOperationError(errors)
+
+            # Сначала освобождаем старые email, затем занимаем новые —
+            # иначе обмен email внутри пакета испортит индекс
+            changed = {
+                update["id"]: self._users.get(update["id"]).email
+                for update in updates
+                if update.get("email") is not None
+            }
+            for old_email in changed.values():
+                del self._email_index[old_email]
+            for user_id in changed:
+                self._email_index[final_emails[user_id]] = user_id
+
+            updated = []
+            lsn = 0
+            for update in updates:
+                record = UserUpdateRecord(
+                    id=update["id"],
+                    email=update.get("email"),
+                    name=update.get("name"),
+                    age=update.get("age"),
+                    is_active=update.get("is_active"),
+                )
+                self._reindex(
+                    self._users.get(record.id),
+                    age=record.age,
+                    is_active=record.is_active,
+                )
+                updated.append(
+                    self._users.update(
+                        record.id,
+                        email=record.email,
+                        name=record.name,
+                        age=record.age,
+                        is_active=record.is_active,
+                    )
+                )
+                lsn = self._log_update(record)
+        self._commit(lsn)
+        return updated
+
+    def delete_users(self, user_ids: Sequence[int]) -> None:
+        """Атомарно удалить пакет пользователей по id."""
+        with self._lock.write():
+            errors: dict[int, str] = {}
+            seen: set[int] = set()
+            for index, user_id in enumerate(user_ids):
+                if user_id not in self._users:
+                    errors[index] = NOT_FOUND
+                elif user_id in seen:
+                    errors[index] = DUPLICATE_IN_BATCH
+                seen.add(user_id)
+            if errors:
+                raise BulkOperationError(errors)
+
+            lsn = 0
+            if len(seen) < _REBUILD_IDS_THRESHOLD:
+                for user_id in seen:
+                    self._delete(user_id)
+                    lsn = self._log_delete(user_id)
+            else:
+                for user_id in seen:
+                    del self._email_index[self._users.delete(user_id).email]
+                    lsn = self._log_delete(user_id)
+                self._ids = [user_id for user_id in self._ids if user_id not in seen]
+                self._age_index.remove_many(seen)
+                self._created_index.remove_many(seen)
+                self._inactive.remove_many(seen)
+        self._commit(lsn)
 
 
 _db_instance: Optional[Database] = None
+# Восстановление из журнала долгое: без блокировки параллельные запросы
+# создали бы несколько баз поверх одного users.wal
+_db_lock = threading.Lock()
+
+
+def create_database() -> Database:
+    """Создать базу по настройкам приложения."""
+    settings = get_settings()
+    journal = None
+    if settings.persistence_dir:
+        journal = Journal(
+            settings.persistence_dir,
+            snapshot_every=settings.snapshot_every,
+            group_commit_delay=settings.group_commit_delay_ms / 1000,
+        )
+    return Database(storage=STORAGE_ENGINES[settings.storage_engine](), journal=journal)
+
+
+def get_database() -> Database:
+    """Общая база приложения; создаётся один раз при первом обращении."""
+    global _db_instance
+
+    if _db_instance is None:
+        with _db_lock:
+            if _db_instance is None:
+                _db_instance = create_database()
+    return _db_instance
+
+
+def close_db() -> None:
+    """Закрыть общую базу при остановке приложения."""
+    global _db_instance
+
+    with _db_lock:
+        if _db_instance is not None:
+            _db_instance.close()
+            _db_instance = None
 
 
 def get_db() -> Generator[Database, None, None]:
@@ -101,13 +657,9 @@ def get_db() -> Generator[Database, None, None]:
 
     Использует yield для автоматического закрытия соединения после запроса.
     """
-    global _db_instance
-
-    if _db_instance is None:
-        _db_instance = Database()
-
+    db = get_database()
     try:
-        yield _db_instance
+        yield db
     finally:
         # В реальном проекте здесь закрывается сессия:
         # db.close()
@@ -0,0 +1,227 @@
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import islice
+from typing import Iterator, Optional
+
+# Возраст ограничен схемами (0..150), поэтому индекс — массив корзин
+MAX_AGE = 150
+
+
+class SortedIds:
+    """Отсортированное множество id в компактном array('q')."""
+
+    def __init__(self):
+        self._ids = array("q")
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, user_id: int) -> bool:
+        pos = bisect_left(self._ids, user_id)
+        return pos < len(self._ids) and self._ids[pos] == user_id
+
+    def add(self, user_id: int) -> None:
+        # id выдаются монотонно, поэтому почти всегда это append
+        if not self._ids or self._ids[-1] < user_id:
+            self._ids.append(user_id)
+        else:
+            self._ids.insert(bisect_left(self._ids, user_id), user_id)
+
+    def remove(self, user_id: int) -> None:
+        pos = bisect_left(self._ids, user_id)
+        if pos < len(self._ids) and self._ids[pos] == user_id:
+            del self._ids[pos]
+
+    def remove_many(self, user_ids: set[int]) -> None:
+        """Удалить сразу много id за один проход O(N)."""
+        self._ids = array("q", (i for i in self._ids if i not in user_ids))
+
+    def iter(
+        self, after_id: Optional[int] = None, reverse: bool = False
+    ) -> Iterator[int]:
+        """Обойти id по возрастанию (или убыванию), начиная строго после after_id."""
+        ids = self._ids
+        if not reverse:
+            start = 0 if after_id is None else bisect_right(ids, after_id)
+            for pos in range(start, len(ids)):
+                yield ids[pos]
+        else:
+            stop = len(ids) if after_id is None else bisect_left(ids, after_id)
+            for pos in range(stop - 1, -1, -1):
+                yield ids[pos]
+
+
+class AgeIndex:
+    """
+    Индекс по возрасту: корзина отсортированных id на каждое значение.
+
+    Диапазон [min_age, max_age] в порядке (age, id) обходится
+    за O(число корзин + k), без просмотра остальных пользователей.
+    """
+
+    def __init__(self):
+        self._buckets = [SortedIds() for _ in range(MAX_AGE + 1)]
+
+    def add(self, age: int, user_id: int) -> None:
+        self._buckets[age].add(user_id)
+
+    def remove(self, age: int, user_id: int) -> None:
+        self._buckets[age].remove(user_id)
+
+    def remove_many(self, user_ids: set[int]) -> None:
+        for bucket in self._buckets:
+            if bucket:
+                bucket.remove_many(user_ids)
+
+    def count(self, min_age: int = 0, max_age: int = MAX_AGE) -> int:
+        """Число пользователей в диапазоне возрастов."""
+        return sum(len(bucket) for bucket in self._buckets[min_age : max_age + 1])
+
+    def iter_by_id(
+        self,
+        min_age: int = 0,
+        max_age: int = MAX_AGE,
+        after_id: Optional[int] = None,
+        reverse: bool = False,
+    ) -> Iterator[int]:
+        """Обойти id диапазона возрастов в порядке id (слияние корзин)."""
+        return heapq.merge(
+            *(
+                bucket.iter(after_id, reverse)
+                for bucket in self._buckets[min_age : max_age + 1]
+                if bucket
+            ),
+            reverse=reverse,
+        )
+
+    def iter(
+        self,
+        min_age: int = 0,
+        max_age: int = MAX_AGE,
+        after: Optional[tuple[int, int]] = None,
+        reverse: bool = False,
+    ) -> Iterator[int]:
+        """
+        Обойти id в порядке (age, id) внутри диапазона возрастов.
+
+        after — курсор (age, id): обход начинается строго после него.
+        """
+        ages = range(min_age, max_age + 1)
+        if reverse:
+            ages = reversed(ages)
+        for age in ages:
+            if after is not None:
+                after_age, after_id = after
+                if (age < after_age) if not reverse else (age > after_age):
+                    continue
+                if age == after_age:
+                    yield from self._buckets[age].iter(after_id, reverse)
+                    continue
+            yield from self._buckets[age].iter(reverse=reverse)
+
+
+class CreatedAtIndex:
+    """
+    Индекс по времени создания: пары (timestamp, id), отсортированные
+    по timestamp, в двух параллельных массивах.
+
+    Пользователи создаются в порядке времени, поэтому вставка почти всегда
+    append; выборка «созданные после T» — бинарный поиск + k элементов.
+    """
+
+    def __init__(self):
+        self._timestamps = array("d")
+        self._ids = array("q")
+
+    def add(self, timestamp: float, user_id: int) -> None:
+        if not self._timestamps or (self._timestamps[-1], self._ids[-1]) < (
+            timestamp,
+            user_id,
+        ):
+            self._timestamps.append(timestamp)
+            self._ids.append(user_id)
+            return
+        pos = self._position(timestamp, user_id)
+        self._timestamps.insert(pos, timestamp)
+        self._ids.insert(pos, user_id)
+
+    def _position(self, timestamp: float, user_id: int) -> int:
+        """Позиция пары (timestamp, id) в порядке (timestamp, id)."""
+        lo = bisect_left(self._timestamps, timestamp)
+        hi = bisect_right(self._timestamps, timestamp, lo)
+        return bisect_left(self._ids, user_id, lo, hi)
+
+    def remove(self, timestamp: float, user_id: int) -> None:
+        pos = self._position(timestamp, user_id)
+        if pos < len(self._ids) and self._ids[pos] == user_id:
+            del self._timestamps[pos]
+            del self._ids[pos]
+
+    def remove_many(self, user_ids: set[int]) -> None:
+        keep = [pos for pos, i in enumerate(self._ids) if i not in user_ids]
+        self._timestamps = array("d", (self._timestamps[pos] for pos in keep))
+        self._ids = array("q", (self._ids[pos] for pos in keep))
+
+    def count(self, created_after: Optional[float] = None) -> int:
+        """Число пользователей, созданных строго после created_after."""
+        if created_after is None:
+            return len(self._ids)
+        return len(self._ids) - bisect_right(self._timestamps, created_after)
+
+    def iter_by_id(
+        self,
+        created_after: Optional[float] = None,
+        after_id: Optional[int] = None,
+        reverse: bool = False,
+    ) -> Iterator[int]:
+        """
+        Обойти id созданных после created_after в порядке id.
+
+        Кандидаты находятся бинарным поиском и сортируются по id за
+        O(k log k); id растут вместе со временем создания, поэтому обычно
+        они уже почти упорядочены и сортировка близка к O(k).
+        """
+        lo = 0
+        if created_after is not None:
+            lo = bisect_right(self._timestamps, created_after)
+        ids = sorted(self._ids[lo:])
+        if not reverse:
+            start = 0 if after_id is None else bisect_right(ids, after_id)
+            return islice(ids, start, None)
+        stop = len(ids) if after_id is None else bisect_left(ids, after_id)
+        return (ids[pos] for pos in range(stop - 1, -1, -1))
+
+    def iter(
+        self,
+        created_after: Optional[float] = None,
+        after: Optional[tuple[float, int]] = None,
+        reverse: bool = False,
+    ) -> Iterator[int]:
+        """
+        Обойти id в порядке (created_at, id).
+
+        created_after — нижняя граница (строго больше), after — курсор
+        (timestamp, id): обход начинается строго после него.
+        """
+        lo = 0
+        if created_after is not None:
+            lo = bisect_right(self._timestamps, created_after)
+        hi = len(self._ids)
+        if after is not None:
+            timestamp, user_id = after
+            pos = self._position(timestamp, user_id)
+            if not reverse:
+                # Пропускаем сам курсор, если он ещё в индексе
+                if pos < hi and self._ids[pos] == user_id:
+                    pos += 1
+                lo = max(lo, pos)
+            else:
+                hi = min(hi, pos)
+
+        if not reverse:
+            for pos in range(lo, hi):
+                yield self._ids[pos]
+        else:
+            for pos in range(hi - 1, lo - 1, -1):
+                yield self._ids[pos]
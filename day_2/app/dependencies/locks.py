@@ -0,0 +1,50 @@
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class RWLock:
+    """
+    Блокировка «много читателей / один писатель».
+
+    Читатели работают параллельно друг с другом, писатель — эксклюзивно.
+    Ожидающий писатель блокирует новых читателей, чтобы поток чтений
+    не мог бесконечно откладывать запись. Блокировка не реентерабельна.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers: int = 0
+        self._writer: bool = False
+        self._waiting_writers: int = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        """Захватить блокировку на чтение."""
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        """Захватить блокировку на запись."""
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
@@ -0,0 +1,406 @@
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+from .storage import UserModel
+
+logger = logging.getLogger(__name__)
+
+OP_CREATE = 1
+OP_UPDATE = 2
+OP_DELETE = 3
+
+# Кадр журнала: длина и CRC32 полезной нагрузки
+_FRAME = struct.Struct("<II")
+# Заголовок записи: операция и LSN (порядковый номер записи)
+_RECORD = struct.Struct("<BQ")
+# Строка пользователя без строковых полей: id, age, created_at, is_active
+_ROW = struct.Struct("<QBdB")
+_UPDATE = struct.Struct("<QB")
+_DELETE = struct.Struct("<Q")
+_STR_LEN = struct.Struct("<H")
+_BYTE = struct.Struct("<B")
+
+_SNAPSHOT_MAGIC = b"USRSNAP1"
+# Заголовок снапшота: LSN последней вошедшей записи, next_id, число строк
+_SNAPSHOT_HEADER = struct.Struct("<QQQ")
+
+# Биты маски изменённых полей в записи OP_UPDATE
+_EMAIL, _NAME, _AGE, _IS_ACTIVE = 1, 2, 4, 8
+
+
+@dataclass(slots=True)
+class UserUpdateRecord:
+    """Запись журнала об изменении полей пользователя."""
+
+    id: int
+    email: Optional[str] = None
+    name: Optional[str] = None
+    age: Optional[int] = None
+    is_active: Optional[bool] = None
+
+
+@dataclass(slots=True)
+class UserDeleteRecord:
+    """Запись журнала об удалении пользователя."""
+
+    id: int
+
+
+JournalRecord = Union[UserModel, UserUpdateRecord, UserDeleteRecord]
+
+
+def _pack_str(value: str) -> bytes:
+    data = value.encode()
+    return _STR_LEN.pack(len(data)) + data
+
+
+def _unpack_str(buffer, offset: int) -> tuple[str, int]:
+    (length,) = _STR_LEN.unpack_from(buffer, offset)
+    offset += _STR_LEN.size
+    return str(buffer[offset : offset + length], "utf-8"), offset + length
+
+
+def _pack_row(user: UserModel) -> bytes:
+    return (
+        _ROW.pack(user.id, user.age, user.created_at.timestamp(), user.is_active)
+        + _pack_str(user.email)
+        + _pack_str(user.name)
+    )
+
+
+def _unpack_row(buffer, offset: int) -> tuple[UserModel, int]:
+    user_id, age, created_at, is_active = _ROW.unpack_from(buffer, offset)
+    email, offset = _unpack_str(buffer, offset + _ROW.size)
+    name, offset = _unpack_str(buffer, offset)
+    user = UserModel(
+        id=user_id,
+        email=email,
+        name=name,
+        age=age,
+        created_at=datetime.fromtimestamp(created_at),
+        is_active=bool(is_active),
+    )
+    return user, offset
+
+
+def _pack_update(record: UserUpdateRecord) -> bytes:
+    mask = 0
+    fields = b""
+    if record.email is not None:
+        mask |= _EMAIL
+        fields += _pack_str(record.email)
+    if record.name is not None:
+        mask |= _NAME
+        fields += _pack_str(record.name)
+    if record.age is not None:
+        mask |= _AGE
+        fields += _BYTE.pack(record.age)
+    if record.is_active is not None:
+        mask |= _IS_ACTIVE
+        fields += _BYTE.pack(record.is_active)
+    return _UPDATE.pack(record.id, mask) + fields
+
+
+def _unpack_update(buffer, offset: int) -> UserUpdateRecord:
+    user_id, mask = _UPDATE.unpack_from(buffer, offset)
+    offset += _UPDATE.size
+    record = UserUpdateRecord(id=user_id)
+    if mask & _EMAIL:
+        record.email, offset = _unpack_str(buffer, offset)
+    if mask & _NAME:
+        record.name, offset = _unpack_str(buffer, offset)
+    if mask & _AGE:
+        (record.age,) = _BYTE.unpack_from(buffer, offset)
+        offset += _BYTE.size
+    if mask & _IS_ACTIVE:
+        record.is_active = bool(buffer[offset])
+    return record
+
+
+def _fsync_dir(directory: Path) -> None:
+    """Зафиксировать на диске изменения в самой директории (rename, create)."""
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class Journal:
+    """
+    Журнал упреждающей записи (WAL) и снапшоты для in-memory базы.
+
+    Каждое изменение дописывается в конец журнала. Записи копятся в буфере,
+    а фоновый поток сбрасывает их на диск одним write + fsync на пачку
+    (group commit): пока идёт fsync, следующие записи набираются в новую
+    пачку. Вызывающий код ждёт durable-подтверждения через wait_durable.
+
+    Раз в snapshot_every записей журнал сворачивается в бинарный снапшот,
+    после чего из него удаляются вошедшие в снапшот записи. При старте
+    снапшот читается через mmap, а из журнала проигрывается только хвост
+    после LSN снапшота.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        snapshot_every: int = 100_000,
+        group_commit_delay: float = 0.0,
+    ):
+        self._dir = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._log_path = self._dir / "users.wal"
+        self._snapshot_path = self._dir / "users.snapshot"
+        self._snapshot_every = snapshot_every
+        # Дополнительная пауза перед fsync, чтобы собрать пачку побольше
+        self._group_commit_delay = group_commit_delay
+
+        self._lock = threading.Lock()
+        # Запись в файл журнала и его замена при снапшоте не пересекаются
+        self._file_lock = threading.Lock()
+        self._has_pending = threading.Condition(self._lock)
+        self._durable = threading.Condition(self._lock)
+        self._buffer: list[bytes] = []
+        self._next_lsn: int = 1
+        self._durable_lsn: int = 0
+        self._snapshot_lsn: int = 0
+        self._records_since_snapshot: int = 0
+        self._error: Optional[BaseException] = None
+        self._closed: bool = False
+
+        self._file = None
+        self._flusher: Optional[threading.Thread] = None
+
+    @property
+    def directory(self) -> Path:
+        return self._dir
+
+    @property
+    def last_lsn(self) -> int:
+        """LSN последней записи, отданной в журнал."""
+        with self._lock:
+            return self._next_lsn - 1
+
+    def recover(self) -> tuple[int, Iterator[JournalRecord]]:
+        """
+        Прочитать сохранённое состояние.
+
+        Возвращает next_id из снапшота и итератор записей: сначала строки
+        снапшота (UserModel), затем хвост журнала. После применения всех
+        записей нужно вызвать open(), чтобы начать дозапись в журнал.
+        """
+        next_id = 1
+        snapshot: Optional[mmap.mmap] = None
+        if self._snapshot_path.exists() and self._snapshot_path.stat().st_size:
+            with open(self._snapshot_path, "rb") as f:
+                snapshot = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if snapshot[: len(_SNAPSHOT_MAGIC)] != _SNAPSHOT_MAGIC:
+                snapshot.close()
+                raise ValueError(f"{self._snapshot_path} is not a users snapshot")
+            self._snapshot_lsn, next_id, _ = _SNAPSHOT_HEADER.unpack_from(
+                snapshot, len(_SNAPSHOT_MAGIC)
+            )
+            self._durable_lsn = self._snapshot_lsn
+
+        return next_id, self._replay(snapshot)
+
+    def _replay(self, snapshot: Optional[mmap.mmap]) -> Iterator[JournalRecord]:
+        if snapshot is not None:
+            with snapshot:
+                offset = len(_SNAPSHOT_MAGIC)
+                _, _, count = _SNAPSHOT_HEADER.unpack_from(snapshot, offset)
+                offset += _SNAPSHOT_HEADER.size
+                for _ in range(count):
+                    user, offset = _unpack_row(snapshot, offset)
+                    yield user
+
+        yield from self._replay_log()
+
+    def _replay_log(self) -> Iterator[JournalRecord]:
+        if not self._log_path.exists() or not self._log_path.stat().st_size:
+            return
+
+        with open(self._log_path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with data:
+            offset = 0
+            while offset + _FRAME.size <= len(data):
+                length, checksum = _FRAME.unpack_from(data, offset)
+                start = offset + _FRAME.size
+                payload = data[start : start + length]
+                if len(payload) < length or zlib.crc32(payload) != checksum:
+                    break
+                offset = start + length
+
+                op, lsn = _RECORD.unpack_from(payload)
+                if lsn <= self._snapshot_lsn:
+                    # Запись уже вошла в снапшот (сбой между снапшотом и обрезкой)
+                    continue
+                self._durable_lsn = lsn
+                self._records_since_snapshot += 1
+                if op == OP_CREATE:
+                    user, _ = _unpack_row(payload, _RECORD.size)
+                    yield user
+                elif op == OP_UPDATE:
+                    yield _unpack_update(payload, _RECORD.size)
+                elif op == OP_DELETE:
+                    (user_id,) = _DELETE.unpack_from(payload, _RECORD.size)
+                    yield UserDeleteRecord(id=user_id)
+
+            valid_size = offset
+        if valid_size < self._log_path.stat().st_size:
+            # Недописанный хвост после сбоя: отрезаем, чтобы дописывать после него
+            logger.warning("Truncating torn journal tail at offset %d", valid_size)
+            os.truncate(self._log_path, valid_size)
+
+    def open(self) -> None:
+        """Открыть журнал на дозапись и запустить фоновый сброс на диск."""
+        self._next_lsn = self._durable_lsn + 1
+        self._file = open(self._log_path, "ab", buffering=0)
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name="journal-flusher", daemon=True
+        )
+        self._flusher.start()
+        logger.info("Journal opened at %s", self._dir)
+
+    def _append(self, op: int, body: bytes) -> int:
+        with self._lock:
+            if self._error is not None:
+                raise RuntimeError("Journal is unavailable") from self._error
+            lsn = self._next_lsn
+            self._next_lsn += 1
+            payload = _RECORD.pack(op, lsn) + body
+            self._buffer.append(_FRAME.pack(len(payload), zlib.crc32(payload)))
+            self._buffer.append(payload)
+            self._records_since_snapshot += 1
+            self._has_pending.notify()
+            return lsn
+
+    def log_create(self, user: UserModel) -> int:
+        """Записать создание пользователя. Возвращает LSN записи."""
+        return self._append(OP_CREATE, _pack_row(user))
+
+    def log_update(self, record: UserUpdateRecord) -> int:
+        """Записать изменение полей пользователя. Возвращает LSN записи."""
+        return self._append(OP_UPDATE, _pack_update(record))
+
+    def log_delete(self, user_id: int) -> int:
+        """Записать удаление пользователя. Возвращает LSN записи."""
+        return self._append(OP_DELETE, _DELETE.pack(user_id))
+
+    def wait_durable(self, lsn: int) -> None:
+        """Дождаться, пока запись с указанным LSN будет сброшена на диск."""
+        with self._lock:
+            while self._durable_lsn < lsn:
+                if self._error is not None:
+                    raise RuntimeError("Journal is unavailable") from self._error
+                self._durable.wait()
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._lock:
+                while not self._buffer and not self._closed:
+                    self._has_pending.wait()
+                if not self._buffer:
+                    return
+            if self._group_commit_delay:
+                time.sleep(self._group_commit_delay)
+
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+                batch_lsn = self._next_lsn - 1
+            try:
+                with self._file_lock:
+                    self._file.write(b"".join(batch))
+                    os.fsync(self._file.fileno())
+            except OSError as e:
+                logger.exception("Journal flush failed")
+                with self._lock:
+                    self._error = e
+                    self._durable.notify_all()
+                return
+
+            with self._lock:
+                self._durable_lsn = batch_lsn
+                self._durable.notify_all()
+
+    def needs_snapshot(self) -> bool:
+        """Пора ли свернуть журнал в снапшот."""
+        return self._records_since_snapshot >= self._snapshot_every
+
+    def snapshot(
+        self, users: Iterable[UserModel], next_id: int, count: int, lsn: int
+    ) -> None:
+        """
+        Сохранить снапшот состояния на момент записи lsn и сжать журнал.
+
+        users и next_id должны соответствовать ровно записям до lsn
+        включительно. Более поздние записи могут дописываться в журнал
+        параллельно: они остаются в нём и проигрываются поверх снапшота.
+        """
+        tmp_path = self._snapshot_path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_SNAPSHOT_MAGIC)
+            f.write(_SNAPSHOT_HEADER.pack(lsn, next_id, count))
+            chunk: list[bytes] = []
+            for user in users:
+                chunk.append(_pack_row(user))
+                if len(chunk) >= 10_000:
+                    f.write(b"".join(chunk))
+                    chunk.clear()
+            f.write(b"".join(chunk))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._snapshot_path)
+        _fsync_dir(self._dir)
+
+        # Записи журнала до lsn теперь в снапшоте; при сбое до замены
+        # журнала они будут пропущены при восстановлении по LSN
+        with self._file_lock:
+            self._drop_log_before(lsn)
+        with self._lock:
+            self._snapshot_lsn = lsn
+            self._records_since_snapshot = self._next_lsn - 1 - lsn
+        logger.info("Journal compacted into snapshot at LSN %d", lsn)
+
+    def _drop_log_before(self, lsn: int) -> None:
+        """Переписать журнал, оставив только записи с LSN больше lsn."""
+        with open(self._log_path, "rb") as f:
+            data = f.read()
+        offset = 0
+        while offset + _FRAME.size <= len(data):
+            length, _ = _FRAME.unpack_from(data, offset)
+            _, record_lsn = _RECORD.unpack_from(data, offset + _FRAME.size)
+            if record_lsn > lsn:
+                break
+            offset += _FRAME.size + length
+
+        tmp_path = self._log_path.with_suffix(".wal.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data[offset:])
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._log_path)
+        _fsync_dir(self._dir)
+        self._file.close()
+        self._file = open(self._log_path, "ab", buffering=0)
+
+    def close(self) -> None:
+        """Сбросить оставшиеся записи на диск и закрыть журнал."""
+        with self._lock:
+            self._closed = True
+            self._has_pending.notify()
+        if self._flusher is not None:
+            self._flusher.join()
+        if self._file is not None:
+            self._file.close()
+        logger.info("Journal closed")
@@ -0,0 +1,266 @@
+import sys
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Iterator, Optional, Protocol
+
+
+@dataclass(slots=True)
+class UserModel:
+    """Модель пользователя в 'базе данных'."""
+
+    id: int
+    email: str
+    name: str
+    age: int
+    created_at: datetime = field(default_factory=datetime.now)
+    is_active: bool = True
+
+
+class UserStorage(Protocol):
+    """Хранилище строк таблицы пользователей, ключ — id пользователя."""
+
+    def __len__(self) -> int: ...
+
+    def __contains__(self, user_id: int) -> bool: ...
+
+    def get(self, user_id: int) -> Optional[UserModel]: ...
+
+    def values(self) -> Iterator[UserModel]: ...
+
+    def insert(
+        self,
+        user_id: int,
+        email: str,
+        name: str,
+        age: int,
+        created_at: datetime,
+        is_active: bool = True,
+    ) -> UserModel: ...
+
+    def update(
+        self,
+        user_id: int,
+        email: Optional[str] = None,
+        name: Optional[str] = None,
+        age: Optional[int] = None,
+        is_active: Optional[bool] = None,
+    ) -> Optional[UserModel]: ...
+
+    def delete(self, user_id: int) -> Optional[UserModel]: ...
+
+    # Неизменяемая копия на текущий момент, без копирования самих строк
+    def copy(self) -> "UserStorage": ...
+
+
+class DictUserStorage:
+    """
+    Хранилище-словарь: по объекту UserModel на пользователя.
+
+    Объекты строк не меняются на месте: update подменяет строку новым
+    объектом, поэтому copy — это копия словаря, а не всех строк.
+    """
+
+    def __init__(self):
+        self._users: dict[int, UserModel] = {}
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self._users
+
+    def get(self, user_id: int) -> Optional[UserModel]:
+        return self._users.get(user_id)
+
+    def values(self) -> Iterator[UserModel]:
+        return iter(self._users.values())
+
+    def insert(
+        self,
+        user_id: int,
+        email: str,
+        name: str,
+        age: int,
+        created_at: datetime,
+        is_active: bool = True,
+    ) -> UserModel:
+        user = UserModel(
+            id=user_id,
+            email=email,
+            name=name,
+            age=age,
+            created_at=created_at,
+            is_active=is_active,
+        )
+        self._users[user_id] = user
+        return user
+
+    def update(
+        self,
+        user_id: int,
+        email: Optional[str] = None,
+        name: Optional[str] = None,
+        age: Optional[int] = None,
+        is_active: Optional[bool] = None,
+    ) -> Optional[UserModel]:
+        user = self._users.get(user_id)
+        if not user:
+            return None
+
+        user = self._users[user_id] = UserModel(
+            id=user_id,
+            email=user.email if email is None else email,
+            name=user.name if name is None else name,
+            age=user.age if age is None else age,
+            created_at=user.created_at,
+            is_active=user.is_active if is_active is None else is_active,
+        )
+        return user
+
+    def delete(self, user_id: int) -> Optional[UserModel]:
+        return self._users.pop(user_id, None)
+
+    def copy(self) -> "DictUserStorage":
+        clone = DictUserStorage()
+        clone._users = self._users.copy()
+        return clone
+
+
+# Флаги строки в ColumnarUserStorage
+_ALIVE = 0b01
+_ACTIVE = 0b10
+
+
+class ColumnarUserStorage:
+    """
+    Компактное колоночное хранилище (struct-of-arrays).
+
+    Каждое поле лежит в отдельной колонке, номер строки — id - 1:
+    возраст в array('B'), время создания как epoch-секунды в array('d'),
+    флаги (строка жива / аккаунт активен) в bytearray, имена интернируются.
+    Объект UserModel создаётся только при чтении. Удалённые строки
+    остаются «дырами», поэтому id не должны переиспользоваться.
+    """
+
+    def __init__(self):
+        self._emails: list[Optional[str]] = []
+        self._names: list[Optional[str]] = []
+        self._ages = array("B")
+        self._created_at = array("d")
+        self._flags = bytearray()
+        self._count: int = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, user_id: int) -> bool:
+        return self._row(user_id) is not None
+
+    def _row(self, user_id: int) -> Optional[int]:
+        row = user_id - 1
+        if 0 <= row < len(self._flags) and self._flags[row] & _ALIVE:
+            return row
+        return None
+
+    def _materialize(self, row: int) -> UserModel:
+        return UserModel(
+            id=row + 1,
+            email=self._emails[row],
+            name=self._names[row],
+            age=self._ages[row],
+            created_at=datetime.fromtimestamp(self._created_at[row]),
+            is_active=bool(self._flags[row] & _ACTIVE),
+        )
+
+    def get(self, user_id: int) -> Optional[UserModel]:
+        row = self._row(user_id)
+        if row is None:
+            return None
+        return self._materialize(row)
+
+    def values(self) -> Iterator[UserModel]:
+        for row, flags in enumerate(self._flags):
+            if flags & _ALIVE:
+                yield self._materialize(row)
+
+    def insert(
+        self,
+        user_id: int,
+        email: str,
+        name: str,
+        age: int,
+        created_at: datetime,
+        is_active: bool = True,
+    ) -> UserModel:
+        row = user_id - 1
+        if row < len(self._flags):
+            if self._flags[row] & _ALIVE:
+                raise KeyError(f"User {user_id} already exists")
+        else:
+            # Пропущенные id (например, после удаления в журнале) — пустые строки
+            gap = row + 1 - len(self._flags)
+            self._emails.extend([None] * gap)
+            self._names.extend([None] * gap)
+            self._ages.extend(bytes(gap))
+            self._created_at.extend(array("d", bytes(8 * gap)))
+            self._flags.extend(bytes(gap))
+
+        self._emails[row] = email
+        self._names[row] = sys.intern(name)
+        self._ages[row] = age
+        self._created_at[row] = created_at.timestamp()
+        self._flags[row] = _ALIVE | (_ACTIVE if is_active else 0)
+        self._count += 1
+        return self._materialize(row)
+
+    def update(
+        self,
+        user_id: int,
+        email: Optional[str] = None,
+        name: Optional[str] = None,
+        age: Optional[int] = None,
+        is_active: Optional[bool] = None,
+    ) -> Optional[UserModel]:
+        row = self._row(user_id)
+        if row is None:
+            return None
+
+        if email is not None:
+            self._emails[row] = email
+        if name is not None:
+            self._names[row] = sys.intern(name)
+        if age is not None:
+            self._ages[row] = age
+        if is_active is not None:
+            self._flags[row] = _ALIVE | (_ACTIVE if is_active else 0)
+
+        return self._materialize(row)
+
+    def delete(self, user_id: int) -> Optional[UserModel]:
+        row = self._row(user_id)
+        if row is None:
+            return None
+
+        user = self._materialize(row)
+        self._emails[row] = None
+        self._names[row] = None
+        self._flags[row] = 0
+        self._count -= 1
+        return user
+
+    def copy(self) -> "ColumnarUserStorage":
+        clone = ColumnarUserStorage()
+        clone._emails = self._emails.copy()
+        clone._names = self._names.copy()
+        clone._ages = array("B", self._ages)
+        clone._created_at = array("d", self._created_at)
+        clone._flags = self._flags.copy()
+        clone._count = self._count
+        return clone
+
+
+STORAGE_ENGINES: dict[str, type[UserStorage]] = {
+    "dict": DictUserStorage,
+    "columnar": ColumnarUserStorage,
+}
@@ -1,8 +1,10 @@
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
 from app.config import get_settings
+from app.dependencies.database import close_db, get_database
 from app.routers import users_router
 
 settings = get_settings()
@@ -16,6 +18,18 @@ logger.info(
     f"Starting {settings.app_name} v{settings.app_version} on {settings.host}:{settings.port}"
 )
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Lifespan контекст: база (с восстановлением из журнала) создаётся до
+    первого запроса, при остановке журнал сбрасывается на диск.
+    """
+    get_database()
+    yield
+    close_db()
+
+
 app = FastAPI(
     title=settings.app_name,
     description="""
@@ -33,6 +47,7 @@ app = FastAPI(
     """,
     version=settings.app_version,
     debug=settings.debug,
+    lifespan=lifespan,
 )
 
 app.include_router(users_router)
@@ -1,7 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from dataclasses import fields
+from datetime import datetime
+from typing import Any, Iterator, Optional
 
-from app.schemas import UserCreate, UserResponse, UserUpdate
-from app.dependencies import get_db, Database
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from app.schemas import (
+    BulkItemResult,
+    BulkResponse,
+    UserBulkUpdate,
+    UserCreate,
+    UserResponse,
+    UserUpdate,
+)
+from app.dependencies import (
+    get_db,
+    BulkOperationError,
+    Database,
+    EmailTakenError,
+    InvalidCursorError,
+)
+from app.dependencies.database import (
+    DUPLICATE_IN_BATCH,
+    EMAIL_TAKEN,
+    NOT_FOUND,
+    UserSort,
+)
+from app.dependencies.storage import UserModel
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
 router = APIRouter(
     prefix="/users",
@@ -10,6 +42,38 @@ router = APIRouter(
 )
 
 
+class PydanticJSONResponse(Response):
+    """
+    JSON-ответ из готовых байтов.
+
+    Данные сериализуются в bytes заранее скомпилированными TypeAdapter
+    (pydantic-core), поэтому FastAPI не валидирует ответ повторно через
+    response_model и не гоняет его через jsonable_encoder.
+    response_model в декораторах остаётся для документации OpenAPI.
+    """
+
+    media_type = "application/json"
+
+
+# UserModel сериализуется напрямую, без построения UserResponse на каждую
+# строку: поля dataclass совпадают со схемой ответа (проверяется ниже).
+_user_adapter = TypeAdapter(UserModel)
+_users_adapter = TypeAdapter(list[UserModel])
+_user_responses_adapter = TypeAdapter(list[UserResponse])
+_bulk_response_adapter = TypeAdapter(BulkResponse)
+
+if [f.name for f in fields(UserModel)] != list(UserResponse.model_fields):
+    raise RuntimeError("UserModel fields must match UserResponse")
+
+
+def _user_json(user: UserModel) -> bytes:
+    return _user_adapter.dump_json(user)
+
+
+def _users_json(users: list[UserModel]) -> bytes:
+    return _users_adapter.dump_json(users)
+
+
 @router.post(
     "/",
     response_model=UserResponse,
@@ -17,7 +81,9 @@ router = APIRouter(
     summary="Создать пользователя",
     description="Создаёт нового пользователя с указанным email и именем.",
 )
-def create_user(user: UserCreate, db: Database = Depends(get_db)) -> UserResponse:
+def create_user(
+    user: UserCreate, db: Database = Depends(get_db)
+) -> PydanticJSONResponse:
     """
     Создать нового пользователя.
 
@@ -25,21 +91,41 @@ def create_user(user: UserCreate, db: Database = Depends(get_db)) -> UserRespons
     - **name**: имя пользователя
     - **age**: возраст
     """
-    if db.user_exists(user.email):
+    new_user = db.create_if_absent(email=user.email, name=user.name, age=user.age)
+    if new_user is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Email {user.email} уже зарегистрирован",
         )
 
-    new_user = db.create_user(email=user.email, name=user.name, age=user.age)
+    return PydanticJSONResponse(
+        _user_json(new_user), status_code=status.HTTP_201_CREATED
+    )
+
 
-    return UserResponse(
-        id=new_user.id,
-        email=new_user.email,
-        name=new_user.name,
-        age=new_user.age,
-        created_at=new_user.created_at,
-        is_active=new_user.is_active,
+def iter_users_ndjson(
+    db: Database,
+    after_id: Optional[int] = None,
+    batch_size: int = 1000,
+    **filters: Any,
+) -> Iterator[bytes]:
+    """
+    Лениво сериализовать пользователей в NDJSON: одна строка на пользователя.
+
+    База читается страницами по batch_size, каждая страница отдаётся одним
+    куском, поэтому в памяти не больше одной страницы. filters передаются
+    в Database.query_users (фильтры и sort).
+    """
+    users = db.query_users(batch_size, after_id=after_id, **filters)
+    while users:
+        yield b"".join(_user_adapter.dump_json(user) + b"\n" for user in users)
+        users = db.query_users(batch_size, after=users[-1], **filters)
+
+
+def _invalid_cursor(after_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Курсор after_id={after_id} не найден: пользователь удалён",
     )
 
 
@@ -47,21 +133,266 @@ def create_user(user: UserCreate, db: Database = Depends(get_db)) -> UserRespons
     "/",
     response_model=list[UserResponse],
     summary="Получить всех пользователей",
+    responses={
+        200: {
+            "content": {NDJSON_MEDIA_TYPE: {}},
+            "description": "Страница пользователей или NDJSON-поток при stream=true",
+        }
+    },
+)
+def get_users(
+    limit: Optional[int] = Query(
+        default=None,
+        ge=1,
+        le=MAX_PAGE_SIZE,
+        description=(
+            f"Размер страницы; с after_id по умолчанию {DEFAULT_PAGE_SIZE}, "
+            "без limit и after_id — весь список"
+        ),
+    ),
+    after_id: Optional[int] = Query(
+        default=None,
+        ge=0,
+        description="Курсор: вернуть пользователей с id больше указанного",
+    ),
+    stream: bool = Query(
+        default=False,
+        description="Отдать всех пользователей потоком в формате NDJSON",
+    ),
+    is_active: Optional[bool] = Query(
+        default=None, description="Только активные (true) или неактивные (false)"
+    ),
+    min_age: Optional[int] = Query(
+        default=None, ge=0, le=150, description="Минимальный возраст"
+    ),
+    max_age: Optional[int] = Query(
+        default=None, ge=0, le=150, description="Максимальный возраст"
+    ),
+    created_after: Optional[datetime] = Query(
+        default=None, description="Только созданные позже указанного момента"
+    ),
+    sort: UserSort = Query(
+        default="id",
+        description="Поле сортировки: id, age или created_at; с минусом — по убыванию",
+    ),
+    db: Database = Depends(get_db),
+):
+    """
+    Получить список пользователей.
+
+    Без `limit` и `after_id` возвращаются все подходящие пользователи одним
+    списком, как до появления пагинации. Пагинация по курсору (keyset)
+    включается параметром `limit` или `after_id` (тогда страница по умолчанию
+    — `DEFAULT_PAGE_SIZE`): передайте в `after_id` значение заголовка
+    `X-Next-After-Id` из предыдущего ответа.
+    Фильтры и сортировка обслуживаются индексами базы, без полного
+    просмотра таблицы; курсор работает с любым порядком `sort`.
+    При `stream=true` все подходящие пользователи после `after_id` отдаются
+    потоком NDJSON без накопления всего списка в памяти, `limit` игнорируется.
+    """
+    filters = dict(
+        is_active=is_active,
+        min_age=min_age,
+        max_age=max_age,
+        created_after=created_after,
+        sort=sort,
+    )
+    if stream:
+        # Курсор проверяем до начала потока, пока ещё можно вернуть 400
+        if after_id is not None and sort.lstrip("-") != "id":
+            if db.get_user(after_id) is None:
+                raise _invalid_cursor(after_id)
+        return StreamingResponse(
+            iter_users_ndjson(db, after_id=after_id, **filters),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    paginated = limit is not None or after_id is not None
+    if paginated and limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    try:
+        users = db.query_users(limit, after_id=after_id, **filters)
+    except InvalidCursorError:
+        raise _invalid_cursor(after_id)
+    response = PydanticJSONResponse(_users_json(users))
+    if paginated and len(users) == limit:
+        response.headers["X-Next-After-Id"] = str(users[-1].id)
+    return response
+
+
+_bulk_create_adapter = TypeAdapter(list[UserCreate])
+_bulk_update_adapter = TypeAdapter(list[UserBulkUpdate])
+_bulk_delete_adapter = TypeAdapter(list[int])
+
+_BULK_ERRORS = {
+    EMAIL_TAKEN: (status.HTTP_400_BAD_REQUEST, "Email уже зарегистрирован"),
+    DUPLICATE_IN_BATCH: (status.HTTP_400_BAD_REQUEST, "Повторяется в пакете"),
+    NOT_FOUND: (status.HTTP_404_NOT_FOUND, "Пользователь не найден"),
+}
+
+
+def _bulk_body(schema: dict[str, Any]) -> dict[str, Any]:
+    """Описание тела пакетного запроса для OpenAPI."""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": schema}},
+        }
+    }
+
+
+def _list_schema(model: type[BaseModel]) -> dict[str, Any]:
+    return {"type": "array", "items": model.model_json_schema()}
+
+
+async def _validate_bulk(request: Request, adapter: TypeAdapter) -> list:
+    """
+    Провалидировать весь пакет за один проход.
+
+    TypeAdapter разбирает JSON сразу в модели, минуя промежуточные dict.
+    """
+    try:
+        return adapter.validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors()]
+        )
+
+
+def _bulk_json(
+    bulk: BulkResponse, status_code: int = status.HTTP_200_OK
+) -> PydanticJSONResponse:
+    return PydanticJSONResponse(
+        _bulk_response_adapter.dump_json(bulk), status_code=status_code
+    )
+
+
+def _rejected(
+    error: BulkOperationError, ids: list[Optional[int]]
+) -> PydanticJSONResponse:
+    """Ответ на отклонённый пакет: ошибки по элементам, остальные — не применены."""
+    results = []
+    for index, user_id in enumerate(ids):
+        reason = error.errors.get(index)
+        if reason is None:
+            results.append(
+                BulkItemResult(
+                    index=index,
+                    id=user_id,
+                    status=status.HTTP_409_CONFLICT,
+                    detail="Не применено: пакет содержит ошибки",
+                )
+            )
+        else:
+            item_status, detail = _BULK_ERRORS[reason]
+            results.append(
+                BulkItemResult(
+                    index=index, id=user_id, status=item_status, detail=detail
+                )
+            )
+    return _bulk_json(
+        BulkResponse(applied=False, results=results),
+        status_code=status.HTTP_400_BAD_REQUEST,
+    )
+
+
+def _applied(users: list[UserModel], item_status: int) -> PydanticJSONResponse:
+    responses = _user_responses_adapter.validate_python(users)
+    return _bulk_json(
+        BulkResponse(
+            applied=True,
+            results=[
+                BulkItemResult(index=index, id=user.id, status=item_status, user=user)
+                for index, user in enumerate(responses)
+            ],
+        ),
+        status_code=item_status,
+    )
+
+
+@router.post(
+    "/bulk",
+    response_model=BulkResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Создать пользователей пакетом",
+    responses={400: {"model": BulkResponse}},
+    openapi_extra=_bulk_body(_list_schema(UserCreate)),
 )
-def get_users(db: Database = Depends(get_db)) -> list[UserResponse]:
-    """Получить список всех пользователей."""
-    users = db.get_all_users()
-    return [
-        UserResponse(
-            id=user.id,
-            email=user.email,
-            name=user.name,
-            age=user.age,
-            created_at=user.created_at,
-            is_active=user.is_active,
+async def create_users_bulk(
+    request: Request, db: Database = Depends(get_db)
+) -> PydanticJSONResponse:
+    """
+    Атомарно создать пакет пользователей.
+
+    Email проверяются на уникальность и по базе, и внутри пакета.
+    Если хотя бы один элемент невалиден, не создаётся ни один пользователь.
+    """
+    users = await _validate_bulk(request, _bulk_create_adapter)
+    try:
+        created = await run_in_threadpool(
+            db.create_users, [(user.email, user.name, user.age) for user in users]
         )
-        for user in users
-    ]
+    except BulkOperationError as e:
+        return _rejected(e, [None] * len(users))
+
+    return _applied(created, status.HTTP_201_CREATED)
+
+
+@router.patch(
+    "/bulk",
+    response_model=BulkResponse,
+    summary="Обновить пользователей пакетом",
+    responses={400: {"model": BulkResponse}},
+    openapi_extra=_bulk_body(_list_schema(UserBulkUpdate)),
+)
+async def update_users_bulk(
+    request: Request, db: Database = Depends(get_db)
+) -> PydanticJSONResponse:
+    """
+    Атомарно обновить пакет пользователей.
+
+    Каждый элемент содержит `id` и только те поля, которые нужно обновить.
+    """
+    updates = await _validate_bulk(request, _bulk_update_adapter)
+    try:
+        updated = await run_in_threadpool(
+            db.update_users,
+            [update.model_dump(exclude_none=True) for update in updates],
+        )
+    except BulkOperationError as e:
+        return _rejected(e, [update.id for update in updates])
+
+    return _applied(updated, status.HTTP_200_OK)
+
+
+@router.delete(
+    "/bulk",
+    response_model=BulkResponse,
+    summary="Удалить пользователей пакетом",
+    responses={400: {"model": BulkResponse}},
+    openapi_extra=_bulk_body({"type": "array", "items": {"type": "integer"}}),
+)
+async def delete_users_bulk(
+    request: Request, db: Database = Depends(get_db)
+) -> PydanticJSONResponse:
+    """Атомарно удалить пакет пользователей по списку ID."""
+    user_ids = await _validate_bulk(request, _bulk_delete_adapter)
+    try:
+        await run_in_threadpool(db.delete_users, user_ids)
+    except BulkOperationError as e:
+        return _rejected(e, user_ids)
+
+    return _bulk_json(
+        BulkResponse(
+            applied=True,
+            results=[
+                BulkItemResult(
+                    index=index, id=user_id, status=status.HTTP_204_NO_CONTENT
+                )
+                for index, user_id in enumerate(user_ids)
+            ],
+        )
+    )
 
 
 @router.get(
@@ -69,7 +400,7 @@ def get_users(db: Database = Depends(get_db)) -> list[UserResponse]:
     response_model=UserResponse,
     summary="Получить пользователя по ID",
 )
-def get_user(user_id: int, db: Database = Depends(get_db)) -> UserResponse:
+def get_user(user_id: int, db: Database = Depends(get_db)) -> PydanticJSONResponse:
     """Получить пользователя по его ID."""
     user = db.get_user(user_id)
 
@@ -79,14 +410,7 @@ def get_user(user_id: int, db: Database = Depends(get_db)) -> UserResponse:
             detail=f"Пользователь с ID {user_id} не найден",
         )
 
-    return UserResponse(
-        id=user.id,
-        email=user.email,
-        name=user.name,
-        age=user.age,
-        created_at=user.created_at,
-        is_active=user.is_active,
-    )
+    return PydanticJSONResponse(_user_json(user))
 
 
 @router.patch(
@@ -96,42 +420,32 @@ def get_user(user_id: int, db: Database = Depends(get_db)) -> UserResponse:
 )
 def update_user(
     user_id: int, user_update: UserUpdate, db: Database = Depends(get_db)
-) -> UserResponse:
+) -> PydanticJSONResponse:
     """
     Частичное обновление пользователя.
 
     Передайте только те поля, которые нужно обновить.
     """
-    existing_user = db.get_user(user_id)
-    if not existing_user:
+    try:
+        updated_user = db.update_user(
+            user_id=user_id,
+            email=user_update.email,
+            name=user_update.name,
+            age=user_update.age,
+            is_active=user_update.is_active,
+        )
+    except EmailTakenError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Email {user_update.email} уже зарегистрирован",
+        )
+    if updated_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Пользователь с ID {user_id} не найден",
         )
 
-    if user_update.email and user_update.email != existing_user.email:
-        if db.user_exists(user_update.email):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Email {user_update.email} уже зарегистрирован",
-            )
-
-    updated_user = db.update_user(
-        user_id=user_id,
-        email=user_update.email,
-        name=user_update.name,
-        age=user_update.age,
-        is_active=user_update.is_active,
-    )
-
-    return UserResponse(
-        id=updated_user.id,
-        email=updated_user.email,
-        name=updated_user.name,
-        age=updated_user.age,
-        created_at=updated_user.created_at,
-        is_active=updated_user.is_active,
-    )
+    return PydanticJSONResponse(_user_json(updated_user))
 
 
 @router.delete(
@@ -1,3 +1,17 @@
-from .user import UserCreate, UserResponse, UserUpdate
+from .user import (
+    BulkItemResult,
+    BulkResponse,
+    UserBulkUpdate,
+    UserCreate,
+    UserResponse,
+    UserUpdate,
+)
 
-__all__ = ["UserCreate", "UserResponse", "UserUpdate"]
+__all__ = [
+    "BulkItemResult",
+    "BulkResponse",
+    "UserBulkUpdate",
+    "UserCreate",
+    "UserResponse",
+    "UserUpdate",
+]
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 
 
 class UserCreate(BaseModel):
@@ -35,6 +35,9 @@ class UserCreate(BaseModel):
 class UserResponse(BaseModel):
     """Схема ответа с данными пользователя."""
 
+    # Позволяет валидировать UserModel из базы напрямую, без копирования полей
+    model_config = ConfigDict(from_attributes=True)
+
     id: int = Field(
         description="Уникальный идентификатор пользователя", examples=[1, 42, 100]
     )
@@ -91,3 +94,35 @@ class UserUpdate(BaseModel):
         if v is not None and not v.strip():
             raise ValueError("Имя не может быть пустым")
         return v.strip() if v else None
+
+
+class UserBulkUpdate(UserUpdate):
+    """Элемент пакетного обновления: id пользователя и изменяемые поля."""
+
+    id: int = Field(description="ID обновляемого пользователя", examples=[1])
+
+
+class BulkItemResult(BaseModel):
+    """Результат обработки одного элемента пакета."""
+
+    index: int = Field(description="Номер элемента в пакете", examples=[0])
+    status: int = Field(
+        description="HTTP-статус, соответствующий результату элемента",
+        examples=[201, 400, 404],
+    )
+    id: Optional[int] = Field(default=None, description="ID пользователя")
+    detail: Optional[str] = Field(default=None, description="Причина ошибки")
+    user: Optional[UserResponse] = Field(
+        default=None, description="Данные пользователя после операции"
+    )
+
+
+class BulkResponse(BaseModel):
+    """Ответ пакетной операции.
+
+    Пакет применяется атомарно: при ошибке хотя бы в одном элементе
+    не применяется ни одно изменение, а applied равен False.
+    """
+
+    applied: bool = Field(description="Применены ли изменения")
+    results: list[BulkItemResult] = Field(description="Результаты по элементам")
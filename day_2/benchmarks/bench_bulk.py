@@ -0,0 +1,59 @@
+"""
+Бенчмарк пропускной способности пакетного создания пользователей.
+
+Сравнивает цикл из N запросов POST /users/ с одним POST /users/bulk
+на N пользователей. Приложение вызывается в процессе через TestClient,
+поэтому сеть не учитывается — реальный выигрыш от пакетов ещё больше.
+
+Запуск:
+    uv run python -m benchmarks.bench_bulk
+"""
+
+import argparse
+import logging
+from time import perf_counter
+
+from fastapi.testclient import TestClient
+
+from app.dependencies import Database, get_db
+from app.main import app
+
+
+def payload(start: int, count: int) -> list[dict]:
+    return [
+        {"email": f"user{i}@example.com", "name": f"User {i}", "age": i % 100}
+        for i in range(start, start + count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=5_000)
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    db = Database()
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+
+    users = payload(0, args.count)
+    started = perf_counter()
+    for user in users:
+        assert client.post("/users/", json=user).status_code == 201
+    single = args.count / (perf_counter() - started)
+
+    users = payload(args.count, args.count)
+    started = perf_counter()
+    assert client.post("/users/bulk", json=users).status_code == 201
+    bulk = args.count / (perf_counter() - started)
+
+    print(f"users: {args.count}")
+    print(f"{'mode':>8} | {'пользователей/с':>16}")
+    print("-" * 27)
+    print(f"{'single':>8} | {single:>16.0f}")
+    print(f"{'bulk':>8} | {bulk:>16.0f}")
+    print(f"speedup: x{bulk / single:.1f}")
+
+
+if __name__ == "__main__":
+    main()
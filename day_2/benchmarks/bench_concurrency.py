@@ -0,0 +1,157 @@
+"""
+Многопоточный стресс-тест Database: корректность и масштабирование.
+
+1. Гонка создания: все потоки пытаются создать одних и тех же
+   пользователей через create_if_absent — каждый email создаётся ровно раз.
+2. Смешанная нагрузка (создание, обновление с обменом email, удаление,
+   чтение) с проверкой согласованности индексов после завершения.
+3. Пропускная способность чтений при 1..N потоках.
+4. Запись с журналом при 1..N потоках: group commit объединяет fsync
+   параллельных запросов.
+
+Запуск:
+    uv run python -m benchmarks.bench_concurrency
+"""
+
+import argparse
+import random
+import tempfile
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from app.dependencies import BulkOperationError, Database, EmailTakenError
+from app.dependencies.persistence import Journal
+
+THREADS = (1, 2, 4, 8)
+
+
+def check_consistency(db: Database) -> None:
+    """Проверить, что индексы соответствуют хранилищу."""
+    users = db.get_all_users()
+    assert len(users) == len(db._email_index) == len(db._ids)
+    assert db._ids == sorted(db._ids)
+    for user in users:
+        assert db._email_index[user.email] == user.id
+        assert db._ids[bisect_left(db._ids, user.id)] == user.id
+
+
+def race_creates(threads: int, emails: int) -> None:
+    db = Database()
+
+    def worker(seed: int) -> int:
+        order = list(range(emails))
+        random.Random(seed).shuffle(order)
+        created = 0
+        for i in order:
+            if db.create_if_absent(f"user{i}@example.com", f"User {i}", i % 100):
+                created += 1
+        return created
+
+    with ThreadPoolExecutor(threads) as pool:
+        created = sum(pool.map(worker, range(threads)))
+    assert created == emails, f"создано {created} вместо {emails}"
+    check_consistency(db)
+    print(f"гонка создания: {threads} потоков x {emails} email — дубликатов нет")
+
+
+def mixed_load(threads: int, operations: int) -> None:
+    db = Database()
+    db.create_users([(f"seed{i}@example.com", "Seed", 1) for i in range(1_000)])
+
+    def worker(seed: int) -> None:
+        rnd = random.Random(seed)
+        for _ in range(operations):
+            op = rnd.random()
+            user_id = rnd.randint(1, db._next_id)
+            email = f"user{rnd.randint(0, 2_000)}@example.com"
+            if op < 0.3:
+                db.create_if_absent(email, "User", rnd.randint(0, 150))
+            elif op < 0.5:
+                try:
+                    db.update_user(user_id, email=email, age=rnd.randint(0, 150))
+                except EmailTakenError:
+                    pass
+            elif op < 0.6:
+                other = rnd.randint(1, db._next_id)
+                a, b = db.get_user(user_id), db.get_user(other)
+                if a and b and a.id != b.id:
+                    try:
+                        db.update_users(
+                            [
+                                {"id": a.id, "email": b.email},
+                                {"id": b.id, "email": a.email},
+                            ]
+                        )
+                    except BulkOperationError:
+                        pass
+            elif op < 0.7:
+                db.delete_user(user_id)
+            else:
+                db.get_user(user_id)
+                db.get_users_page(limit=10, after_id=user_id)
+
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(worker, range(threads)))
+    check_consistency(db)
+    print(
+        f"смешанная нагрузка: {threads} потоков x {operations} операций — индексы согласованы"
+    )
+
+
+def read_throughput(reads: int) -> None:
+    db = Database()
+    db.create_users([(f"user{i}@example.com", "User", 1) for i in range(100_000)])
+
+    def worker(seed: int) -> None:
+        rnd = random.Random(seed)
+        for _ in range(reads):
+            db.get_user(rnd.randint(1, 100_000))
+
+    print()
+    print(f"{'потоков':>8} | {'чтений/с':>10}")
+    print("-" * 21)
+    for threads in THREADS:
+        started = perf_counter()
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(worker, range(threads)))
+        rate = threads * reads / (perf_counter() - started)
+        print(f"{threads:>8} | {rate:>10.0f}")
+
+
+def journal_throughput(creates: int) -> None:
+    print()
+    print(f"{'потоков':>8} | {'создан./с (WAL)':>16}")
+    print("-" * 27)
+    for threads in (1, 4, 16):
+        with tempfile.TemporaryDirectory() as directory:
+            db = Database(journal=Journal(directory, snapshot_every=10**9))
+
+            def worker(seed: int) -> None:
+                for i in range(creates):
+                    db.create_if_absent(f"user{seed}-{i}@example.com", "User", 1)
+
+            started = perf_counter()
+            with ThreadPoolExecutor(threads) as pool:
+                list(pool.map(worker, range(threads)))
+            rate = threads * creates / (perf_counter() - started)
+            db.close()
+        print(f"{threads:>8} | {rate:>16.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--operations", type=int, default=20_000)
+    parser.add_argument("--reads", type=int, default=100_000)
+    parser.add_argument("--journal-creates", type=int, default=1_000)
+    args = parser.parse_args()
+
+    race_creates(args.threads, emails=10_000)
+    mixed_load(args.threads, args.operations)
+    read_throughput(args.reads)
+    journal_throughput(args.journal_creates)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Бенчмарк создания пользователя при разном размере базы.
+
+Повторяет логику POST /users/: проверка уникальности email + вставка.
+Для сравнения замеряется и старая проверка линейным проходом по всем
+пользователям.
+
+Запуск:
+    uv run python -m benchmarks.bench_email_index
+"""
+
+import argparse
+from time import perf_counter_ns
+
+from app.dependencies import Database
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+
+def fill(db: Database, start: int, stop: int) -> None:
+    """Наполнить базу пользователями с номерами из [start, stop)."""
+    for i in range(start, stop):
+        db.create_user(email=f"user{i}@example.com", name=f"User {i}", age=i % 100)
+
+
+def bench_create(db: Database, start: int, rounds: int) -> float:
+    """Среднее время (мкс) проверки email + создания одного пользователя."""
+    started = perf_counter_ns()
+    for i in range(start, start + rounds):
+        email = f"user{i}@example.com"
+        if not db.user_exists(email):
+            db.create_user(email=email, name=f"User {i}", age=i % 100)
+    return (perf_counter_ns() - started) / rounds / 1_000
+
+
+def bench_linear_scan(db: Database, rounds: int) -> float:
+    """Среднее время (мкс) проверки email линейным проходом (как было раньше)."""
+    # Список, а не итератор: его проходит каждый из rounds раундов
+    users = db.get_all_users()
+    started = perf_counter_ns()
+    for _ in range(rounds):
+        any(user.email == "missing@example.com" for user in users)
+    return (perf_counter_ns() - started) / rounds / 1_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=10_000)
+    parser.add_argument("--scan-rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'users':>10} | {'create, мкс':>12} | {'linear scan, мкс':>17}")
+    print("-" * 46)
+    db = Database()
+    filled = 0
+    for size in SIZES:
+        fill(db, filled, size)
+        filled = size
+        scan = bench_linear_scan(db, args.scan_rounds)
+        # Создаём пользователей за пределами уже занятого диапазона email
+        create = bench_create(db, 10 * size, args.rounds)
+        print(f"{size:>10} | {create:>12.2f} | {scan:>17.2f}")
+
+
+if __name__ == "__main__":
+    main()
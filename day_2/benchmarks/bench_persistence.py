@@ -0,0 +1,95 @@
+"""
+Бенчмарк персистентности: пропускная способность записи и время восстановления.
+
+Запись: создание пользователей без журнала, с журналом по одному
+(fsync на каждую операцию) и пакетами (один fsync на пакет).
+Восстановление: снапшот на N пользователей + хвост журнала.
+
+Запуск:
+    uv run python -m benchmarks.bench_persistence
+"""
+
+import argparse
+import tempfile
+from time import perf_counter
+
+from app.dependencies import Database
+from app.dependencies.persistence import Journal
+from app.dependencies.storage import STORAGE_ENGINES
+
+
+def users(start: int, count: int) -> list[tuple[str, str, int]]:
+    return [
+        (f"user{i}@example.com", f"User {i % 1000}", i % 100)
+        for i in range(start, start + count)
+    ]
+
+
+def bench_writes(directory: str, count: int, batch: int) -> None:
+    print(f"Запись {count} пользователей")
+    print(f"{'mode':>14} | {'пользователей/с':>16}")
+    print("-" * 33)
+
+    db = Database()
+    started = perf_counter()
+    for email, name, age in users(0, count):
+        db.create_user(email, name, age)
+    print(f"{'memory':>14} | {count / (perf_counter() - started):>16.0f}")
+
+    db = Database(journal=Journal(f"{directory}/single", snapshot_every=10**9))
+    started = perf_counter()
+    for email, name, age in users(0, count):
+        db.create_user(email, name, age)
+    print(f"{'wal, single':>14} | {count / (perf_counter() - started):>16.0f}")
+    db.close()
+
+    db = Database(journal=Journal(f"{directory}/bulk", snapshot_every=10**9))
+    started = perf_counter()
+    for start in range(0, count, batch):
+        db.create_users(users(start, batch))
+    print(f"{f'wal, bulk {batch}':>14} | {count / (perf_counter() - started):>16.0f}")
+    db.close()
+
+
+def bench_recovery(directory: str, count: int, tail: int) -> None:
+    path = f"{directory}/recovery"
+    db = Database(journal=Journal(path, snapshot_every=10**9))
+    for start in range(0, count, 10_000):
+        db.create_users(users(start, min(10_000, count - start)))
+    started = perf_counter()
+    db.snapshot()
+    snapshot_time = perf_counter() - started
+    for start in range(count, count + tail, 1_000):
+        db.create_users(users(start, 1_000))
+    db.close()
+
+    print()
+    print(f"Восстановление: снапшот {count} + хвост журнала {tail} записей")
+    print(f"запись снапшота: {snapshot_time:.2f} с")
+    print(f"{'engine':>9} | {'время, с':>9}")
+    print("-" * 21)
+    for engine, storage_cls in STORAGE_ENGINES.items():
+        started = perf_counter()
+        db = Database(storage=storage_cls(), journal=Journal(path))
+        elapsed = perf_counter() - started
+        assert len(db.get_users_page(limit=1, after_id=count + tail - 1)) == 1
+        db.close()
+        print(f"{engine:>9} | {elapsed:>9.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writes", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=1_000)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--tail", type=int, default=10_000)
+    parser.add_argument("--dir", help="Директория для файлов (по умолчанию временная)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        bench_writes(directory, args.writes, args.batch)
+        bench_recovery(directory, args.users, args.tail)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Бенчмарк выборок с фильтрами и сортировкой при 1M пользователей.
+
+Сравнивает Database.query_users (вторичные индексы по возрасту,
+активности и времени создания) с полным просмотром таблицы и фильтрацией
+в Python — так раньше приходилось делать клиенту с результатом GET /users/.
+
+Запуск:
+    uv run python -m benchmarks.bench_queries
+"""
+
+import argparse
+from time import perf_counter_ns
+
+from app.dependencies import Database
+from app.dependencies.storage import STORAGE_ENGINES
+
+LIMIT = 100
+BATCH = 10_000
+
+
+def fill(db: Database, size: int) -> None:
+    """Наполнить базу; каждый сотый пользователь неактивен."""
+    for start in range(0, size, BATCH):
+        db.create_users(
+            [
+                (f"user{i}@example.com", f"User {i}", i * 7919 % 100)
+                for i in range(start, min(start + BATCH, size))
+            ]
+        )
+    db.update_users(
+        [{"id": user_id, "is_active": False} for user_id in range(1, size + 1, 100)]
+    )
+
+
+def scan(db: Database, sort: str, **filters) -> list:
+    """Полный просмотр: отфильтровать всех пользователей и отсортировать."""
+    is_active = filters.get("is_active")
+    min_age = filters.get("min_age", 0)
+    max_age = filters.get("max_age", 150)
+    created_after = filters.get("created_after")
+    users = [
+        user
+        for user in db.get_all_users()
+        if (is_active is None or user.is_active == is_active)
+        and min_age <= user.age <= max_age
+        and (created_after is None or user.created_at > created_after)
+    ]
+    field = sort.lstrip("-")
+    users.sort(
+        key=lambda user: (getattr(user, field), user.id), reverse=sort.startswith("-")
+    )
+    return users[:LIMIT]
+
+
+def timed(func, rounds: int) -> tuple[float, list]:
+    """Среднее время вызова (мкс) и результат последнего вызова."""
+    started = perf_counter_ns()
+    for _ in range(rounds):
+        result = func()
+    return (perf_counter_ns() - started) / rounds / 1_000, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--rounds", type=int, default=1_000)
+    parser.add_argument("--scan-rounds", type=int, default=2)
+    parser.add_argument("--storage", choices=sorted(STORAGE_ENGINES), default="dict")
+    args = parser.parse_args()
+
+    db = Database(storage=STORAGE_ENGINES[args.storage]())
+    fill(db, args.users)
+    # Граница «недавно созданных»: последние 1% пользователей
+    recent = db.get_user(args.users - args.users // 100).created_at
+
+    queries = {
+        "is_active=false": dict(is_active=False),
+        "age 30..31, sort=age": dict(min_age=30, max_age=31, sort="age"),
+        "active, age 30..31": dict(is_active=True, min_age=30, max_age=31),
+        "recent, sort=-created_at": dict(created_after=recent, sort="-created_at"),
+        "recent, sort=id": dict(created_after=recent),
+        "recent, age 30..31": dict(created_after=recent, min_age=30, max_age=31),
+        "recent, inactive, age>=50": dict(
+            created_after=recent, is_active=False, min_age=50, sort="created_at"
+        ),
+    }
+
+    print(f"{args.users} пользователей, {args.storage}, страница {LIMIT}")
+    print(
+        f"{'запрос':>27} | {'индекс, мкс':>12} | {'скан, мкс':>12} | {'ускорение':>9}"
+    )
+    print("-" * 70)
+    for title, params in queries.items():
+        sort = params.pop("sort", "id")
+        indexed, result = timed(
+            lambda: db.query_users(LIMIT, sort=sort, **params), args.rounds
+        )
+        scanned, expected = timed(lambda: scan(db, sort, **params), args.scan_rounds)
+        assert [u.id for u in result] == [u.id for u in expected], title
+        print(
+            f"{title:>27} | {indexed:>12.1f} | {scanned:>12.0f} | "
+            f"{scanned / indexed:>8.0f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
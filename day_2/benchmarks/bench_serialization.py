@@ -0,0 +1,95 @@
+"""
+Бенчмарк сериализации GET /users/ при 10k пользователей.
+
+before — прежний обработчик: UserResponse(...) с ручным копированием
+полей на каждого пользователя, затем повторная валидация через
+response_model и стандартный JSON-энкодер FastAPI.
+after — текущий обработчик: TypeAdapter валидирует UserModel через
+from_attributes и сразу сериализует в bytes.
+
+Сравниваются страница на 1000 пользователей и выдача всех 10k
+(раньше — одним списком, теперь — NDJSON-потоком).
+
+Запуск:
+    uv run python -m benchmarks.bench_serialization
+"""
+
+import argparse
+import logging
+from time import perf_counter
+
+from fastapi import APIRouter, Depends
+from fastapi.testclient import TestClient
+
+from app.dependencies import Database, get_db
+from app.main import app
+from app.routers.users import MAX_PAGE_SIZE
+from app.schemas import UserResponse
+
+legacy_router = APIRouter(prefix="/legacy")
+
+
+def _legacy_response(users) -> list[UserResponse]:
+    return [
+        UserResponse(
+            id=user.id,
+            email=user.email,
+            name=user.name,
+            age=user.age,
+            created_at=user.created_at,
+            is_active=user.is_active,
+        )
+        for user in users
+    ]
+
+
+@legacy_router.get("/users/page", response_model=list[UserResponse])
+def legacy_page(db: Database = Depends(get_db)) -> list[UserResponse]:
+    return _legacy_response(db.get_users_page(limit=MAX_PAGE_SIZE))
+
+
+@legacy_router.get("/users/all", response_model=list[UserResponse])
+def legacy_all(db: Database = Depends(get_db)) -> list[UserResponse]:
+    return _legacy_response(db.get_all_users())
+
+
+def rps(client: TestClient, url: str, seconds: float) -> float:
+    requests = 0
+    started = perf_counter()
+    while perf_counter() - started < seconds:
+        assert client.get(url).status_code == 200
+        requests += 1
+    return requests / (perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    db = Database()
+    db.create_users(
+        [(f"user{i}@example.com", f"User {i}", i % 100) for i in range(args.users)]
+    )
+    app.include_router(legacy_router)
+    app.dependency_overrides[get_db] = lambda: db
+    client = TestClient(app)
+
+    cases = (
+        ("page 1000", "/legacy/users/page", f"/users/?limit={MAX_PAGE_SIZE}"),
+        (f"all {args.users}", "/legacy/users/all", "/users/?stream=true"),
+    )
+    print(f"{'case':>11} | {'before, rps':>11} | {'after, rps':>10} | {'speedup':>7}")
+    print("-" * 50)
+    for case, before_url, after_url in cases:
+        before = rps(client, before_url, args.seconds)
+        after = rps(client, after_url, args.seconds)
+        print(
+            f"{case:>11} | {before:>11.1f} | {after:>10.1f} | x{after / before:>6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
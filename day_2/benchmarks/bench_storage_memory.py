@@ -0,0 +1,102 @@
+"""
+Бенчмарк памяти движков хранения пользователей (tracemalloc).
+
+Сравнивает байты на пользователя:
+- legacy: обычный @dataclass с __dict__ в dict[int, ...] (как было раньше);
+- dict: DictUserStorage со slotted UserModel;
+- columnar: ColumnarUserStorage (колонки array/bytearray, интернированные имена).
+
+Отдельно замеряется Database целиком (хранилище + индексы).
+
+Запуск:
+    uv run python -m benchmarks.bench_storage_memory
+"""
+
+import argparse
+import gc
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from app.dependencies import Database
+from app.dependencies.storage import ColumnarUserStorage, DictUserStorage
+
+# Имена в реальных данных часто повторяются
+NAMES_POOL = 1000
+
+
+@dataclass
+class LegacyUserModel:
+    """UserModel до перехода на slots — эталон для сравнения."""
+
+    id: int
+    email: str
+    name: str
+    age: int
+    created_at: datetime = field(default_factory=datetime.now)
+    is_active: bool = True
+
+
+def rows(count: int):
+    for i in range(1, count + 1):
+        # f-строки создают новый объект str на каждой строке — как парсинг JSON
+        yield i, f"user{i}@example.com", f"User {i % NAMES_POOL}", i % 100
+
+
+def fill_legacy(count: int) -> dict[int, LegacyUserModel]:
+    users = {}
+    for user_id, email, name, age in rows(count):
+        users[user_id] = LegacyUserModel(
+            id=user_id, email=email, name=name, age=age, created_at=datetime.now()
+        )
+    return users
+
+
+def fill_storage(storage_cls, count: int):
+    storage = storage_cls()
+    for user_id, email, name, age in rows(count):
+        storage.insert(user_id, email, name, age, created_at=datetime.now())
+    return storage
+
+
+def fill_database(storage_cls, count: int) -> Database:
+    db = Database(storage=storage_cls())
+    for _, email, name, age in rows(count):
+        db.create_user(email=email, name=name, age=age)
+    return db
+
+
+def measure(build, count: int) -> float:
+    """Байты на пользователя, удерживаемые построенной структурой."""
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    result = build(count)
+    gc.collect()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return (after - before) / count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    cases = (
+        ("storage", "legacy", fill_legacy),
+        ("storage", "dict", lambda n: fill_storage(DictUserStorage, n)),
+        ("storage", "columnar", lambda n: fill_storage(ColumnarUserStorage, n)),
+        ("database", "dict", lambda n: fill_database(DictUserStorage, n)),
+        ("database", "columnar", lambda n: fill_database(ColumnarUserStorage, n)),
+    )
+    print(f"users: {args.count}")
+    print(f"{'scope':>9} | {'engine':>9} | {'байт/пользователь':>18}")
+    print("-" * 42)
+    for scope, engine, build in cases:
+        print(f"{scope:>9} | {engine:>9} | {measure(build, args.count):>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
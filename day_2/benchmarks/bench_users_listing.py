@@ -0,0 +1,90 @@
+"""
+Бенчмарк памяти и времени выдачи списка пользователей.
+
+Сравнивает пиковое потребление памяти (tracemalloc) при:
+- full: старом подходе — копия всех пользователей + UserResponse на каждого;
+- page: одной странице keyset-пагинации;
+- stream: NDJSON-потоке по всем пользователям.
+
+Запуск:
+    uv run python -m benchmarks.bench_users_listing
+"""
+
+import argparse
+import tracemalloc
+from time import perf_counter
+
+from app.dependencies import Database
+from app.routers.users import DEFAULT_PAGE_SIZE, iter_users_ndjson
+from app.schemas import UserResponse
+
+SIZES = (10_000, 100_000, 1_000_000)
+
+
+def list_full(db: Database) -> None:
+    users = [
+        UserResponse(
+            id=user.id,
+            email=user.email,
+            name=user.name,
+            age=user.age,
+            created_at=user.created_at,
+            is_active=user.is_active,
+        )
+        for user in db.get_all_users()
+    ]
+    [user.model_dump(mode="json") for user in users]
+
+
+def list_page(db: Database) -> None:
+    for user in db.get_users_page(limit=DEFAULT_PAGE_SIZE, after_id=len(db._ids) // 2):
+        UserResponse(
+            id=user.id,
+            email=user.email,
+            name=user.name,
+            age=user.age,
+            created_at=user.created_at,
+            is_active=user.is_active,
+        ).model_dump(mode="json")
+
+
+def list_stream(db: Database) -> None:
+    for _ in iter_users_ndjson(db):
+        pass
+
+
+def measure(func, db: Database) -> tuple[float, float]:
+    """Вернуть (время в секундах, пик памяти в МиБ)."""
+    tracemalloc.start()
+    started = perf_counter()
+    func(db)
+    elapsed = perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    args = parser.parse_args()
+
+    print(f"{'users':>10} | {'mode':>6} | {'time, с':>8} | {'peak, МиБ':>10}")
+    print("-" * 44)
+    db = Database()
+    filled = 0
+    for size in args.sizes:
+        for i in range(filled, size):
+            db.create_user(email=f"user{i}@example.com", name=f"User {i}", age=i % 100)
+        filled = size
+        for mode, func in (
+            ("full", list_full),
+            ("page", list_page),
+            ("stream", list_stream),
+        ):
+            elapsed, peak = measure(func, db)
+            print(f"{size:>10} | {mode:>6} | {elapsed:>8.3f} | {peak:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
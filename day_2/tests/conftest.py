@@ -0,0 +1,55 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.dependencies import Database, get_db
+from app.dependencies.persistence import Journal
+from app.dependencies.storage import STORAGE_ENGINES
+from app.main import app
+
+
+@pytest.fixture
+def open_db(tmp_path):
+    """
+    Фабрика баз с журналом в tmp_path.
+
+    Повторный вызов после close() — «перезапуск» сервиса на тех же файлах.
+    Все открытые базы закрываются после теста.
+    """
+    opened: list[Database] = []
+
+    def factory(storage: str = "dict", **journal_options) -> Database:
+        db = Database(
+            storage=STORAGE_ENGINES[storage](),
+            journal=Journal(tmp_path, **journal_options),
+        )
+        opened.append(db)
+        return db
+
+    yield factory
+    for db in opened:
+        db.close()
+
+
+@pytest.fixture
+def db():
+    """Пустая база в памяти, без журнала."""
+    return Database()
+
+
+@pytest.fixture
+def users(db):
+    """Два пользователя: alice (id 1, 30 лет) и bob (id 2, 40 лет)."""
+    return db.create_users(
+        [
+            ("alice@example.com", "Alice", 30),
+            ("bob@example.com", "Bob", 40),
+        ]
+    )
+
+
+@pytest.fixture
+def client(db):
+    """Клиент API поверх базы из фикстуры db."""
+    app.dependency_overrides[get_db] = lambda: db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
@@ -0,0 +1,108 @@
+NOT_APPLIED = "Не применено: пакет содержит ошибки"
+
+
+def test_bulk_create(client, db):
+    response = client.post(
+        "/users/bulk",
+        json=[
+            {"email": "alice@example.com", "name": "Alice", "age": 30},
+            {"email": "bob@example.com", "name": "Bob", "age": 40},
+        ],
+    )
+
+    assert response.status_code == 201
+    body = response.json()
+    assert body["applied"] is True
+    assert [item["status"] for item in body["results"]] == [201, 201]
+    assert [item["user"]["email"] for item in body["results"]] == [
+        "alice@example.com",
+        "bob@example.com",
+    ]
+    assert len(db.get_all_users()) == 2
+
+
+def test_bulk_create_rejected_response_shape(client, db, users):
+    """Ошибочные элементы получают свою причину, остальные — 409"""
+    response = client.post(
+        "/users/bulk",
+        json=[
+            {"email": "carol@example.com", "name": "Carol", "age": 20},
+            {"email": "bob@example.com", "name": "Bob 2", "age": 41},
+            {"email": "carol@example.com", "name": "Carol 2", "age": 22},
+        ],
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {
+        "applied": False,
+        "results": [
+            {
+                "index": 0,
+                "status": 409,
+                "id": None,
+                "detail": NOT_APPLIED,
+                "user": None,
+            },
+            {
+                "index": 1,
+                "status": 400,
+                "id": None,
+                "detail": "Email уже зарегистрирован",
+                "user": None,
+            },
+            {
+                "index": 2,
+                "status": 400,
+                "id": None,
+                "detail": "Повторяется в пакете",
+                "user": None,
+            },
+        ],
+    }
+    assert db.get_all_users() == users
+
+
+def test_bulk_update_missing_id(client, db, users):
+    response = client.patch(
+        "/users/bulk", json=[{"id": 1, "name": "Alice 2"}, {"id": 99, "age": 50}]
+    )
+
+    assert response.status_code == 400
+    body = response.json()
+    assert body["applied"] is False
+    assert [(item["id"], item["status"]) for item in body["results"]] == [
+        (1, 409),
+        (99, 404),
+    ]
+    assert body["results"][1]["detail"] == "Пользователь не найден"
+    assert db.get_user(1).name == "Alice"
+
+
+def test_bulk_delete_missing_id(client, db, users):
+    response = client.request("DELETE", "/users/bulk", json=[2, 99])
+
+    assert response.status_code == 400
+    assert [item["status"] for item in response.json()["results"]] == [409, 404]
+    assert db.get_all_users() == users
+
+
+def test_bulk_delete(client, db, users):
+    response = client.request("DELETE", "/users/bulk", json=[1, 2])
+
+    assert response.status_code == 200
+    assert response.json()["applied"] is True
+    assert db.get_all_users() == []
+
+
+def test_bulk_invalid_item_is_422(client, db):
+    response = client.post(
+        "/users/bulk",
+        json=[
+            {"email": "alice@example.com", "name": "Alice", "age": 30},
+            {"email": "not-an-email", "name": "Bob", "age": 40},
+        ],
+    )
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][:2] == ["body", 1]
+    assert db.get_all_users() == []
@@ -0,0 +1,61 @@
+import pytest
+
+from app.routers.users import DEFAULT_PAGE_SIZE
+
+
+@pytest.fixture
+def many_users(db):
+    """Пользователей больше, чем помещается на страницу по умолчанию."""
+    return db.create_users(
+        [
+            (f"user{i}@example.com", f"User {i}", 20 + i % 50)
+            for i in range(DEFAULT_PAGE_SIZE + 50)
+        ]
+    )
+
+
+def test_list_without_pagination_returns_everyone(client, many_users):
+    """Без limit и after_id список не обрезается, как до пагинации"""
+    response = client.get("/users/")
+
+    assert response.status_code == 200
+    assert [user["id"] for user in response.json()] == [u.id for u in many_users]
+    assert "X-Next-After-Id" not in response.headers
+
+
+def test_list_without_pagination_applies_filters(client, many_users):
+    response = client.get("/users/", params={"min_age": 60, "sort": "-age"})
+
+    expected = sorted(
+        (u for u in many_users if u.age >= 60), key=lambda u: (u.age, u.id)
+    )
+    assert [user["id"] for user in response.json()] == [
+        u.id for u in reversed(expected)
+    ]
+
+
+def test_list_with_limit_returns_page_and_cursor(client, many_users):
+    response = client.get("/users/", params={"limit": 10})
+
+    assert [user["id"] for user in response.json()] == list(range(1, 11))
+    assert response.headers["X-Next-After-Id"] == "10"
+
+
+def test_list_with_cursor_only_uses_default_page(client, many_users):
+    response = client.get("/users/", params={"after_id": 10})
+
+    ids = [user["id"] for user in response.json()]
+    assert ids == list(range(11, 11 + DEFAULT_PAGE_SIZE))
+    assert response.headers["X-Next-After-Id"] == str(ids[-1])
+
+
+def test_list_pages_cover_everyone(client, many_users):
+    ids, params = [], {"limit": 40}
+    while True:
+        response = client.get("/users/", params=params)
+        ids += [user["id"] for user in response.json()]
+        if "X-Next-After-Id" not in response.headers:
+            break
+        params["after_id"] = response.headers["X-Next-After-Id"]
+
+    assert ids == [u.id for u in many_users]
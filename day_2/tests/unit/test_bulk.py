@@ -0,0 +1,94 @@
+import pytest
+
+from app.dependencies import BulkOperationError
+from app.dependencies.database import DUPLICATE_IN_BATCH, EMAIL_TAKEN, NOT_FOUND
+
+
+def test_create_rejects_duplicate_email_in_batch(db, users):
+    with pytest.raises(BulkOperationError) as exc_info:
+        db.create_users(
+            [
+                ("carol@example.com", "Carol", 20),
+                ("dave@example.com", "Dave", 21),
+                ("carol@example.com", "Carol 2", 22),
+            ]
+        )
+
+    assert exc_info.value.errors == {2: DUPLICATE_IN_BATCH}
+    assert db.get_all_users() == users
+    assert not db.user_exists("carol@example.com")
+    assert db.create_user("erin@example.com", "Erin", 23).id == 3, "id не потрачены"
+
+
+def test_create_rejects_email_of_existing_user(db, users):
+    with pytest.raises(BulkOperationError) as exc_info:
+        db.create_users(
+            [("carol@example.com", "Carol", 20), ("bob@example.com", "Bob 2", 41)]
+        )
+
+    assert exc_info.value.errors == {1: EMAIL_TAKEN}
+    assert db.get_all_users() == users
+
+
+def test_update_with_missing_id_changes_nothing(db, users):
+    with pytest.raises(BulkOperationError) as exc_info:
+        db.update_users(
+            [
+                {"id": 1, "email": "alice2@example.com", "age": 31},
+                {"id": 99, "name": "Ghost"},
+            ]
+        )
+
+    assert exc_info.value.errors == {1: NOT_FOUND}
+    assert db.get_all_users() == users
+    assert db.get_user_by_email("alice@example.com") == users[0]
+    assert db.get_user_by_email("alice2@example.com") is None
+    assert db.query_users(10, min_age=31, max_age=31) == []
+
+
+def test_update_rejects_email_taken_outside_batch(db, users):
+    carol = db.create_user("carol@example.com", "Carol", 50)
+
+    with pytest.raises(BulkOperationError) as exc_info:
+        db.update_users([{"id": 1, "email": "carol@example.com"}])
+
+    assert exc_info.value.errors == {0: EMAIL_TAKEN}
+    assert db.get_user_by_email("carol@example.com") == carol
+
+
+def test_update_allows_swapping_emails(db, users):
+    db.update_users(
+        [
+            {"id": 1, "email": "bob@example.com"},
+            {"id": 2, "email": "alice@example.com"},
+        ]
+    )
+
+    assert db.get_user_by_email("bob@example.com").id == 1
+    assert db.get_user_by_email("alice@example.com").id == 2
+
+
+def test_delete_with_missing_id_changes_nothing(db, users):
+    with pytest.raises(BulkOperationError) as exc_info:
+        db.delete_users([1, 99, 2, 1])
+
+    assert exc_info.value.errors == {1: NOT_FOUND, 3: DUPLICATE_IN_BATCH}
+    assert db.get_all_users() == users
+    assert db.get_users_page(10) == users
+
+
+def test_rejected_batch_is_not_journaled(tmp_path, open_db):
+    db = open_db()
+    db.create_users([("alice@example.com", "Alice", 30)])
+    log_size = (tmp_path / "users.wal").stat().st_size
+
+    with pytest.raises(BulkOperationError):
+        db.create_users(
+            [("bob@example.com", "Bob", 40), ("alice@example.com", "Alice", 31)]
+        )
+    with pytest.raises(BulkOperationError):
+        db.delete_users([1, 2])
+    db.close()
+
+    assert (tmp_path / "users.wal").stat().st_size == log_size
+    assert [user.email for user in open_db().get_all_users()] == ["alice@example.com"]
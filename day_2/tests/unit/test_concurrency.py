@@ -0,0 +1,142 @@
+import threading
+import time
+
+from app.dependencies import Database, database
+from app.dependencies.locks import RWLock
+
+TIMEOUT = 2.0
+
+
+def start(target, *args) -> threading.Thread:
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+def wait_until(condition) -> None:
+    deadline = time.monotonic() + TIMEOUT
+    while not condition():
+        assert time.monotonic() < deadline, "условие не выполнилось за TIMEOUT"
+        time.sleep(0.001)
+
+
+# ===== RWLock =====
+
+
+def test_readers_run_in_parallel():
+    lock = RWLock()
+    # Оба читателя должны одновременно оказаться внутри read()
+    both_inside = threading.Barrier(2, timeout=TIMEOUT)
+
+    def reader():
+        with lock.read():
+            both_inside.wait()
+
+    threads = [start(reader) for _ in range(2)]
+    for thread in threads:
+        thread.join(TIMEOUT)
+
+    assert not both_inside.broken
+
+
+def test_writer_excludes_readers():
+    lock = RWLock()
+    entered = threading.Event()
+
+    def reader():
+        with lock.read():
+            entered.set()
+
+    with lock.write():
+        thread = start(reader)
+        assert not entered.wait(0.05)
+    thread.join(TIMEOUT)
+
+    assert entered.is_set()
+
+
+def test_waiting_writer_blocks_new_readers():
+    """Читатель, пришедший после ждущего писателя, пропускает его вперёд"""
+    lock = RWLock()
+    order: list[str] = []
+
+    def writer():
+        with lock.write():
+            order.append("writer")
+
+    def late_reader():
+        with lock.read():
+            order.append("reader")
+
+    with lock.read():
+        writer_thread = start(writer)
+        wait_until(lambda: lock._waiting_writers == 1)
+        reader_thread = start(late_reader)
+        time.sleep(0.05)
+        # Блокировку держит только читатель, но новый читатель ждёт писателя
+        assert order == []
+    writer_thread.join(TIMEOUT)
+    reader_thread.join(TIMEOUT)
+
+    assert order == ["writer", "reader"]
+
+
+# ===== Database =====
+
+
+def test_readers_never_see_half_applied_batch():
+    db = Database()
+    db.create_users([(f"user{i}@example.com", f"User {i}", 0) for i in range(200)])
+    stop = threading.Event()
+    torn: list[set[int]] = []
+
+    def writer():
+        for age in range(1, 50):
+            db.update_users([{"id": user_id, "age": age} for user_id in range(1, 201)])
+        stop.set()
+
+    def reader():
+        while not stop.is_set():
+            ages = {user.age for user in db.get_all_users()}
+            if len(ages) != 1:
+                torn.append(ages)
+            # Выборка через индекс возраста тоже видит пакет целиком
+            page = db.query_users(500, sort="age")
+            if len(page) != 200 or len({user.age for user in page}) != 1:
+                torn.append({user.age for user in page})
+
+    readers = [start(reader) for _ in range(4)]
+    start(writer).join(10 * TIMEOUT)
+    for thread in readers:
+        thread.join(TIMEOUT)
+
+    assert stop.is_set()
+    assert torn == []
+
+
+def test_get_database_creates_one_instance(monkeypatch):
+    created: list[Database] = []
+
+    def slow_create() -> Database:
+        # Долгое восстановление из журнала расширяет окно гонки
+        time.sleep(0.05)
+        created.append(Database())
+        return created[-1]
+
+    monkeypatch.setattr(database, "_db_instance", None)
+    monkeypatch.setattr(database, "create_database", slow_create)
+    callers = 8
+    barrier = threading.Barrier(callers, timeout=TIMEOUT)
+    results: list[Database] = []
+
+    def call():
+        barrier.wait()
+        results.append(database.get_database())
+
+    threads = [start(call) for _ in range(callers)]
+    for thread in threads:
+        thread.join(TIMEOUT)
+
+    assert len(created) == 1
+    assert len(results) == callers
+    assert all(db is created[0] for db in results)
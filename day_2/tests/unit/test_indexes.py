@@ -0,0 +1,245 @@
+import random
+from datetime import datetime, timedelta
+from itertools import count
+
+import pytest
+
+from app.dependencies import Database, InvalidCursorError, database
+from app.dependencies.indexes import AgeIndex, CreatedAtIndex
+
+# Строки индекса: (id, age, timestamp). Возрастов и моментов времени мало,
+# чтобы было много равных значений; часть id удалена из индексов.
+_rng = random.Random(42)
+ROWS = [
+    (user_id, _rng.randrange(5), float(_rng.randrange(8))) for user_id in range(1, 121)
+]
+DELETED = set(_rng.sample(range(1, 121), 20))
+LIVE = [row for row in ROWS if row[0] not in DELETED]
+
+
+def build_indexes() -> tuple[AgeIndex, CreatedAtIndex]:
+    age_index, created_index = AgeIndex(), CreatedAtIndex()
+    # Вставка не по порядку: проверяем и вставку в середину, а не только append
+    for user_id, age, timestamp in _rng.sample(ROWS, len(ROWS)):
+        age_index.add(age, user_id)
+        created_index.add(timestamp, user_id)
+    for user_id, age, timestamp in ROWS:
+        if user_id in DELETED:
+            age_index.remove(age, user_id)
+            created_index.remove(timestamp, user_id)
+    return age_index, created_index
+
+
+@pytest.fixture(scope="module")
+def indexes():
+    return build_indexes()
+
+
+def after_cursor(keys: list, after, reverse: bool) -> list:
+    """Оракул: ключи строго после курсора в направлении обхода."""
+    if reverse:
+        keys = keys[::-1]
+    if after is None:
+        return keys
+    return [key for key in keys if (key < after if reverse else key > after)]
+
+
+def deleted_row(position: int) -> tuple[int, int, float]:
+    return next(row for row in ROWS if row[0] == sorted(DELETED)[position])
+
+
+# Курсоры: нет курсора, живая строка, удалённая строка, за краями диапазона
+CURSOR_ROWS = [
+    None,
+    LIVE[0],
+    LIVE[len(LIVE) // 2],
+    LIVE[-1],
+    deleted_row(0),
+    deleted_row(-1),
+]
+
+
+# ===== AgeIndex =====
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+@pytest.mark.parametrize("cursor", CURSOR_ROWS)
+@pytest.mark.parametrize("ages", [(0, 4), (1, 3), (2, 2)])
+def test_age_index_iter(indexes, ages, cursor, reverse):
+    low, high = ages
+    keys = sorted((age, user_id) for user_id, age, _ in LIVE if low <= age <= high)
+    after = None if cursor is None else (cursor[1], cursor[0])
+
+    result = list(indexes[0].iter(low, high, after=after, reverse=reverse))
+
+    assert result == [user_id for _, user_id in after_cursor(keys, after, reverse)]
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+@pytest.mark.parametrize("cursor", CURSOR_ROWS)
+@pytest.mark.parametrize("ages", [(0, 4), (1, 3), (2, 2)])
+def test_age_index_iter_by_id(indexes, ages, cursor, reverse):
+    low, high = ages
+    ids = sorted(user_id for user_id, age, _ in LIVE if low <= age <= high)
+    after_id = None if cursor is None else cursor[0]
+
+    result = list(indexes[0].iter_by_id(low, high, after_id, reverse))
+
+    assert result == after_cursor(ids, after_id, reverse)
+    assert indexes[0].count(low, high) == len(ids)
+
+
+# ===== CreatedAtIndex =====
+
+# Граница created_after: нет, совпадает с существующим моментом (строго
+# больше — сам момент исключается), между моментами, после последнего
+BOUNDARIES = [None, 3.0, 3.5, 7.0, -1.0]
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+@pytest.mark.parametrize("cursor", CURSOR_ROWS)
+@pytest.mark.parametrize("created_after", BOUNDARIES)
+def test_created_index_iter(indexes, created_after, cursor, reverse):
+    keys = sorted(
+        (timestamp, user_id)
+        for user_id, _, timestamp in LIVE
+        if created_after is None or timestamp > created_after
+    )
+    after = None if cursor is None else (cursor[2], cursor[0])
+
+    result = list(indexes[1].iter(created_after, after=after, reverse=reverse))
+
+    assert result == [user_id for _, user_id in after_cursor(keys, after, reverse)]
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+@pytest.mark.parametrize("cursor", CURSOR_ROWS)
+@pytest.mark.parametrize("created_after", BOUNDARIES)
+def test_created_index_iter_by_id(indexes, created_after, cursor, reverse):
+    ids = sorted(
+        user_id
+        for user_id, _, timestamp in LIVE
+        if created_after is None or timestamp > created_after
+    )
+    after_id = None if cursor is None else cursor[0]
+
+    result = list(indexes[1].iter_by_id(created_after, after_id, reverse))
+
+    assert result == after_cursor(ids, after_id, reverse)
+    assert indexes[1].count(created_after) == len(ids)
+
+
+# ===== Database.query_users =====
+
+SORTS = ["id", "-id", "age", "-age", "created_at", "-created_at"]
+FILTERS = [
+    {},
+    {"is_active": False},
+    {"is_active": True, "min_age": 1, "max_age": 3},
+    {"min_age": 2, "max_age": 2},
+    {"created_after": "boundary"},
+    {"created_after": "boundary", "min_age": 0, "max_age": 1},
+    {"created_after": "boundary", "is_active": False},
+]
+
+
+class SteppedDatetime(datetime):
+    """datetime.now() с шагом в секунду на каждые 10 вызовов: равные created_at."""
+
+    _calls = count()
+
+    @classmethod
+    def now(cls, tz=None):
+        return datetime(2026, 1, 1) + timedelta(seconds=next(cls._calls) // 10)
+
+
+@pytest.fixture(scope="module")
+def populated():
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(database, "datetime", SteppedDatetime)
+        db = Database()
+        rng = random.Random(7)
+        db.create_users(
+            [
+                (f"user{i}@example.com", f"User {i}", rng.randrange(5))
+                for i in range(120)
+            ]
+        )
+    db.update_users(
+        [
+            {"id": user_id, "is_active": False}
+            for user_id in rng.sample(range(1, 121), 25)
+        ]
+    )
+    db.delete_users(rng.sample(range(1, 121), 20))
+    return db
+
+
+def oracle(users, sort, is_active=None, min_age=None, max_age=None, created_after=None):
+    rows = [
+        user
+        for user in users
+        if (is_active is None or user.is_active == is_active)
+        and (min_age is None or user.age >= min_age)
+        and (max_age is None or user.age <= max_age)
+        and (created_after is None or user.created_at > created_after)
+    ]
+    field = sort.lstrip("-")
+    return sorted(
+        rows,
+        key=lambda user: (getattr(user, field), user.id),
+        reverse=sort.startswith("-"),
+    )
+
+
+def resolve(db: Database, filters: dict) -> dict:
+    """Граница created_after — момент создания одного из пользователей."""
+    if filters.get("created_after") == "boundary":
+        users = db.get_all_users()
+        return {**filters, "created_after": users[len(users) // 2].created_at}
+    return filters
+
+
+@pytest.mark.parametrize("sort", SORTS)
+@pytest.mark.parametrize("filters", FILTERS)
+def test_query_users_pages_match_oracle(populated, sort, filters):
+    filters = resolve(populated, filters)
+    expected = oracle(populated.get_all_users(), sort, **filters)
+
+    pages, after = [], None
+    while page := populated.query_users(7, sort=sort, after=after, **filters):
+        pages.extend(page)
+        after = page[-1]
+
+    assert pages == expected
+
+
+@pytest.mark.parametrize("sort", SORTS)
+@pytest.mark.parametrize("filters", FILTERS)
+def test_query_users_after_id_matches_oracle(populated, sort, filters):
+    filters = resolve(populated, filters)
+    expected = oracle(populated.get_all_users(), sort, **filters)
+    if not expected:
+        pytest.skip("пустая выборка")
+    cursor = expected[len(expected) // 2]
+
+    result = populated.query_users(1000, after_id=cursor.id, sort=sort, **filters)
+
+    assert result == expected[expected.index(cursor) + 1 :]
+
+
+@pytest.mark.parametrize("sort", SORTS)
+def test_query_users_after_deleted_row(sort):
+    db = Database()
+    db.create_users([(f"user{i}@example.com", f"User {i}", i % 3) for i in range(30)])
+    expected = oracle(db.get_all_users(), sort)
+    cursor = expected[10]
+    db.delete_user(cursor.id)
+
+    # Строка предыдущей страницы продолжает обход и после удаления
+    assert db.query_users(100, sort=sort, after=cursor) == expected[11:]
+    if sort.lstrip("-") == "id":
+        assert db.query_users(100, sort=sort, after_id=cursor.id) == expected[11:]
+    else:
+        with pytest.raises(InvalidCursorError):
+            db.query_users(100, sort=sort, after_id=cursor.id)
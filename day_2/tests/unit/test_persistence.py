@@ -0,0 +1,163 @@
+import os
+import shutil
+import threading
+
+import pytest
+
+from app.dependencies import persistence
+from app.dependencies.persistence import _FRAME, Journal
+from app.dependencies.storage import STORAGE_ENGINES
+
+
+def fill(db, count: int) -> None:
+    for i in range(count):
+        db.create_user(email=f"user{i}@example.com", name=f"User {i}", age=20 + i)
+
+
+@pytest.fixture
+def fsyncs(monkeypatch):
+    """Список дескрипторов, для которых вызывался fsync."""
+    calls = []
+    real_fsync = os.fsync
+
+    def counting(fd):
+        calls.append(fd)
+        real_fsync(fd)
+
+    monkeypatch.setattr(persistence.os, "fsync", counting)
+    return calls
+
+
+# ===== Восстановление из журнала =====
+
+
+@pytest.mark.parametrize("storage", sorted(STORAGE_ENGINES))
+def test_replay_after_restart(open_db, storage):
+    db = open_db(storage)
+    fill(db, 3)
+    db.update_user(2, name="Renamed", age=50, is_active=False)
+    db.delete_user(1)
+    expected = db.get_all_users()
+    db.close()
+
+    restored = open_db(storage)
+
+    assert restored.get_all_users() == expected
+    assert restored.get_user_by_email("user0@example.com") is None
+    assert restored.query_users(10, is_active=False) == [expected[0]]
+    assert restored.create_user("new@example.com", "New", 30).id == 4
+
+
+@pytest.mark.parametrize(
+    "tail",
+    [
+        pytest.param(b"\x05\x00", id="partial-frame-header"),
+        pytest.param(_FRAME.pack(100, 0) + b"x" * 10, id="partial-payload"),
+        pytest.param(_FRAME.pack(4, 0) + b"xxxx", id="bad-checksum"),
+    ],
+)
+def test_torn_tail_is_truncated(tmp_path, open_db, tail):
+    db = open_db()
+    fill(db, 3)
+    expected = db.get_all_users()
+    db.close()
+    log_path = tmp_path / "users.wal"
+    valid_size = log_path.stat().st_size
+    with open(log_path, "ab") as f:
+        f.write(tail)
+
+    restored = open_db()
+
+    assert restored.get_all_users() == expected
+    assert log_path.stat().st_size == valid_size
+    # Новые записи дописываются после обрезки и переживают следующий рестарт
+    restored.create_user("after@example.com", "After", 40)
+    expected = restored.get_all_users()
+    restored.close()
+    assert open_db().get_all_users() == expected
+
+
+# ===== Снапшот + хвост журнала =====
+
+
+def test_snapshot_and_log_suffix_recovery(tmp_path, open_db):
+    db = open_db()
+    fill(db, 5)
+    db.snapshot()
+    assert (tmp_path / "users.snapshot").stat().st_size
+    assert (tmp_path / "users.wal").stat().st_size == 0, "журнал свёрнут"
+
+    db.update_user(3, email="changed@example.com")
+    db.delete_user(1)
+    db.create_user("late@example.com", "Late", 60)
+    expected = db.get_all_users()
+    db.close()
+
+    restored = open_db()
+
+    assert restored.get_all_users() == expected
+    assert restored.get_users_page(100) == expected
+    assert restored.get_user_by_email("changed@example.com").id == 3
+
+
+def test_log_records_covered_by_snapshot_are_skipped(tmp_path, open_db):
+    """Сбой между записью снапшота и обрезкой журнала: записи не дублируются"""
+    db = open_db()
+    fill(db, 3)
+    db.update_user(2, age=99)
+    shutil.copy(tmp_path / "users.wal", tmp_path / "users.wal.before")
+    db.snapshot()
+    expected = db.get_all_users()
+    db.close()
+    os.replace(tmp_path / "users.wal.before", tmp_path / "users.wal")
+
+    restored = open_db()
+
+    assert restored.get_users_page(100) == expected
+    assert restored.query_users(10, min_age=99) == [expected[1]]
+
+
+def test_background_snapshot_after_threshold(tmp_path, open_db):
+    db = open_db(snapshot_every=4)
+    fill(db, 10)
+    expected = db.get_all_users()
+    db.close()
+
+    assert (tmp_path / "users.snapshot").stat().st_size
+    assert open_db().get_all_users() == expected
+
+
+# ===== Group commit =====
+
+
+def test_group_commit_flushes_batch_with_one_fsync(tmp_path, fsyncs):
+    journal = Journal(tmp_path, group_commit_delay=0.05)
+    _, records = journal.recover()
+    assert list(records) == []
+    journal.open()
+
+    lsns = [journal.log_delete(user_id) for user_id in range(1, 11)]
+    journal.wait_durable(lsns[-1])
+    journal.close()
+
+    assert len(fsyncs) == 1
+
+
+def test_concurrent_writers_share_fsync(open_db, fsyncs):
+    db = open_db(group_commit_delay=0.02)
+    writers = 8
+    barrier = threading.Barrier(writers)
+
+    def create(i: int) -> None:
+        barrier.wait()
+        db.create_user(f"user{i}@example.com", f"User {i}", 30)
+
+    threads = [threading.Thread(target=create, args=(i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    db.close()
+
+    assert len(fsyncs) < writers
+    assert len(open_db().get_all_users()) == writers
@@ -0,0 +1,414 @@
+import asyncio
+import logging
+import math
+import os
+import time
+import unicodedata
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from typing import Any
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+# Адрес Redis для общего кэша; если не задан, работает только кэш в памяти
+REDIS_URL = os.getenv("REDIS_URL")
+
+GEOCODE_CACHE_SIZE = int(os.getenv("GEOCODE_CACHE_SIZE", "10000"))
+GEOCODE_TTL = int(os.getenv("GEOCODE_TTL", str(7 * 24 * 3600)))  # секунд
+# «Город не найден» кэшируем короче: вдруг это опечатка в данных геокодера
+GEOCODE_NEGATIVE_TTL = int(os.getenv("GEOCODE_NEGATIVE_TTL", "3600"))  # секунд
+
+WEATHER_CACHE_SIZE = int(os.getenv("WEATHER_CACHE_SIZE", "10000"))
+# Сколько секунд погода считается свежей
+WEATHER_TTL = float(os.getenv("WEATHER_TTL", "60"))
+# Сколько ещё секунд после TTL можно отдавать устаревшее значение,
+# пока в фоне идёт обновление
+WEATHER_MAX_STALE = float(os.getenv("WEATHER_MAX_STALE", "600"))
+# Сколько секунд после TTL отдавать устаревшее значение, если обновить
+# его не удалось (API недоступен или открыт предохранитель)
+WEATHER_STALE_IF_ERROR = float(os.getenv("WEATHER_STALE_IF_ERROR", "3600"))
+# Шаг сетки (градусов), к центру ячейки которой привязываются координаты:
+# близкие города делят одну запись кэша. 0.1° ≈ 11 км — порядка шага
+# сетки погодных моделей Open-Meteo; 0 — кэшировать по точным координатам
+WEATHER_GRID_STEP = float(os.getenv("WEATHER_GRID_STEP", "0.1"))
+
+_MISSING = object()
+
+
+class TTLCache:
+    """LRU-кэш в памяти процесса с временем жизни записей."""
+
+    def __init__(self, maxsize: int, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self._clock = clock
+        # Ключ -> (значение, момент истечения); порядок — от давно
+        # использованных к недавно использованным
+        self._data: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        value, expires_at = item
+        if expires_at <= self._clock():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._data[key] = (value, self._clock() + ttl)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+@dataclass
+class CacheStats:
+    """Счётчики обращений к двухуровневому кэшу."""
+
+    memory_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.memory_hits + self.redis_hits + self.misses
+        return (self.memory_hits + self.redis_hits) / total if total else 0.0
+
+
+def normalize_city(city: str) -> str:
+    """Ключ кэша: «  New   YORK » и «new york» — один и тот же город."""
+    return " ".join(unicodedata.normalize("NFKC", city).casefold().split())
+
+
+Coordinates = tuple[float, float]
+
+
+def snap_to_grid(lat: float, lon: float, step: float) -> Coordinates:
+    """Центр ячейки сетки с шагом step градусов, в которую попадает точка."""
+    if step <= 0:
+        return lat, lon
+    return (
+        round((math.floor(lat / step) + 0.5) * step, 4),
+        round((math.floor(lon / step) + 0.5) * step, 4),
+    )
+
+
+class GeocodeCache:
+    """
+    Двухуровневый кэш город -> координаты.
+
+    Первый уровень — LRU с TTL в памяти процесса, второй — Redis,
+    общий для всех реплик сервиса. Отрицательные ответы («город не найден»)
+    тоже кэшируются, с более коротким TTL. Ошибки Redis не роняют запрос:
+    кэш просто работает как промах.
+    """
+
+    # Значение в Redis для «город не найден»
+    NOT_FOUND = b""
+
+    def __init__(
+        self,
+        redis_client: redis.Redis | None = None,
+        maxsize: int = GEOCODE_CACHE_SIZE,
+        ttl: int = GEOCODE_TTL,
+        negative_ttl: int = GEOCODE_NEGATIVE_TTL,
+    ):
+        self._memory = TTLCache(maxsize)
+        self._redis = redis_client
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stats = CacheStats()
+
+    async def get_or_fetch(
+        self, city: str, fetch: Callable[[], Awaitable[Coordinates | None]]
+    ) -> Coordinates | None:
+        """Координаты города из кэша или из fetch(); None — город не найден."""
+        key = normalize_city(city)
+        coordinates = self._memory.get(key, _MISSING)
+        if coordinates is not _MISSING:
+            self.stats.memory_hits += 1
+            return coordinates
+
+        coordinates = await self._redis_get(key)
+        if coordinates is not _MISSING:
+            self.stats.redis_hits += 1
+        else:
+            self.stats.misses += 1
+            coordinates = await fetch()
+            await self._redis_set(key, coordinates)
+
+        self._memory.set(
+            key, coordinates, self.ttl if coordinates else self.negative_ttl
+        )
+        return coordinates
+
+    async def _redis_get(self, key: str) -> Any:
+        if self._redis is None:
+            return _MISSING
+        try:
+            value = await self._redis.get(f"geocode:{key}")
+        except RedisError:
+            logger.warning("Geocode cache: Redis unavailable", exc_info=True)
+            return _MISSING
+        if value is None:
+            return _MISSING
+        if value == self.NOT_FOUND:
+            return None
+        lat, lon = value.split(b",")
+        return float(lat), float(lon)
+
+    async def _redis_set(self, key: str, coordinates: Coordinates | None) -> None:
+        if self._redis is None:
+            return
+        if coordinates is None:
+            value, ttl = self.NOT_FOUND, self.negative_ttl
+        else:
+            value, ttl = f"{coordinates[0]!r},{coordinates[1]!r}", self.ttl
+        try:
+            await self._redis.set(f"geocode:{key}", value, ex=ttl)
+        except RedisError:
+            logger.warning("Geocode cache: Redis unavailable", exc_info=True)
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+
+
+class SingleFlight:
+    """
+    Схлопывание параллельных вызовов: пока загрузка по ключу идёт,
+    остальные вызовы с тем же ключом ждут её результат, а не дублируют.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def start(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Вернуть идущую загрузку по ключу или запустить новую."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.create_task(fetch())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return task
+
+    async def do(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        # shield: отмена одного ожидающего не отменяет общую загрузку
+        return await asyncio.shield(self.start(key, fetch))
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Помечаем исключение полученным, даже если все ожидающие отменены
+            task.exception()
+
+
+@dataclass
+class WeatherCacheStats:
+    """Счётчики кэша погоды."""
+
+    hits: int = 0
+    stale_hits: int = 0
+    # Запрос дождался уже идущей загрузки того же ключа
+    coalesced: int = 0
+    misses: int = 0
+    refreshes: int = 0
+    refresh_errors: int = 0
+    # Загрузка не удалась, отдано устаревшее значение
+    stale_if_error: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        served = self.hits + self.stale_hits + self.coalesced
+        total = served + self.misses
+        return served / total if total else 0.0
+
+    @property
+    def upstream_calls(self) -> int:
+        return self.misses + self.refreshes
+
+
+class WeatherCache:
+    """
+    Кэш погоды по координатам со stale-while-revalidate.
+
+    Свежее значение (моложе ttl) отдаётся сразу. Устаревшее, но не старше
+    ttl + max_stale, тоже отдаётся сразу, а обновление запускается одной
+    фоновой задачей. Параллельные промахи по одному ключу схлопываются
+    в одну загрузку, поэтому число запросов к Open-Meteo ограничено числом
+    разных городов, а не числом клиентов.
+
+    Если загрузка не удалась, отдаётся устаревшее значение не старше
+    ttl + stale_if_error — так сервис переживает недоступность API.
+
+    Координаты привязываются к ячейкам сетки с шагом grid_step градусов:
+    все точки ячейки делят одну запись. Запрашивать погоду стоит для центра
+    ячейки (snap), чтобы ответ не зависел от того, какой город пришёл первым.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = WEATHER_CACHE_SIZE,
+        ttl: float = WEATHER_TTL,
+        max_stale: float = WEATHER_MAX_STALE,
+        stale_if_error: float = WEATHER_STALE_IF_ERROR,
+        grid_step: float = WEATHER_GRID_STEP,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.stale_if_error = max(stale_if_error, max_stale)
+        self.grid_step = grid_step
+        self._clock = clock
+        # Ключ -> (погода, момент до которого она свежая)
+        self._entries = TTLCache(maxsize, clock)
+        self._flights = SingleFlight()
+        # Ссылки на фоновые обновления, чтобы задачи не собрал GC
+        self._refreshes: set[asyncio.Task] = set()
+        self.stats = WeatherCacheStats()
+
+    def snap(self, lat: float, lon: float) -> Coordinates:
+        """Центр ячейки сетки, в которую попадает точка."""
+        return snap_to_grid(lat, lon, self.grid_step)
+
+    def key(self, lat: float, lon: float) -> str:
+        lat, lon = self.snap(lat, lon)
+        return f"{lat:.4f},{lon:.4f}"
+
+    async def get_or_fetch(
+        self, lat: float, lon: float, fetch: Callable[[], Awaitable[dict]]
+    ) -> dict:
+        """Погода по координатам из кэша или из fetch()."""
+        key = self.key(lat, lon)
+        fallback = None
+        entry = self._entries.get(key)
+        if entry is not None:
+            weather, fresh_until = entry
+            age = self._clock() - fresh_until
+            if age < 0:
+                self.stats.hits += 1
+                return weather
+            if age < self.max_stale:
+                self.stats.stale_hits += 1
+                if key not in self._flights:
+                    self._refresh(key, fetch)
+                return weather
+            fallback = weather
+
+        if key in self._flights:
+            self.stats.coalesced += 1
+        else:
+            self.stats.misses += 1
+        try:
+            return await self._flights.do(key, lambda: self._load(key, fetch))
+        except Exception:
+            if fallback is None:
+                raise
+            self.stats.stale_if_error += 1
+            return fallback
+
+    def get_fresh(self, lat: float, lon: float) -> dict | None:
+        """Свежая погода по координатам или None (без загрузки и обновления)."""
+        entry = self._entries.get(self.key(lat, lon))
+        if entry is not None and entry[1] > self._clock():
+            self.stats.hits += 1
+            return entry[0]
+        return None
+
+    def get_stale_if_error(self, lat: float, lon: float) -> dict | None:
+        """
+        Погода на случай ошибки загрузки в обход get_or_fetch: любое значение
+        не старше ttl + stale_if_error, иначе None.
+        """
+        entry = self._entries.get(self.key(lat, lon))
+        if entry is None:
+            return None
+        self.stats.stale_if_error += 1
+        return entry[0]
+
+    def put(self, lat: float, lon: float, weather: dict) -> None:
+        """Положить погоду, загруженную в обход get_or_fetch (например, пакетом)."""
+        self._store(self.key(lat, lon), weather)
+
+    def _store(self, key: str, weather: dict) -> None:
+        self._entries.set(
+            key, (weather, self._clock() + self.ttl), self.ttl + self.stale_if_error
+        )
+
+    async def _load(self, key: str, fetch: Callable[[], Awaitable[dict]]) -> dict:
+        weather = await fetch()
+        self._store(key, weather)
+        return weather
+
+    def _refresh(self, key: str, fetch: Callable[[], Awaitable[dict]]) -> None:
+        self.stats.refreshes += 1
+        task = self._flights.start(key, lambda: self._load(key, fetch))
+        self._refreshes.add(task)
+        task.add_done_callback(self._refresh_done)
+
+    def _refresh_done(self, task: asyncio.Task) -> None:
+        self._refreshes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            # Устаревшее значение остаётся в кэше до истечения max_stale
+            self.stats.refresh_errors += 1
+            logger.warning("Weather refresh failed", exc_info=task.exception())
+
+    async def join(self) -> None:
+        """Дождаться завершения запущенных фоновых обновлений."""
+        await asyncio.gather(*self._refreshes, return_exceptions=True)
+
+    async def close(self) -> None:
+        for task in list(self._refreshes):
+            task.cancel()
+        await self.join()
+
+
+_geocode_cache: GeocodeCache | None = None
+_weather_cache: WeatherCache | None = None
+
+
+def get_geocode_cache() -> GeocodeCache:
+    """Dependency для получения общего кэша геокодинга."""
+    global _geocode_cache
+
+    if _geocode_cache is None:
+        redis_client = redis.Redis.from_url(REDIS_URL) if REDIS_URL else None
+        _geocode_cache = GeocodeCache(redis_client)
+    return _geocode_cache
+
+
+def get_weather_cache() -> WeatherCache:
+    """Dependency для получения общего кэша погоды."""
+    global _weather_cache
+
+    if _weather_cache is None:
+        _weather_cache = WeatherCache()
+    return _weather_cache
+
+
+async def close_caches() -> None:
+    """Закрыть соединения и фоновые задачи кэшей при остановке приложения."""
+    global _geocode_cache, _weather_cache
+
+    if _geocode_cache is not None:
+        await _geocode_cache.close()
+        _geocode_cache = None
+    if _weather_cache is not None:
+        await _weather_cache.close()
+        _weather_cache = None
@@ -0,0 +1,50 @@
+import os
+
+import httpx
+
+HTTP_TIMEOUT = 10.0  # секунд
+
+# Параметры пула соединений, переопределяются переменными окружения
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))  # секунд
+# HTTP/2 требует пакет h2: uv sync --extra http2
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() in ("1", "true", "yes")
+
+_client: httpx.AsyncClient | None = None
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """Создать клиент с пулом keep-alive соединений к внешним API."""
+    return httpx.AsyncClient(
+        timeout=HTTP_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        http2=HTTP2_ENABLED,
+    )
+
+
+async def close_http_client() -> None:
+    """Закрыть общий клиент и его соединения при остановке приложения."""
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Dependency для получения общего HTTP-клиента.
+
+    Клиент создаётся один раз и переиспользуется всеми запросами,
+    поэтому TCP/TLS-соединения с внешними API не открываются заново.
+    """
+    global _client
+
+    if _client is None:
+        _client = create_http_client()
+    return _client
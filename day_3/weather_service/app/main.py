@@ -1,7 +1,37 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
 
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from app.cache import close_caches
+from app.http_client import close_http_client
+from app.resilience import UpstreamError
 from app.routers import router
 
-app = FastAPI(title="Weather Service")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Закрыть пул соединений к внешним API и кэши при остановке."""
+    yield
+    await close_http_client()
+    await close_caches()
+
+
+app = FastAPI(title="Weather Service", lifespan=lifespan)
 
 app.include_router(router)
+
+
+@app.exception_handler(UpstreamError)
+async def upstream_error_handler(request: Request, exc: UpstreamError):
+    """Недоступность внешнего API: 502, 503 (предохранитель) или 504 (дедлайн)."""
+    return JSONResponse(status_code=exc.status_code, content={"detail": str(exc)})
+
+
+@app.exception_handler(httpx.HTTPError)
+async def upstream_http_error_handler(request: Request, exc: httpx.HTTPError):
+    """Прочие ошибки ответа внешнего API (например, 4xx) — тоже 502, а не 500."""
+    return JSONResponse(
+        status_code=502, content={"detail": f"Upstream error: {type(exc).__name__}"}
+    )
@@ -0,0 +1,256 @@
+import asyncio
+import contextvars
+import logging
+import os
+import statistics
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.http_client import HTTP_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+# Общий бюджет времени на все запросы к внешним API в рамках одного запроса
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "5"))  # секунд
+# Сколько ошибок подряд открывают предохранитель хоста
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+# Через сколько секунд открытый предохранитель пропускает пробный запрос
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+# Дублировать запрос, если ответ не пришёл за p95 обычной латентности
+HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "deadline", default=None
+)
+
+
+class UpstreamError(Exception):
+    """Внешний API недоступен; status_code — код ответа сервиса клиенту."""
+
+    status_code = 502
+
+
+class CircuitOpenError(UpstreamError):
+    """Предохранитель хоста открыт: запрос отклонён без обращения к API."""
+
+    status_code = 503
+
+    def __init__(self, host: str):
+        super().__init__(f"Upstream {host} is unavailable")
+        self.host = host
+
+
+class DeadlineExceeded(UpstreamError):
+    """Бюджет времени запроса исчерпан."""
+
+    status_code = 504
+
+    def __init__(self):
+        super().__init__("Upstream deadline exceeded")
+
+
+@contextmanager
+def deadline(seconds: float = REQUEST_DEADLINE) -> Iterator[None]:
+    """
+    Общий дедлайн для всех запросов к внешним API внутри блока.
+
+    Вложенный блок не может продлить уже заданный дедлайн.
+    """
+    expires_at = time.monotonic() + seconds
+    current = _deadline.get()
+    if current is not None:
+        expires_at = min(expires_at, current)
+    token = _deadline.set(expires_at)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> float:
+    """Сколько секунд осталось до дедлайна (HTTP_TIMEOUT, если он не задан)."""
+    expires_at = _deadline.get()
+    if expires_at is None:
+        return HTTP_TIMEOUT
+    return min(HTTP_TIMEOUT, expires_at - time.monotonic())
+
+
+class CircuitBreaker:
+    """
+    Предохранитель: closed -> open после failure_threshold ошибок подряд,
+    open -> half-open через reset_timeout, half-open пропускает один пробный
+    запрос: успех закрывает предохранитель, ошибка снова открывает.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = BREAKER_RESET_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Пробный запрос отменён без результата: пропустить следующий."""
+        self._probe_in_flight = False
+
+    def record_failure(self) -> bool:
+        """Учесть отказ; True, если предохранитель только что открылся."""
+        self._failures += 1
+        self._probe_in_flight = False
+        was_closed = self._opened_at is None
+        if not was_closed or self._failures >= self.failure_threshold:
+            self._opened_at = self._clock()
+        return was_closed and self._opened_at is not None
+
+
+class LatencyTracker:
+    """Скользящее окно латентностей успешных запросов."""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def p95(self, min_samples: int = HEDGE_MIN_SAMPLES) -> float | None:
+        if len(self._samples) < max(min_samples, 2):
+            return None
+        return statistics.quantiles(self._samples, n=20)[-1]
+
+
+class Upstream:
+    """Состояние одного внешнего хоста: предохранитель и латентности."""
+
+    def __init__(self, host: str, hedge: bool = HEDGE_ENABLED):
+        self.host = host
+        self.hedge = hedge
+        self.breaker = CircuitBreaker()
+        self.latency = LatencyTracker()
+        self.hedged_requests = 0
+
+    async def get(
+        self, client: httpx.AsyncClient, url: str, **kwargs
+    ) -> httpx.Response:
+        """
+        GET к хосту с учётом дедлайна, предохранителя и хеджирования.
+
+        Ответы 5xx и сетевые ошибки считаются отказами хоста и поднимаются
+        как UpstreamError (502), таймаут после исчерпания бюджета — как
+        DeadlineExceeded (504).
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(self.host)
+
+        async def send() -> httpx.Response:
+            timeout = remaining_time()
+            if timeout <= 0:
+                raise DeadlineExceeded()
+            started = time.monotonic()
+            # Таймауты httpx действуют на каждую фазу (connect, read...)
+            # отдельно, поэтому общий лимит на запрос ставим сами
+            try:
+                async with asyncio.timeout(timeout):
+                    response = await client.get(url, timeout=timeout, **kwargs)
+            except TimeoutError as e:
+                raise httpx.TimeoutException(f"{self.host} timed out") from e
+            if response.status_code >= 500:
+                response.raise_for_status()
+            self.latency.record(time.monotonic() - started)
+            return response
+
+        try:
+            delay = self.latency.p95() if self.hedge else None
+            if delay is not None and delay < remaining_time():
+                response = await self._hedged(send, delay)
+            else:
+                response = await send()
+        except httpx.HTTPError as e:
+            if self.breaker.record_failure():
+                logger.warning("Circuit breaker for %s is open", self.host)
+            if isinstance(e, httpx.TimeoutException) and remaining_time() <= 0:
+                raise DeadlineExceeded() from e
+            raise UpstreamError(
+                f"Upstream {self.host} error: {type(e).__name__}"
+            ) from e
+        except (DeadlineExceeded, asyncio.CancelledError):
+            # Бюджет исчерпан до отправки или запрос отменён — хост не виноват
+            self.breaker.release_probe()
+            raise
+        self.breaker.record_success()
+        return response
+
+    async def _hedged(
+        self, send: Callable[[], Awaitable[httpx.Response]], delay: float
+    ) -> httpx.Response:
+        """Запустить дубль запроса, если первый не ответил за delay секунд."""
+        pending = {asyncio.create_task(send())}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                self.hedged_requests += 1
+                pending.add(asyncio.create_task(send()))
+            error: BaseException | None = None
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+_upstreams: dict[str, Upstream] = {}
+
+
+def get_upstream(url: str) -> Upstream:
+    """Состояние хоста из url; создаётся при первом обращении."""
+    host = urlsplit(url).netloc
+    upstream = _upstreams.get(host)
+    if upstream is None:
+        upstream = _upstreams[host] = Upstream(host)
+    return upstream
+
+
+def reset_upstreams() -> None:
+    """Сбросить состояние всех хостов (для тестов и бенчмарков)."""
+    _upstreams.clear()
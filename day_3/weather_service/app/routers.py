@@ -1,11 +1,35 @@
-from fastapi import APIRouter
+from typing import Annotated
 
-from app.schemas import ConvertResponse, HealthResponse, WeatherResponse
-from app.services import fetch_weather_from_api
+import httpx
+from fastapi import APIRouter, Depends
+
+from app.cache import (
+    GeocodeCache,
+    WeatherCache,
+    get_geocode_cache,
+    get_weather_cache,
+)
+from app.http_client import get_http_client
+from app.schemas import (
+    CacheStatsResponse,
+    ConvertResponse,
+    GeocodeCacheStatsResponse,
+    HealthResponse,
+    WeatherBatchItem,
+    WeatherBatchRequest,
+    WeatherBatchResponse,
+    WeatherCacheStatsResponse,
+    WeatherResponse,
+)
+from app.services import fetch_weather_batch, fetch_weather_from_api
 from app.utils import celsius_to_fahrenheit, get_weather_description
 
 router = APIRouter()
 
+HttpClientDep = Annotated[httpx.AsyncClient, Depends(get_http_client)]
+GeocodeCacheDep = Annotated[GeocodeCache, Depends(get_geocode_cache)]
+WeatherCacheDep = Annotated[WeatherCache, Depends(get_weather_cache)]
+
 
 @router.get("/health", response_model=HealthResponse)
 def health_check():
@@ -22,10 +46,7 @@ def convert_temperature(celsius: float):
     )
 
 
-@router.get("/weather/{city}", response_model=WeatherResponse)
-async def get_weather(city: str):
-    """Получение погоды для города."""
-    data = await fetch_weather_from_api(city)
+def _weather_response(city: str, data: dict) -> WeatherResponse:
     temp = data["current"]["temp_c"]
     return WeatherResponse(
         city=city,
@@ -33,3 +54,75 @@ async def get_weather(city: str):
         description=get_weather_description(temp),
         feels_like=data["current"]["feelslike_c"],
     )
+
+
+@router.post("/weather/batch", response_model=WeatherBatchResponse)
+async def get_weather_batch(
+    batch: WeatherBatchRequest,
+    client: HttpClientDep,
+    geocode_cache: GeocodeCacheDep,
+    weather_cache: WeatherCacheDep,
+):
+    """
+    Погода для нескольких городов одним запросом.
+
+    Результат возвращается по каждому городу в порядке запроса; ошибка
+    по одному городу (status 404 или 502) не влияет на остальные.
+    """
+    results = await fetch_weather_batch(
+        batch.cities, client, geocode_cache, weather_cache
+    )
+    return WeatherBatchResponse(
+        results=[
+            WeatherBatchItem(
+                city=item["city"],
+                status=item["status"],
+                weather=_weather_response(item["city"], item)
+                if item["status"] == 200
+                else None,
+                detail=item.get("detail"),
+            )
+            for item in results
+        ]
+    )
+
+
+@router.get("/weather/{city}", response_model=WeatherResponse)
+async def get_weather(
+    city: str,
+    client: HttpClientDep,
+    geocode_cache: GeocodeCacheDep,
+    weather_cache: WeatherCacheDep,
+):
+    """Получение погоды для города."""
+    data = await fetch_weather_from_api(city, client, geocode_cache, weather_cache)
+    return _weather_response(city, data)
+
+
+@router.get("/cache/stats", response_model=CacheStatsResponse)
+def cache_stats(
+    geocode_cache: GeocodeCacheDep,
+    weather_cache: WeatherCacheDep,
+):
+    """Статистика кэшей: попадания, промахи и доля попаданий."""
+    geocode = geocode_cache.stats
+    weather = weather_cache.stats
+    return CacheStatsResponse(
+        geocode=GeocodeCacheStatsResponse(
+            memory_hits=geocode.memory_hits,
+            redis_hits=geocode.redis_hits,
+            misses=geocode.misses,
+            hit_ratio=geocode.hit_ratio,
+        ),
+        weather=WeatherCacheStatsResponse(
+            hits=weather.hits,
+            stale_hits=weather.stale_hits,
+            coalesced=weather.coalesced,
+            misses=weather.misses,
+            refreshes=weather.refreshes,
+            refresh_errors=weather.refresh_errors,
+            stale_if_error=weather.stale_if_error,
+            upstream_calls=weather.upstream_calls,
+            hit_ratio=weather.hit_ratio,
+        ),
+    )
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+MAX_BATCH_CITIES = 100
 
 
 class WeatherResponse(BaseModel):
@@ -8,6 +10,21 @@ class WeatherResponse(BaseModel):
     feels_like: float
 
 
+class WeatherBatchRequest(BaseModel):
+    cities: list[str] = Field(min_length=1, max_length=MAX_BATCH_CITIES)
+
+
+class WeatherBatchItem(BaseModel):
+    city: str
+    status: int
+    weather: WeatherResponse | None = None
+    detail: str | None = None
+
+
+class WeatherBatchResponse(BaseModel):
+    results: list[WeatherBatchItem]
+
+
 class ConvertResponse(BaseModel):
     celsius: float
     fahrenheit: float
@@ -15,3 +32,27 @@ class ConvertResponse(BaseModel):
 
 class HealthResponse(BaseModel):
     status: str
+
+
+class GeocodeCacheStatsResponse(BaseModel):
+    memory_hits: int
+    redis_hits: int
+    misses: int
+    hit_ratio: float
+
+
+class WeatherCacheStatsResponse(BaseModel):
+    hits: int
+    stale_hits: int
+    coalesced: int
+    misses: int
+    refreshes: int
+    refresh_errors: int
+    stale_if_error: int
+    upstream_calls: int
+    hit_ratio: float
+
+
+class CacheStatsResponse(BaseModel):
+    geocode: GeocodeCacheStatsResponse
+    weather: WeatherCacheStatsResponse
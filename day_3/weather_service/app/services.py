@@ -1,49 +1,215 @@
+import asyncio
+import os
+
 import httpx
 from fastapi import HTTPException
 
-NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
-OPEN_METEO_URL = "https://api.open-meteo.com/v1/forecast"
-HTTP_TIMEOUT = 10.0  # секунд
+from app.cache import Coordinates, GeocodeCache, WeatherCache
+from app.resilience import UpstreamError, deadline, get_upstream
 
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org/search")
+OPEN_METEO_URL = os.getenv("OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
 
-async def fetch_coordinates(city: str) -> tuple[float, float]:
-    """Получить координаты города через Nominatim."""
-    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
-        response = await client.get(
-            NOMINATIM_URL,
-            params={"q": city, "format": "json", "limit": 1},
-            headers={"User-Agent": "WeatherService/1.0"},
-        )
-        response.raise_for_status()
-        data = response.json()
-        if not data:
-            raise HTTPException(status_code=404, detail=f"City '{city}' not found")
-        return float(data[0]["lat"]), float(data[0]["lon"])
+# Сколько запросов к внешним API одновременно выполняет один пакетный запрос
+WEATHER_BATCH_CONCURRENCY = int(os.getenv("WEATHER_BATCH_CONCURRENCY", "10"))
+# Сколько точек запрашивать у Open-Meteo одним запросом
+OPEN_METEO_MAX_LOCATIONS = int(os.getenv("OPEN_METEO_MAX_LOCATIONS", "50"))
+CURRENT_FIELDS = "temperature_2m,apparent_temperature"
+
+
+async def geocode(client: httpx.AsyncClient, city: str) -> Coordinates | None:
+    """Запросить координаты города у Nominatim; None — город не найден."""
+    response = await get_upstream(NOMINATIM_URL).get(
+        client,
+        NOMINATIM_URL,
+        params={"q": city, "format": "json", "limit": 1},
+        headers={"User-Agent": "WeatherService/1.0"},
+    )
+    response.raise_for_status()
+    data = response.json()
+    if not data:
+        return None
+    return float(data[0]["lat"]), float(data[0]["lon"])
 
 
-async def fetch_weather_by_coords(lat: float, lon: float) -> dict:
+async def fetch_coordinates(
+    client: httpx.AsyncClient, city: str, cache: GeocodeCache | None = None
+) -> Coordinates:
+    """Получить координаты города: из кэша, если он передан, иначе у Nominatim."""
+    if cache is None:
+        coordinates = await geocode(client, city)
+    else:
+        coordinates = await cache.get_or_fetch(city, lambda: geocode(client, city))
+    if coordinates is None:
+        raise HTTPException(status_code=404, detail=f"City '{city}' not found")
+    return coordinates
+
+
+async def fetch_weather_by_coords(
+    client: httpx.AsyncClient, lat: float, lon: float
+) -> dict:
     """Получить погоду по координатам через Open-Meteo."""
-    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
-        response = await client.get(
-            OPEN_METEO_URL,
-            params={
-                "latitude": lat,
-                "longitude": lon,
-                "current": "temperature_2m,apparent_temperature",
-            },
-        )
-        response.raise_for_status()
-        return response.json()
+    response = await get_upstream(OPEN_METEO_URL).get(
+        client,
+        OPEN_METEO_URL,
+        params={
+            "latitude": lat,
+            "longitude": lon,
+            "current": CURRENT_FIELDS,
+        },
+    )
+    response.raise_for_status()
+    return response.json()
 
 
-async def fetch_weather_from_api(city: str) -> dict:
-    """Запрос погоды: геокодинг + погодный API."""
-    lat, lon = await fetch_coordinates(city)
-    weather = await fetch_weather_by_coords(lat, lon)
+async def fetch_weather_by_coords_many(
+    client: httpx.AsyncClient, points: list[Coordinates]
+) -> list[dict]:
+    """Погода для нескольких точек одним запросом к Open-Meteo."""
+    response = await get_upstream(OPEN_METEO_URL).get(
+        client,
+        OPEN_METEO_URL,
+        params={
+            "latitude": ",".join(str(lat) for lat, _ in points),
+            "longitude": ",".join(str(lon) for _, lon in points),
+            "current": CURRENT_FIELDS,
+        },
+    )
+    response.raise_for_status()
+    data = response.json()
+    # Для одной точки Open-Meteo возвращает объект, для нескольких — список
+    data = data if isinstance(data, list) else [data]
+    if len(data) != len(points):
+        raise ValueError(f"Expected {len(points)} locations, got {len(data)}")
+    return data
 
+
+def _current(weather: dict) -> dict:
     return {
         "current": {
             "temp_c": weather["current"]["temperature_2m"],
             "feelslike_c": weather["current"]["apparent_temperature"],
         }
     }
+
+
+def _upstream_error(error: Exception) -> dict:
+    if isinstance(error, UpstreamError):
+        return {"status": error.status_code, "detail": str(error)}
+    return {"status": 502, "detail": f"Upstream error: {type(error).__name__}"}
+
+
+async def fetch_weather_from_api(
+    city: str,
+    client: httpx.AsyncClient,
+    geocode_cache: GeocodeCache | None = None,
+    weather_cache: WeatherCache | None = None,
+) -> dict:
+    """
+    Запрос погоды: геокодинг + погодный API, оба через кэши, если переданы.
+
+    Оба запроса укладываются в общий дедлайн REQUEST_DEADLINE.
+    """
+    with deadline():
+        lat, lon = await fetch_coordinates(client, city, geocode_cache)
+        if weather_cache is None:
+            weather = await fetch_weather_by_coords(client, lat, lon)
+        else:
+            lat, lon = weather_cache.snap(lat, lon)
+            weather = await weather_cache.get_or_fetch(
+                lat, lon, lambda: fetch_weather_by_coords(client, lat, lon)
+            )
+    return _current(weather)
+
+
+async def fetch_weather_batch(
+    cities: list[str],
+    client: httpx.AsyncClient,
+    geocode_cache: GeocodeCache | None = None,
+    weather_cache: WeatherCache | None = None,
+    concurrency: int = WEATHER_BATCH_CONCURRENCY,
+) -> list[dict]:
+    """
+    Погода для списка городов.
+
+    Сначала все города геокодируются параллельно, затем погода для точек,
+    которых нет в кэше, запрашивается у Open-Meteo пачками по
+    OPEN_METEO_MAX_LOCATIONS точек в одном запросе. Одновременно идёт не
+    больше concurrency запросов к внешним API. Ошибка по одному городу
+    не роняет пакет: для каждого города возвращается свой status.
+    Весь пакет укладывается в общий дедлайн REQUEST_DEADLINE.
+    """
+    with deadline():
+        return await _fetch_weather_batch(
+            cities, client, geocode_cache, weather_cache, concurrency
+        )
+
+
+async def _fetch_weather_batch(
+    cities: list[str],
+    client: httpx.AsyncClient,
+    geocode_cache: GeocodeCache | None,
+    weather_cache: WeatherCache | None,
+    concurrency: int,
+) -> list[dict]:
+    semaphore = asyncio.Semaphore(concurrency)
+    results: dict[str, dict] = {}
+    coordinates: dict[str, Coordinates] = {}
+
+    async def geocode_city(city: str) -> None:
+        async with semaphore:
+            try:
+                point = await fetch_coordinates(client, city, geocode_cache)
+                coordinates[city] = (
+                    weather_cache.snap(*point) if weather_cache else point
+                )
+            except HTTPException as e:
+                results[city] = {"status": e.status_code, "detail": e.detail}
+            except (httpx.HTTPError, UpstreamError) as e:
+                results[city] = _upstream_error(e)
+
+    async with asyncio.TaskGroup() as tg:
+        for city in dict.fromkeys(cities):
+            tg.create_task(geocode_city(city))
+
+    weather: dict[Coordinates, dict] = {}
+    missing: list[Coordinates] = []
+    for point in dict.fromkeys(coordinates.values()):
+        cached = weather_cache.get_fresh(*point) if weather_cache else None
+        if cached is not None:
+            weather[point] = cached
+        else:
+            missing.append(point)
+    failed: dict[Coordinates, dict] = {}
+
+    async def fetch_chunk(chunk: list[Coordinates]) -> None:
+        async with semaphore:
+            try:
+                data = await fetch_weather_by_coords_many(client, chunk)
+            except (httpx.HTTPError, UpstreamError, ValueError) as e:
+                # Как и для одного города: при ошибке отдаём устаревшее значение
+                for point in chunk:
+                    stale = (
+                        weather_cache.get_stale_if_error(*point)
+                        if weather_cache
+                        else None
+                    )
+                    if stale is not None:
+                        weather[point] = stale
+                    else:
+                        failed[point] = _upstream_error(e)
+                return
+        for point, point_weather in zip(chunk, data):
+            weather[point] = point_weather
+            if weather_cache is not None:
+                weather_cache.put(*point, point_weather)
+
+    async with asyncio.TaskGroup() as tg:
+        for start in range(0, len(missing), OPEN_METEO_MAX_LOCATIONS):
+            tg.create_task(
+                fetch_chunk(missing[start : start + OPEN_METEO_MAX_LOCATIONS])
+            )
+
+    for city, point in coordinates.items():
+        results[city] = failed.get(point) or {"status": 200, **_current(weather[point])}
+    return [{"city": city, **results[city]} for city in cities]
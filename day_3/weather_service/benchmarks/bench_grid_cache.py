@@ -0,0 +1,154 @@
+"""
+Сколько запросов к Open-Meteo экономит сетка кэша погоды (WEATHER_GRID_STEP).
+
+Воспроизводится синтетический журнал запросов: популярность городов
+распределена по Ципфу, у каждого города есть варианты написания
+(«Novosibirsk», «Новосибирск») с чуть разными координатами геокодера
+и пригороды в радиусе ~15 км. Журнал прогоняется через WeatherCache
+с разным шагом сетки на модельных часах; считаются реальные вызовы API
+и максимальное смещение точки запроса до центра её ячейки.
+
+Запуск:
+    uv run python -m benchmarks.bench_grid_cache
+"""
+
+import argparse
+import asyncio
+import math
+import random
+
+from app.cache import WeatherCache, snap_to_grid
+
+# Центры агломераций: (широта, долгота)
+METROS = [
+    (55.7558, 37.6173),  # Москва
+    (59.9343, 30.3351),  # Санкт-Петербург
+    (55.0084, 82.9357),  # Новосибирск
+    (56.8389, 60.6057),  # Екатеринбург
+    (55.7963, 49.1088),  # Казань
+    (56.3269, 44.0059),  # Нижний Новгород
+    (55.1644, 61.4368),  # Челябинск
+    (53.1959, 50.1002),  # Самара
+    (54.9885, 73.3242),  # Омск
+    (47.2357, 39.7015),  # Ростов-на-Дону
+    (54.7388, 55.9721),  # Уфа
+    (56.0153, 92.8932),  # Красноярск
+    (51.6720, 39.1843),  # Воронеж
+    (58.0105, 56.2502),  # Пермь
+    (48.7080, 44.5133),  # Волгоград
+    (45.0355, 38.9753),  # Краснодар
+    (43.1155, 131.8855),  # Владивосток
+    (52.2870, 104.3050),  # Иркутск
+    (61.2500, 73.3960),  # Сургут
+    (64.5393, 40.5187),  # Архангельск
+]
+# Разные строки, которые геокодер отдаёт почти в одну точку
+SPELLINGS_PER_METRO = 3
+SUBURBS_PER_METRO = 8
+SUBURB_RADIUS_KM = 15
+
+
+def build_places(rng: random.Random) -> list[list[tuple[float, float]]]:
+    """Для каждой агломерации — координаты всех её «городов» после геокодинга."""
+    places = []
+    for lat, lon in METROS:
+        km_per_lon = 111.32 * math.cos(math.radians(lat))
+        metro = [
+            (lat + rng.uniform(-0.005, 0.005), lon + rng.uniform(-0.005, 0.005))
+            for _ in range(SPELLINGS_PER_METRO)
+        ]
+        for _ in range(SUBURBS_PER_METRO):
+            distance = SUBURB_RADIUS_KM * math.sqrt(rng.random())
+            angle = rng.uniform(0, 2 * math.pi)
+            metro.append(
+                (
+                    lat + distance * math.sin(angle) / 111.32,
+                    lon + distance * math.cos(angle) / km_per_lon,
+                )
+            )
+        places.append(metro)
+    return places
+
+
+def build_log(
+    requests: int, rps: float, seed: int
+) -> list[tuple[float, tuple[float, float]]]:
+    """Журнал (время, координаты): популярность агломераций по Ципфу."""
+    rng = random.Random(seed)
+    places = build_places(rng)
+    weights = [1 / rank for rank in range(1, len(places) + 1)]
+    log = []
+    now = 0.0
+    for _ in range(requests):
+        now += rng.expovariate(rps)
+        [metro] = rng.choices(places, weights)
+        log.append((now, rng.choice(metro)))
+    return log
+
+
+class ModelClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def replay(log: list, step: float) -> int:
+    """Прогнать журнал через кэш; вернуть число вызовов API."""
+    clock = ModelClock()
+    cache = WeatherCache(grid_step=step, clock=clock)
+
+    async def fetch() -> dict:
+        return {}
+
+    for now, (lat, lon) in log:
+        clock.now = now
+        await cache.get_or_fetch(*cache.snap(lat, lon), fetch)
+    await cache.join()
+    return cache.stats.upstream_calls
+
+
+def max_offset_km(log: list, step: float) -> float:
+    """Максимальное расстояние от точки запроса до центра её ячейки."""
+    offset = 0.0
+    for _, (lat, lon) in log:
+        cell_lat, cell_lon = snap_to_grid(lat, lon, step)
+        dy = (cell_lat - lat) * 111.32
+        dx = (cell_lon - lon) * 111.32 * math.cos(math.radians(lat))
+        offset = max(offset, math.hypot(dx, dy))
+    return offset
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=100_000)
+    parser.add_argument("--rps", type=float, default=20.0)
+    parser.add_argument(
+        "--steps", type=float, nargs="+", default=[0, 0.05, 0.1, 0.25, 0.5]
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    log = build_log(args.requests, args.rps, args.seed)
+    print(
+        f"{args.requests} запросов за {log[-1][0] / 3600:.1f} ч модельного времени, "
+        f"{len(METROS) * (SPELLINGS_PER_METRO + SUBURBS_PER_METRO)} разных точек"
+    )
+    print(
+        f"{'шаг, °':>7} | {'вызовов API':>11} | {'экономия':>8} | {'смещение, км':>12}"
+    )
+    print("-" * 50)
+    baseline = None
+    for step in args.steps:
+        calls = asyncio.run(replay(log, step))
+        if baseline is None:
+            baseline = calls
+        print(
+            f"{step:>7} | {calls:>11} | {1 - calls / baseline:>8.1%} | "
+            f"{max_offset_km(log, step):>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
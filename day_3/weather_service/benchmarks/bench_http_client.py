@@ -0,0 +1,98 @@
+"""
+Бенчмарк /weather/{city}: новый httpx.AsyncClient на каждый вызов против
+общего клиента с пулом keep-alive соединений.
+
+Внешние API заменены локальной заглушкой, поэтому в замер попадают только
+создание клиента, установка соединений и накладные расходы сервиса.
+На настоящих HTTPS API к этому добавляется TLS-рукопожатие на каждый вызов.
+
+Запуск:
+    uv run python -m benchmarks.bench_http_client
+"""
+
+import argparse
+import asyncio
+import statistics
+from time import perf_counter
+
+import httpx
+
+from app import routers, services
+from app.cache import get_geocode_cache
+from app.http_client import HTTP_TIMEOUT, close_http_client
+from app.main import app
+from benchmarks.stub_upstream import StubUpstream
+
+
+async def fetch_per_call(city: str, *_) -> dict:
+    """Прежняя реализация: новый клиент (и соединение) на каждый запрос к API."""
+    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as per_call:
+        lat, lon = await services.fetch_coordinates(per_call, city)
+    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as per_call:
+        weather = await services.fetch_weather_by_coords(per_call, lat, lon)
+    return {
+        "current": {
+            "temp_c": weather["current"]["temperature_2m"],
+            "feelslike_c": weather["current"]["apparent_temperature"],
+        }
+    }
+
+
+async def measure(requests: int, concurrency: int) -> list[float]:
+    """Латентности (мс) запросов /weather/{city} с заданным параллелизмом."""
+    latencies: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as api:
+
+        async def one() -> None:
+            async with semaphore:
+                started = perf_counter()
+                response = await api.get("/weather/London")
+                latencies.append((perf_counter() - started) * 1000)
+                response.raise_for_status()
+
+        await asyncio.gather(*(one() for _ in range(requests)))
+    await close_http_client()
+    return latencies
+
+
+def percentile(values: list[float], q: int) -> float:
+    return statistics.quantiles(values, n=100)[q - 1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    args = parser.parse_args()
+
+    pooled = routers.fetch_weather_from_api
+    # Сравниваем только работу с соединениями: кэш геокодинга выключен
+    app.dependency_overrides[get_geocode_cache] = lambda: None
+    modes = {"per-call": fetch_per_call, "pooled": pooled}
+
+    with StubUpstream() as base_url:
+        services.NOMINATIM_URL = f"{base_url}/search"
+        services.OPEN_METEO_URL = f"{base_url}/v1/forecast"
+
+        print(
+            f"{'mode':>9} | {'conc':>4} | {'p50, мс':>8} | {'p99, мс':>8} | {'RPS':>7}"
+        )
+        print("-" * 48)
+        for concurrency in args.concurrency:
+            for mode, fetch in modes.items():
+                routers.fetch_weather_from_api = fetch
+                started = perf_counter()
+                latencies = asyncio.run(measure(args.requests, concurrency))
+                rps = args.requests / (perf_counter() - started)
+                print(
+                    f"{mode:>9} | {concurrency:>4} | "
+                    f"{percentile(latencies, 50):>8.2f} | "
+                    f"{percentile(latencies, 99):>8.2f} | {rps:>7.0f}"
+                )
+        routers.fetch_weather_from_api = pooled
+
+
+if __name__ == "__main__":
+    main()
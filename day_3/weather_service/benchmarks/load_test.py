@@ -0,0 +1,156 @@
+"""
+Нагрузочный тест /weather/{city} против локальной заглушки внешних API.
+
+Заглушка (benchmarks.stub_upstream) и сервис (uvicorn app.main:app)
+запускаются отдельными процессами, сервис ходит в заглушку через настоящий
+HTTP, так что в замер попадают пул соединений, кэши и предохранители.
+Генератор держит заданный RPS по открытой модели: запросы отправляются
+по расписанию, не дожидаясь ответов на предыдущие, поэтому очередь
+в сервисе видна в латентности. В конце — пропускная способность,
+p50/p95/p99 и сколько вызовов получили внешние API.
+
+Работает офлайн на одной машине. Запуск:
+    uv run python -m benchmarks.load_test --rps 50 --duration 30 \\
+        --latency 0.05 --jitter 0.02 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from time import perf_counter
+
+import httpx
+
+from benchmarks.stub_upstream import _free_port
+
+
+@contextmanager
+def serve(args: list[str], port: int, env: dict[str, str]) -> Iterator[str]:
+    """Запустить uvicorn-процесс и дождаться, пока он начнёт принимать запросы."""
+    process = subprocess.Popen(
+        [sys.executable, *args, "--port", str(port)], env={**os.environ, **env}
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(200):
+            if process.poll() is not None:
+                raise RuntimeError(f"{args} exited with code {process.returncode}")
+            try:
+                httpx.get(base_url)
+                break
+            except httpx.TransportError:
+                time.sleep(0.05)
+        else:
+            raise RuntimeError(f"{args} did not start")
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+async def generate_load(
+    base_url: str, rps: float, duration: float, cities: list[str], seed: int
+) -> tuple[list[float], Counter, float]:
+    """Открытая модель нагрузки: латентности (мс), коды ответов, время прогона."""
+    rng = random.Random(seed)
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    total = int(rps * duration)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(
+        base_url=base_url, limits=limits, timeout=30.0
+    ) as client:
+
+        async def one(city: str) -> None:
+            started = perf_counter()
+            try:
+                response = await client.get(f"/weather/{city}")
+                statuses[response.status_code] += 1
+            except httpx.HTTPError as e:
+                statuses[type(e).__name__] += 1
+                return
+            latencies.append((perf_counter() - started) * 1000)
+
+        tasks = []
+        started = perf_counter()
+        for i in range(total):
+            delay = started + i / rps - perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(rng.choice(cities))))
+        await asyncio.gather(*tasks)
+        elapsed = perf_counter() - started
+    return latencies, statuses, elapsed
+
+
+def percentile(values: list[float], q: int) -> float:
+    return statistics.quantiles(values, n=100)[q - 1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rps", type=float, default=50.0)
+    parser.add_argument("--duration", type=float, default=10.0, help="секунд")
+    parser.add_argument("--cities", type=int, default=100, help="разных городов")
+    parser.add_argument("--latency", type=float, default=0.05, help="секунд")
+    parser.add_argument("--jitter", type=float, default=0.01, help="секунд")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    stub_args = [
+        "-m",
+        "benchmarks.stub_upstream",
+        "--latency",
+        str(args.latency),
+        "--jitter",
+        str(args.jitter),
+        "--error-rate",
+        str(args.error_rate),
+        "--seed",
+        str(args.seed),
+    ]
+    service_args = ["-m", "uvicorn", "app.main:app", "--log-level", "warning"]
+    cities = [f"city{i}" for i in range(args.cities)]
+
+    with serve(stub_args, _free_port(), {}) as stub_url:
+        env = {
+            "NOMINATIM_URL": f"{stub_url}/search",
+            "OPEN_METEO_URL": f"{stub_url}/v1/forecast",
+        }
+        with serve(service_args, _free_port(), env) as service_url:
+            latencies, statuses, elapsed = asyncio.run(
+                generate_load(service_url, args.rps, args.duration, cities, args.seed)
+            )
+        upstream = httpx.get(f"{stub_url}/__stats").json()
+
+    requests = sum(statuses.values())
+    print(f"Запросов: {requests} за {elapsed:.1f} с, цель {args.rps:.0f} RPS")
+    print(f"Пропускная способность: {requests / elapsed:.0f} RPS")
+    print(f"Коды ответов: {dict(statuses)}")
+    if len(latencies) > 1:
+        print(
+            f"Латентность, мс: p50 {percentile(latencies, 50):.1f} | "
+            f"p95 {percentile(latencies, 95):.1f} | "
+            f"p99 {percentile(latencies, 99):.1f}"
+        )
+    calls = upstream.get("search", 0) + upstream.get("forecast", 0)
+    print(
+        f"Вызовы внешних API: геокодинг {upstream.get('search', 0)}, "
+        f"погода {upstream.get('forecast', 0)}, ошибок {upstream.get('errors', 0)} "
+        f"({calls / requests:.2f} на запрос)"
+    )
+
+
+if __name__ == "__main__":
+    main()
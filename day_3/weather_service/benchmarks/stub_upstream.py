@@ -0,0 +1,150 @@
+"""
+Локальная заглушка внешних API (Nominatim и Open-Meteo) для бенчмарков.
+
+Отвечает данными в формате настоящих API с настраиваемой задержкой,
+разбросом и долей ошибок. Координаты зависят от названия города, так что
+разные города попадают в разные записи кэша. Счётчики вызовов — на
+/__stats. Запускается в фоновом потоке (StubUpstream) или отдельным
+процессом:
+
+    uv run python -m benchmarks.stub_upstream --port 9000 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+import zlib
+from collections import Counter
+from dataclasses import dataclass
+from urllib.parse import parse_qs
+
+import uvicorn
+
+
+@dataclass
+class StubConfig:
+    """Поведение заглушки: задержка и разброс (сек), доля ответов 503."""
+
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    seed: int | None = None
+
+
+def city_coordinates(city: str) -> list[dict]:
+    """Ответ геокодера: стабильные координаты по названию, «nowhere» не найден."""
+    if city == "nowhere":
+        return []
+    checksum = zlib.crc32(city.encode())
+    lat = (checksum % 13_000) / 100 - 60
+    lon = (checksum // 13_000 % 36_000) / 100 - 180
+    return [{"lat": f"{lat:.4f}", "lon": f"{lon:.4f}"}]
+
+
+def forecast(latitudes: str) -> dict | list[dict]:
+    """Ответ Open-Meteo: одна точка — объект, несколько через запятую — список."""
+    points = [
+        {"current": {"temperature_2m": 22.5, "apparent_temperature": 21.0}}
+        for _ in latitudes.split(",")
+    ]
+    return points[0] if len(points) == 1 else points
+
+
+def make_stub_app(config: StubConfig | None = None):
+    """ASGI-приложение заглушки: /search — геокодинг, /v1/forecast — погода."""
+    config = config or StubConfig()
+    rng = random.Random(config.seed)
+    calls: Counter[str] = Counter()
+
+    async def respond(send, status: int, body) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(b"content-type", b"application/json")],
+            }
+        )
+        await send({"type": "http.response.body", "body": json.dumps(body).encode()})
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        path = scope["path"]
+        if path == "/__stats":
+            await respond(send, 200, calls)
+            return
+
+        endpoint = "search" if path == "/search" else "forecast"
+        calls[endpoint] += 1
+        delay = config.latency
+        if config.jitter:
+            delay = max(rng.gauss(config.latency, config.jitter), 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        if rng.random() < config.error_rate:
+            calls["errors"] += 1
+            await respond(send, 503, {"error": "stub failure"})
+            return
+
+        query = parse_qs(scope["query_string"].decode())
+        if endpoint == "search":
+            await respond(send, 200, city_coordinates(query.get("q", [""])[0]))
+        else:
+            await respond(send, 200, forecast(query.get("latitude", ["0"])[0]))
+
+    return app
+
+
+stub_app = make_stub_app()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class StubUpstream:
+    """Заглушка в фоновом потоке: with StubUpstream() as base_url: ..."""
+
+    def __init__(self, app=stub_app, port: int | None = None):
+        self.port = port or _free_port()
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, port=self.port, log_level="warning")
+        )
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> str:
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self.base_url
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self.thread.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.0, help="секунд")
+    parser.add_argument("--jitter", type=float, default=0.0, help="секунд")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency, args.jitter, args.error_rate, args.seed)
+    uvicorn.run(make_stub_app(config), port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
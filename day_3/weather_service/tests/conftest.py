@@ -3,6 +3,15 @@ import pytest
 from httpx import ASGITransport
 
 from app.main import app
+from app.resilience import reset_upstreams
+
+
+@pytest.fixture(autouse=True)
+def _reset_upstreams():
+    """Состояние предохранителей общее на процесс — сбрасываем между тестами."""
+    reset_upstreams()
+    yield
+    reset_upstreams()
 
 
 @pytest.fixture
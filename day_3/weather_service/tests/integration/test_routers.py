@@ -1,7 +1,13 @@
 from unittest.mock import AsyncMock, patch
 
+import httpx
 from fastapi import HTTPException
 
+from app.cache import GeocodeCache, WeatherCache, get_geocode_cache, get_weather_cache
+from app.http_client import get_http_client
+from app.main import app
+from app.resilience import CircuitOpenError, DeadlineExceeded
+
 # ===== /health =====
 
 async def test_health_returns_ok(async_client):
@@ -89,7 +95,7 @@ async def test_weather_city_not_found(async_client):
 async def test_weather_success_monkeypatch(async_client, mock_weather_data, monkeypatch):
     """Успешное получение погоды с использованием monkeypatch."""
 
-    async def mock_fetch(city: str) -> dict:
+    async def mock_fetch(city: str, *_) -> dict:
         return mock_weather_data
 
     monkeypatch.setattr("app.routers.fetch_weather_from_api", mock_fetch)
@@ -106,7 +112,7 @@ async def test_weather_success_monkeypatch(async_client, mock_weather_data, monk
 async def test_weather_city_not_found_monkeypatch(async_client, monkeypatch):
     """Город не найден с использованием monkeypatch."""
 
-    async def mock_fetch(city: str) -> dict:
+    async def mock_fetch(city: str, *_) -> dict:
         raise HTTPException(status_code=404, detail=f"City '{city}' not found")
 
     monkeypatch.setattr("app.routers.fetch_weather_from_api", mock_fetch)
@@ -115,3 +121,96 @@ async def test_weather_city_not_found_monkeypatch(async_client, monkeypatch):
 
     assert response.status_code == 404
     assert "not found" in response.json()["detail"]
+
+
+async def test_weather_upstream_unavailable(async_client, monkeypatch):
+    """Открытый предохранитель и исчерпанный дедлайн — 503 и 504."""
+
+    async def circuit_open(city: str, *_) -> dict:
+        raise CircuitOpenError("api.open-meteo.com")
+
+    async def deadline_exceeded(city: str, *_) -> dict:
+        raise DeadlineExceeded()
+
+    monkeypatch.setattr("app.routers.fetch_weather_from_api", circuit_open)
+    response = await async_client.get("/weather/London")
+    assert response.status_code == 503
+
+    monkeypatch.setattr("app.routers.fetch_weather_from_api", deadline_exceeded)
+    response = await async_client.get("/weather/London")
+    assert response.status_code == 504
+
+
+async def test_weather_upstream_server_error_returns_502(async_client):
+    """Ответ 5xx погодного API превращается в 502, а не в 500."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "nominatim.openstreetmap.org":
+            return httpx.Response(200, json=[{"lat": "51.5", "lon": "-0.1"}])
+        return httpx.Response(503)
+
+    upstream_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    geocode_cache, weather_cache = GeocodeCache(), WeatherCache()
+    app.dependency_overrides.update(
+        {
+            get_http_client: lambda: upstream_client,
+            get_geocode_cache: lambda: geocode_cache,
+            get_weather_cache: lambda: weather_cache,
+        }
+    )
+    try:
+        response = await async_client.get("/weather/London")
+    finally:
+        app.dependency_overrides.clear()
+        await upstream_client.aclose()
+
+    assert response.status_code == 502
+    assert "api.open-meteo.com" in response.json()["detail"]
+
+
+# ===== /cache/stats =====
+
+async def test_cache_stats(async_client):
+    response = await async_client.get("/cache/stats")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert set(data) == {"geocode", "weather"}
+    assert data["geocode"]["hit_ratio"] == 0.0
+    assert data["weather"]["upstream_calls"] == 0
+    assert data["weather"]["stale_if_error"] == 0
+
+
+# ===== /weather/batch =====
+
+async def test_weather_batch_partial_failure(async_client, monkeypatch):
+    """Ошибка по одному городу не роняет весь пакет."""
+
+    async def mock_batch(cities: list[str], *_) -> list[dict]:
+        return [
+            {
+                "city": "London",
+                "status": 200,
+                "current": {"temp_c": 22.5, "feelslike_c": 21.0},
+            },
+            {"city": "xyz", "status": 404, "detail": "City 'xyz' not found"},
+        ]
+
+    monkeypatch.setattr("app.routers.fetch_weather_batch", mock_batch)
+
+    response = await async_client.post(
+        "/weather/batch", json={"cities": ["London", "xyz"]}
+    )
+
+    assert response.status_code == 200
+    [london, xyz] = response.json()["results"]
+    assert london["status"] == 200
+    assert london["weather"]["description"] == "warm"
+    assert xyz["status"] == 404
+    assert xyz["weather"] is None
+
+
+async def test_weather_batch_empty_list_returns_422(async_client):
+    response = await async_client.post("/weather/batch", json={"cities": []})
+
+    assert response.status_code == 422
@@ -0,0 +1,216 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+from fakeredis import FakeAsyncRedis
+from redis.exceptions import ConnectionError
+
+from app.cache import (
+    GeocodeCache,
+    TTLCache,
+    WeatherCache,
+    normalize_city,
+    snap_to_grid,
+)
+
+# ===== TTLCache =====
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_cache_expires_entries():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, clock=clock)
+    cache.set("london", (51.5, -0.1), ttl=60)
+
+    clock.now = 59
+    assert cache.get("london") == (51.5, -0.1)
+    clock.now = 60
+    assert cache.get("london") is None
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=60)
+    cache.get("a")
+    cache.set("c", 3, ttl=60)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+@pytest.mark.parametrize(
+    "city",
+    ["London", " london ", "LONDON", "London "],
+)
+def test_normalize_city(city):
+    assert normalize_city(city) == "london"
+
+
+# ===== GeocodeCache =====
+
+
+async def test_geocode_cache_memory_hit():
+    cache = GeocodeCache()
+    fetch = AsyncMock(return_value=(51.5, -0.1))
+
+    assert await cache.get_or_fetch("London", fetch) == (51.5, -0.1)
+    assert await cache.get_or_fetch(" london", fetch) == (51.5, -0.1)
+
+    fetch.assert_awaited_once()
+    assert cache.stats.memory_hits == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.hit_ratio == 0.5
+
+
+async def test_geocode_cache_caches_not_found():
+    cache = GeocodeCache()
+    fetch = AsyncMock(return_value=None)
+
+    assert await cache.get_or_fetch("xyz", fetch) is None
+    assert await cache.get_or_fetch("xyz", fetch) is None
+
+    fetch.assert_awaited_once()
+
+
+async def test_geocode_cache_redis_tier_shared_between_instances():
+    redis_client = FakeAsyncRedis()
+    fetch = AsyncMock(side_effect=[(51.5, -0.1), None])
+
+    first = GeocodeCache(redis_client)
+    await first.get_or_fetch("London", fetch)
+    await first.get_or_fetch("xyz", fetch)
+
+    # Новый процесс: пустой кэш в памяти, но общий Redis
+    second = GeocodeCache(redis_client)
+    assert await second.get_or_fetch("london", fetch) == (51.5, -0.1)
+    assert await second.get_or_fetch("XYZ", fetch) is None
+
+    assert fetch.await_count == 2
+    assert second.stats.redis_hits == 2
+    assert await redis_client.ttl("geocode:xyz") <= second.negative_ttl
+
+
+async def test_geocode_cache_survives_redis_errors():
+    redis_client = AsyncMock()
+    redis_client.get.side_effect = ConnectionError
+    redis_client.set.side_effect = ConnectionError
+    cache = GeocodeCache(redis_client)
+    fetch = AsyncMock(return_value=(51.5, -0.1))
+
+    assert await cache.get_or_fetch("London", fetch) == (51.5, -0.1)
+    assert await cache.get_or_fetch("London", fetch) == (51.5, -0.1)
+
+    fetch.assert_awaited_once()
+
+
+# ===== WeatherCache =====
+
+
+async def test_weather_cache_fresh_hit():
+    cache = WeatherCache(ttl=60)
+    fetch = AsyncMock(return_value={"temp": 20})
+
+    await cache.get_or_fetch(51.5, -0.1, fetch)
+    assert await cache.get_or_fetch(51.5, -0.1, fetch) == {"temp": 20}
+
+    fetch.assert_awaited_once()
+    assert cache.stats.hits == 1
+
+
+async def test_weather_cache_coalesces_concurrent_misses():
+    cache = WeatherCache()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"temp": 20}
+
+    results = await asyncio.gather(
+        *(cache.get_or_fetch(51.5, -0.1, fetch) for _ in range(100))
+    )
+
+    assert calls == 1
+    assert all(result == {"temp": 20} for result in results)
+    assert cache.stats.misses == 1
+    assert cache.stats.coalesced == 99
+
+
+async def test_weather_cache_serves_stale_and_refreshes_once():
+    clock = FakeClock()
+    cache = WeatherCache(ttl=60, max_stale=600, clock=clock)
+    fetch = AsyncMock(side_effect=[{"temp": 20}, {"temp": 25}])
+    await cache.get_or_fetch(51.5, -0.1, fetch)
+
+    clock.now = 61
+    stale = await asyncio.gather(
+        *(cache.get_or_fetch(51.5, -0.1, fetch) for _ in range(10))
+    )
+    assert stale == [{"temp": 20}] * 10
+    await cache.join()
+
+    assert await cache.get_or_fetch(51.5, -0.1, fetch) == {"temp": 25}
+    assert fetch.await_count == 2
+    assert cache.stats.refreshes == 1
+
+
+async def test_weather_cache_keeps_stale_value_when_refresh_fails():
+    clock = FakeClock()
+    cache = WeatherCache(ttl=60, max_stale=600, clock=clock)
+    fetch = AsyncMock(side_effect=[{"temp": 20}, RuntimeError("upstream down")])
+    await cache.get_or_fetch(51.5, -0.1, fetch)
+
+    clock.now = 61
+    assert await cache.get_or_fetch(51.5, -0.1, fetch) == {"temp": 20}
+    await cache.join()
+
+    assert await cache.get_or_fetch(51.5, -0.1, fetch) == {"temp": 20}
+    assert cache.stats.refresh_errors == 1
+
+
+async def test_weather_cache_expires_after_max_stale():
+    clock = FakeClock()
+    cache = WeatherCache(ttl=60, max_stale=600, clock=clock)
+    fetch = AsyncMock(side_effect=[{"temp": 20}, {"temp": 25}])
+    await cache.get_or_fetch(51.5, -0.1, fetch)
+
+    clock.now = 660
+    assert await cache.get_or_fetch(51.5, -0.1, fetch) == {"temp": 25}
+    assert cache.stats.misses == 2
+
+
+@pytest.mark.parametrize(
+    "point, step, cell",
+    [
+        ((55.03, 82.92), 0.1, (55.05, 82.95)),
+        ((55.0, 82.9), 0.1, (55.05, 82.95)),
+        ((-33.87, 151.21), 0.1, (-33.85, 151.25)),
+        ((55.03, 82.92), 0.5, (55.25, 82.75)),
+        ((55.03, 82.92), 0, (55.03, 82.92)),
+    ],
+)
+def test_snap_to_grid(point, step, cell):
+    assert snap_to_grid(*point, step) == cell
+
+
+async def test_weather_cache_shares_entry_within_grid_cell():
+    cache = WeatherCache(grid_step=0.1)
+    fetch = AsyncMock(side_effect=[{"temp": 20}, {"temp": 15}])
+
+    # Новосибирск и его пригород в одной ячейке, Бердск — в соседней
+    await cache.get_or_fetch(55.03, 82.92, fetch)
+    assert await cache.get_or_fetch(55.08, 82.97, fetch) == {"temp": 20}
+    assert await cache.get_or_fetch(54.76, 83.1, fetch) == {"temp": 15}
+
+    assert fetch.await_count == 2
+    assert cache.stats.hits == 1
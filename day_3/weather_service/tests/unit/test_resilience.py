@@ -0,0 +1,161 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.cache import WeatherCache
+from app.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceeded,
+    Upstream,
+    UpstreamError,
+    deadline,
+)
+
+URL = "http://upstream.test/data"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_client(handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+# ===== CircuitBreaker =====
+
+
+def test_breaker_opens_after_threshold_and_probes_after_timeout():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, clock=clock)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    clock.now = 30
+    assert breaker.allow()
+    assert not breaker.allow(), "в half-open пропускается один пробный запрос"
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_breaker_reopens_when_probe_fails():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 30
+    assert breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+
+
+async def test_upstream_fails_fast_when_open():
+    calls = 0
+
+    def handler(request):
+        nonlocal calls
+        calls += 1
+        return httpx.Response(503)
+
+    upstream = Upstream("upstream.test")
+    upstream.breaker.failure_threshold = 2
+    async with make_client(handler) as client:
+        for _ in range(2):
+            with pytest.raises(UpstreamError) as exc_info:
+                await upstream.get(client, URL)
+            assert exc_info.value.status_code == 502
+            assert isinstance(exc_info.value.__cause__, httpx.HTTPStatusError)
+        with pytest.raises(CircuitOpenError):
+            await upstream.get(client, URL)
+
+    assert calls == 2
+
+
+async def test_client_errors_do_not_open_breaker():
+    upstream = Upstream("upstream.test")
+    upstream.breaker.failure_threshold = 1
+    async with make_client(lambda request: httpx.Response(400)) as client:
+        response = await upstream.get(client, URL)
+
+    assert response.status_code == 400
+    assert upstream.breaker.state == "closed"
+
+
+# ===== Дедлайн =====
+
+
+async def test_deadline_is_shared_between_calls():
+    async def slow(request):
+        await asyncio.sleep(0.06)
+        return httpx.Response(200)
+
+    upstream = Upstream("upstream.test")
+    started = time.monotonic()
+    async with make_client(slow) as client:
+        with deadline(0.1):
+            await upstream.get(client, URL)
+            with pytest.raises(DeadlineExceeded):
+                await upstream.get(client, URL)
+
+    assert time.monotonic() - started < 0.2
+
+
+# ===== Хеджирование =====
+
+
+async def test_hedged_request_wins_over_slow_first_attempt():
+    attempts = 0
+
+    async def handler(request):
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            await asyncio.sleep(1)
+        return httpx.Response(200, json={"attempt": attempts})
+
+    upstream = Upstream("upstream.test", hedge=True)
+    for _ in range(20):
+        upstream.latency.record(0.01)
+    async with make_client(handler) as client:
+        started = time.monotonic()
+        response = await upstream.get(client, URL)
+
+    assert response.json() == {"attempt": 2}
+    assert time.monotonic() - started < 0.5
+    assert upstream.hedged_requests == 1
+
+
+# ===== Устаревшее значение при ошибке =====
+
+
+async def test_weather_cache_serves_stale_if_upstream_fails():
+    clock = FakeClock()
+    cache = WeatherCache(ttl=60, max_stale=10, stale_if_error=3600, clock=clock)
+
+    async def fetch():
+        return {"temp": 20}
+
+    async def broken():
+        raise CircuitOpenError("api.open-meteo.com")
+
+    await cache.get_or_fetch(51.5, -0.1, fetch)
+    clock.now = 600
+
+    assert await cache.get_or_fetch(51.5, -0.1, broken) == {"temp": 20}
+    assert cache.stats.stale_if_error == 1
+
+    clock.now = 60 + 3600
+    with pytest.raises(CircuitOpenError):
+        await cache.get_or_fetch(51.5, -0.1, broken)
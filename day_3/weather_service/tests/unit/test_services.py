@@ -0,0 +1,136 @@
+import httpx
+import pytest
+
+from app import services
+from app.cache import WeatherCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeUpstream:
+    """Заглушка Nominatim и Open-Meteo для httpx.MockTransport."""
+
+    def __init__(self, weather_status: int = 200):
+        self.weather_status = weather_status
+        self.geocode_calls = 0
+        self.weather_calls: list[int] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/search":
+            self.geocode_calls += 1
+            city = request.url.params["q"]
+            if city == "nowhere":
+                return httpx.Response(200, json=[])
+            # Координаты по номеру города: city0 -> (0, 0), city1 -> (1, 1)
+            index = city.removeprefix("city")
+            return httpx.Response(200, json=[{"lat": index, "lon": index}])
+
+        if self.weather_status != 200:
+            return httpx.Response(self.weather_status)
+        latitudes = request.url.params["latitude"].split(",")
+        self.weather_calls.append(len(latitudes))
+        locations = [
+            {
+                "current": {
+                    "temperature_2m": float(lat),
+                    "apparent_temperature": float(lat) - 1,
+                }
+            }
+            for lat in latitudes
+        ]
+        return httpx.Response(
+            200, json=locations if len(locations) > 1 else locations[0]
+        )
+
+
+@pytest.fixture
+def upstream():
+    return FakeUpstream()
+
+
+@pytest.fixture
+async def client(upstream):
+    async with httpx.AsyncClient(transport=httpx.MockTransport(upstream)) as client:
+        yield client
+
+
+async def test_batch_fetches_weather_in_one_request(client, upstream):
+    results = await services.fetch_weather_batch(["city1", "nowhere", "city2"], client)
+
+    assert [r["city"] for r in results] == ["city1", "nowhere", "city2"]
+    assert [r["status"] for r in results] == [200, 404, 200]
+    assert results[0]["current"] == {"temp_c": 1.0, "feelslike_c": 0.0}
+    assert results[2]["current"]["temp_c"] == 2.0
+    assert upstream.geocode_calls == 3
+    assert upstream.weather_calls == [2]
+
+
+async def test_batch_splits_locations_into_chunks(client, upstream, monkeypatch):
+    monkeypatch.setattr(services, "OPEN_METEO_MAX_LOCATIONS", 2)
+
+    results = await services.fetch_weather_batch([f"city{i}" for i in range(5)], client)
+
+    assert all(r["status"] == 200 for r in results)
+    assert sorted(upstream.weather_calls) == [1, 2, 2]
+
+
+async def test_batch_deduplicates_cities(client, upstream):
+    results = await services.fetch_weather_batch(["city1", "city1"], client)
+
+    assert [r["status"] for r in results] == [200, 200]
+    assert upstream.geocode_calls == 1
+    assert upstream.weather_calls == [1]
+
+
+async def test_batch_reports_upstream_failure_per_city():
+    upstream = FakeUpstream(weather_status=500)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(upstream)) as client:
+        results = await services.fetch_weather_batch(["city1", "nowhere"], client)
+
+    assert results[0]["status"] == 502
+    assert results[1]["status"] == 404
+
+
+async def test_batch_uses_weather_cache(client, upstream):
+    weather_cache = WeatherCache()
+    await services.fetch_weather_batch(["city1"], client, weather_cache=weather_cache)
+    await services.fetch_weather_batch(["city1"], client, weather_cache=weather_cache)
+
+    assert upstream.weather_calls == [1]
+    assert weather_cache.stats.hits == 1
+
+
+async def test_batch_shares_weather_within_grid_cell(client, upstream):
+    weather_cache = WeatherCache(grid_step=0.1)
+    results = await services.fetch_weather_batch(
+        ["city1.01", "city1.04", "city1.2"], client, weather_cache=weather_cache
+    )
+
+    assert [r["status"] for r in results] == [200, 200, 200]
+    # Погода запрашивается для центров ячеек: двух разных, а не трёх точек
+    assert upstream.weather_calls == [2]
+    assert results[0]["current"] == results[1]["current"]
+
+
+async def test_batch_serves_stale_weather_if_upstream_fails(client, upstream):
+    clock = FakeClock()
+    weather_cache = WeatherCache(ttl=60, max_stale=10, stale_if_error=3600, clock=clock)
+    [fresh] = await services.fetch_weather_batch(
+        ["city1"], client, weather_cache=weather_cache
+    )
+
+    clock.now = 600
+    upstream.weather_status = 503
+    results = await services.fetch_weather_batch(
+        ["city1", "city2"], client, weather_cache=weather_cache
+    )
+
+    assert results[0] == fresh
+    assert results[1]["status"] == 502, "для city2 устаревшего значения нет"
+    assert weather_cache.stats.stale_if_error == 1
@@ -0,0 +1,90 @@
+"""
+Бенчмарк пропускной способности: N чисел поштучными GET /calc/{n}
+против POST /calc/batch (один MGET и один конвейер SET EX на пакет).
+
+Берутся маленькие n, чтобы в замер попадала работа с Redis, а не счёт.
+L1 выключен: «холодный» прогон — все числа промахи, «тёплый» — все
+в Redis. По умолчанию Redis заменён fakeredis (без сети — с настоящим
+Redis разница больше на RTT каждого запроса); с --redis-url бенчмарк
+ходит в настоящий Redis, например из docker compose.
+
+Запуск:
+    uv run python -m benchmarks.bench_batch
+    uv run python -m benchmarks.bench_batch --redis-url redis://localhost:6379
+"""
+
+import argparse
+import asyncio
+from time import perf_counter
+
+import httpx
+import redis.asyncio as redis
+from fakeredis import FakeAsyncRedis
+
+import main
+from executor import CalcExecutor
+from l1_cache import LocalCache
+
+
+async def singles(client: httpx.AsyncClient, numbers: list[int], concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(number: int) -> None:
+        async with semaphore:
+            (await client.get(f'/calc/{number}')).raise_for_status()
+
+    await asyncio.gather(*(one(number) for number in numbers))
+
+
+async def batches(client: httpx.AsyncClient, numbers: list[int], size: int):
+    for start in range(0, len(numbers), size):
+        response = await client.post(
+            '/calc/batch', json={'numbers': numbers[start : start + size]}
+        )
+        response.raise_for_status()
+
+
+async def run(args: argparse.Namespace) -> None:
+    main.app.state.calc_executor = CalcExecutor(workers=0)
+    main.l1_cache = LocalCache(maxsize=0)
+    numbers = list(range(args.numbers))
+    modes = {
+        f'GET x{args.numbers}': lambda client: singles(
+            client, numbers, args.concurrency
+        ),
+        f'batch по {args.batch_size}': lambda client: batches(
+            client, numbers, args.batch_size
+        ),
+    }
+
+    print(f"{'режим':>14} | {'холодный, чисел/с':>17} | {'тёплый, чисел/с':>15}")
+    print('-' * 54)
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+        for mode, resolve in modes.items():
+            main.redis_client = (
+                redis.Redis.from_url(args.redis_url)
+                if args.redis_url
+                else FakeAsyncRedis()
+            )
+            await main.redis_client.delete(*numbers)
+            throughput = []
+            for _ in ('cold', 'warm'):
+                started = perf_counter()
+                await resolve(client)
+                throughput.append(len(numbers) / (perf_counter() - started))
+            print(f'{mode:>14} | {throughput[0]:>17.0f} | {throughput[1]:>15.0f}')
+            await main.redis_client.aclose()
+
+
+def main_() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--numbers', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--redis-url')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main_()
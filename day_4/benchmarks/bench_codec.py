@@ -0,0 +1,82 @@
+"""
+Бенчмарк формата значений в Redis: десятичная строка против codec.
+
+Для F(n) сравниваются размер значения, время кодирования и
+декодирования в число. С --redis-url дополнительно меряется память,
+которую значение занимает в Redis (MEMORY USAGE).
+
+Запуск:
+    uv run python -m benchmarks.bench_codec
+    uv run python -m benchmarks.bench_codec --redis-url redis://localhost:6379
+"""
+
+import argparse
+import sys
+import zlib
+from time import perf_counter_ns
+
+import redis
+
+from codec import decode, encode
+from fibonacci import _fast_doubling
+
+
+def best_of(func, repeat: int) -> float:
+    """Лучшее время (мкс) из repeat запусков func()."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = perf_counter_ns()
+        func()
+        best = min(best, perf_counter_ns() - start)
+    return best / 1000
+
+
+def memory_usage(client: redis.Redis, value: bytes) -> int:
+    client.set('bench:codec', value)
+    try:
+        return client.memory_usage('bench:codec', samples=0)
+    finally:
+        client.delete('bench:codec')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--n', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--redis-url')
+    args = parser.parse_args()
+
+    # Бенчмарк выходит за FIB_MAX_N, поэтому снимаем лимит длины строки
+    sys.set_int_max_str_digits(0)
+    client = redis.Redis.from_url(args.redis_url) if args.redis_url else None
+
+    print(
+        f"{'n':>9} | {'формат':>7} | {'байт':>7} | {'zlib':>7} | "
+        f"{'encode, мкс':>11} | {'decode, мкс':>11}"
+        + (f" | {'Redis, байт':>11}" if client else '')
+    )
+    print('-' * (72 + (14 if client else 0)))
+    for n in args.n:
+        value = _fast_doubling(n)
+        formats = {
+            'str': (lambda: str(value).encode(), lambda data: int(data)),
+            'codec': (lambda: encode(value), decode),
+        }
+        for name, (encoder, decoder) in formats.items():
+            data = encoder()
+            assert decoder(data) == value
+            row = (
+                f'{n:>9} | {name:>7} | {len(data):>7} | '
+                f'{len(zlib.compress(data)):>7} | '
+                f'{best_of(encoder, args.repeat):>11.1f} | '
+                f'{best_of(lambda: decoder(data), args.repeat):>11.1f}'
+            )
+            if client:
+                row += f' | {memory_usage(client, data):>11}'
+            print(row)
+
+
+if __name__ == '__main__':
+    main()
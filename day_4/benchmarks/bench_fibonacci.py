@@ -0,0 +1,74 @@
+"""
+Бенчмарк вычисления F(n): латентность для n от 10 до 10**6.
+
+Для каждого n меряется счёт (таблица для n <= FIB_MEMO_SIZE, дальше
+fast doubling) и перевод результата в строку для ответа — на больших n
+он стоит сравнимо со счётом. Для маленьких n для сравнения приведена
+прежняя двойная рекурсия.
+
+Запуск:
+    uv run python -m benchmarks.bench_fibonacci
+"""
+
+import argparse
+import sys
+from time import perf_counter_ns
+
+from fibonacci import MAX_N, _fast_doubling, fibonacci
+
+# Прежняя реализация /calc; дальше 30 она считает секундами
+NAIVE_MAX_N = 30
+
+
+def naive(n: int) -> int:
+    if n <= 1:
+        return n
+    return naive(n - 1) + naive(n - 2)
+
+
+def best_of(func, n: int, repeat: int) -> float:
+    """Лучшее время (мкс) из repeat запусков func(n)."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = perf_counter_ns()
+        func(n)
+        best = min(best, perf_counter_ns() - start)
+    return best / 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--n',
+        type=int,
+        nargs='+',
+        default=[10, 30, 100, 1_000, 10_000, 100_000, 1_000_000],
+    )
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    # Бенчмарк выходит за FIB_MAX_N, поэтому снимаем лимит длины строки
+    sys.set_int_max_str_digits(0)
+
+    print(
+        f"{'n':>9} | {'цифр':>7} | {'счёт, мкс':>11} | {'str, мкс':>11} | "
+        f"{'рекурсия, мкс':>13}"
+    )
+    print('-' * 64)
+    for n in args.n:
+        compute = fibonacci if n <= MAX_N else _fast_doubling
+        value = compute(n)
+        digits = len(str(value))
+        compute_us = best_of(compute, n, args.repeat)
+        str_us = best_of(lambda _: str(value), n, args.repeat)
+        naive_us = '—'
+        if n <= NAIVE_MAX_N:
+            naive_us = f'{best_of(naive, n, 1):.0f}'
+        print(
+            f'{n:>9} | {digits:>7} | {compute_us:>11.1f} | {str_us:>11.1f} | '
+            f'{naive_us:>13}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Бенчмарк L1-кэша: латентность /calc для горячих ключей с L1 и без него.
+
+Клиенты запрашивают небольшой набор горячих чисел; без L1 каждый запрос
+идёт в Redis, с L1 — только первый. По умолчанию Redis заменён fakeredis
+(без сети, поэтому выигрыш занижен); с --redis-url бенчмарк ходит в
+настоящий Redis, например из docker compose.
+
+Запуск:
+    uv run python -m benchmarks.bench_l1_cache
+    uv run python -m benchmarks.bench_l1_cache --redis-url redis://localhost:6379
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+from time import perf_counter_ns
+
+import httpx
+import redis.asyncio as redis
+from fakeredis import FakeAsyncRedis
+
+import main
+from executor import CalcExecutor
+from l1_cache import CacheStats, LocalCache
+
+
+async def measure(requests: int, hot_keys: list[int], l1: LocalCache) -> list[float]:
+    """Латентности (мкс) запросов /calc к горячим ключам."""
+    main.l1_cache = l1
+    main.cache_stats = CacheStats()
+    rng = random.Random(42)
+    latencies = []
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+        for number in hot_keys:
+            await client.get(f'/calc/{number}')
+        for _ in range(requests):
+            number = rng.choice(hot_keys)
+            start = perf_counter_ns()
+            await client.get(f'/calc/{number}')
+            latencies.append((perf_counter_ns() - start) / 1000)
+    return latencies
+
+
+async def run(args: argparse.Namespace) -> None:
+    main.redis_client = (
+        redis.Redis.from_url(args.redis_url) if args.redis_url else FakeAsyncRedis()
+    )
+    main.app.state.calc_executor = CalcExecutor(workers=0)
+    hot_keys = list(range(args.n, args.n + args.hot_keys))
+
+    print(f"{'режим':>8} | {'p50, мкс':>9} | {'p99, мкс':>9} | {'L1 hit ratio':>12}")
+    print('-' * 48)
+    for mode, l1 in (('без L1', LocalCache(maxsize=0)), ('с L1', LocalCache())):
+        latencies = await measure(args.requests, hot_keys, l1)
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(
+            f'{mode:>8} | {quantiles[49]:>9.0f} | {quantiles[98]:>9.0f} | '
+            f'{main.cache_stats.l1_hit_ratio:>12.2f}'
+        )
+    await main.redis_client.aclose()
+
+
+def main_() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=5_000)
+    parser.add_argument('--hot-keys', type=int, default=20)
+    parser.add_argument('--n', type=int, default=10_000, help='первое горячее число')
+    parser.add_argument('--redis-url')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main_()
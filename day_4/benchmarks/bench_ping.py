@@ -0,0 +1,91 @@
+"""
+Бенчмарк отзывчивости: латентность /ping, пока /calc загружен счётом.
+
+Несколько клиентов без пауз запрашивают /calc с большими n (каждый раз
+новое n, чтобы не попадать в кэш), а отдельный клиент раз в PING_INTERVAL
+дёргает /ping. Сравниваются счёт прямо в event loop (CALC_WORKERS=0,
+как раньше) и пул процессов. Redis заменён fakeredis, запросы идут
+через ASGI-транспорт в том же event loop, что и приложение.
+
+Запуск:
+    uv run python -m benchmarks.bench_ping
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import statistics
+from collections import Counter
+from time import perf_counter
+
+import httpx
+from fakeredis import FakeAsyncRedis
+
+import main
+from executor import CalcExecutor
+
+PING_INTERVAL = 0.01  # секунд
+
+
+async def measure(duration: float, clients: int, n: int) -> tuple[list[float], Counter]:
+    """Латентности /ping (мс) и коды ответов /calc за duration секунд."""
+    numbers = itertools.count(n, -1)
+    ping_latencies: list[float] = []
+    statuses: Counter = Counter()
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+        deadline = perf_counter() + duration
+
+        async def calc_client() -> None:
+            while perf_counter() < deadline:
+                response = await client.get(f'/calc/{next(numbers)}')
+                statuses[response.status_code] += 1
+                if response.status_code == 429:
+                    await asyncio.sleep(0.01)
+
+        async def ping_client() -> None:
+            # Латентность считаем от запланированного момента отправки:
+            # если event loop занят, /ping опаздывает ещё до отправки
+            scheduled = perf_counter()
+            while scheduled < deadline:
+                await asyncio.sleep(max(scheduled - perf_counter(), 0))
+                await client.get('/ping')
+                ping_latencies.append((perf_counter() - scheduled) * 1000)
+                scheduled = max(scheduled + PING_INTERVAL, perf_counter())
+
+        await asyncio.gather(ping_client(), *(calc_client() for _ in range(clients)))
+    return ping_latencies, statuses
+
+
+def percentile(values: list[float], q: int) -> float:
+    return statistics.quantiles(values, n=100)[q - 1]
+
+
+def main_() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--duration', type=float, default=10.0, help='секунд')
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--n', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(
+        f"{'режим':>14} | {'ping p50, мс':>12} | {'ping p99, мс':>12} | "
+        f"{'calc/с':>6} | {'429':>5}"
+    )
+    print('-' * 62)
+    for mode, workers in (('event loop', 0), (f'пул x{args.workers}', args.workers)):
+        main.redis_client = FakeAsyncRedis()
+        main.app.state.calc_executor = CalcExecutor(workers=workers)
+        pings, statuses = asyncio.run(measure(args.duration, args.clients, args.n))
+        main.app.state.calc_executor.shutdown()
+        print(
+            f'{mode:>14} | {percentile(pings, 50):>12.1f} | '
+            f'{percentile(pings, 99):>12.1f} | '
+            f'{statuses[200] / args.duration:>6.0f} | {statuses[429]:>5}'
+        )
+
+
+if __name__ == '__main__':
+    main_()
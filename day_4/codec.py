@@ -0,0 +1,62 @@
+import math
+import os
+import sys
+import zlib
+
+# Наибольший n, для которого в кэше может лежать F(n)
+FIB_MAX_N = int(os.getenv('FIB_MAX_N', '100000'))
+
+# Python по умолчанию не переводит в строку числа длиннее 4300 цифр.
+# n ограничен FIB_MAX_N, поэтому поднимаем лимит ровно до длины F(FIB_MAX_N).
+# Лимит поднимается здесь, а не в fibonacci: to_decimal выполняется и в
+# процессах пула, которые при spawn/forkserver импортируют только codec
+_MAX_DIGITS = int(FIB_MAX_N * math.log10((1 + math.sqrt(5)) / 2)) + 1
+if 0 < sys.get_int_max_str_digits() < _MAX_DIGITS:
+    sys.set_int_max_str_digits(_MAX_DIGITS)
+
+# Сжимать значения длиннее этого числа байт; 0 — не сжимать.
+# Двоичное представление чисел Фибоначчи zlib почти не сжимает, поэтому
+# по умолчанию сжатие выключено
+CODEC_COMPRESS_MIN_BYTES = int(os.getenv('CODEC_COMPRESS_MIN_BYTES', '0'))
+
+# Формат: [версия][флаги][число в little-endian, возможно сжатое zlib]
+FORMAT_VERSION = 1
+FLAG_ZLIB = 0x01
+
+
+class UnsupportedFormat(ValueError):
+    """Значение в кэше записано в незнакомом формате."""
+
+
+def encode(value: int, compress_min_bytes: int = CODEC_COMPRESS_MIN_BYTES) -> bytes:
+    """Неотрицательное целое в компактный двоичный формат для Redis."""
+    payload = value.to_bytes(max((value.bit_length() + 7) // 8, 1), 'little')
+    flags = 0
+    if 0 < compress_min_bytes <= len(payload):
+        compressed = zlib.compress(payload)
+        if len(compressed) < len(payload):
+            payload, flags = compressed, FLAG_ZLIB
+    return bytes((FORMAT_VERSION, flags)) + payload
+
+
+def decode(data: bytes) -> int:
+    """
+    Обратное к encode.
+
+    Значения, записанные до появления формата, — десятичные строки:
+    они состоят из одних цифр, а первый байт формата — номер версии.
+    Незнакомый формат — UnsupportedFormat.
+    """
+    if data.isdigit():
+        return int(data)
+    if len(data) < 3 or data[0] != FORMAT_VERSION:
+        raise UnsupportedFormat(f'Unsupported cached value format: {data[:2]!r}')
+    payload = data[2:]
+    if data[1] & FLAG_ZLIB:
+        payload = zlib.decompress(payload)
+    return int.from_bytes(payload, 'little')
+
+
+def to_decimal(data: bytes) -> str:
+    """Значение из Redis десятичной строкой для ответа."""
+    return str(decode(data))
@@ -0,0 +1,67 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+
+# Процессов для вычислений; 0 — считать прямо в event loop (тесты, сравнение)
+CALC_WORKERS = int(os.getenv('CALC_WORKERS', str(os.cpu_count() or 1)))
+# Сколько задач может ждать свободного процесса; дальше — 429
+CALC_QUEUE_SIZE = int(os.getenv('CALC_QUEUE_SIZE', str(2 * max(CALC_WORKERS, 1))))
+# Сколько секунд запрос ждёт результата; дальше — 504
+CALC_TIMEOUT = float(os.getenv('CALC_TIMEOUT', '5'))
+
+
+class ExecutorSaturated(Exception):
+    """Все процессы заняты и очередь заполнена."""
+
+
+class CalcExecutor:
+    """
+    Пул процессов для CPU-задач с ограниченной очередью.
+
+    Пока процесс считает, event loop свободен и обслуживает остальные
+    запросы. Задач в работе и в очереди не больше workers + queue_size:
+    лишние сразу получают ExecutorSaturated, а не копятся в памяти.
+    По таймауту задача из очереди отменяется; уже запущенную процесс
+    дорабатывает (прервать её можно только убив процесс), и до конца
+    счёта она продолжает занимать место в очереди.
+    """
+
+    def __init__(
+        self,
+        workers: int = CALC_WORKERS,
+        queue_size: int = CALC_QUEUE_SIZE,
+        timeout: float = CALC_TIMEOUT,
+    ):
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.timeout = timeout
+        self._pool = ProcessPoolExecutor(workers) if workers else None
+        self.pending = 0
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """func(*args) в пуле; ExecutorSaturated или TimeoutError при перегрузке."""
+        if self._pool is None:
+            return func(*args)
+        if self.pending >= self.capacity:
+            raise ExecutorSaturated
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        future = self._pool.submit(func, *args)
+        future.add_done_callback(lambda _: self._release(loop))
+        # wait_for при таймауте отменяет обёртку, а она — задачу в пуле
+        return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+
+    def _release(self, loop: asyncio.AbstractEventLoop) -> None:
+        # Вызывается из служебного потока пула
+        try:
+            loop.call_soon_threadsafe(self._decrement)
+        except RuntimeError:
+            pass  # event loop уже закрыт
+
+    def _decrement(self) -> None:
+        self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
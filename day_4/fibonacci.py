@@ -0,0 +1,54 @@
+import os
+
+from codec import FIB_MAX_N, encode
+
+# Верхняя граница n: ограничивает CPU и память на один запрос
+# (F(10**6) — это ~209 тысяч цифр и ~0.1 с счёта)
+MAX_N = FIB_MAX_N
+# До этого n ответы берутся из таблицы, посчитанной при импорте
+MEMO_SIZE = int(os.getenv('FIB_MEMO_SIZE', '1000'))
+
+
+def _fast_doubling(n: int) -> int:
+    """
+    F(n) за O(log n) умножений без рекурсии.
+
+    Идём по битам n от старшего, поддерживая пару (F(k), F(k+1)):
+    F(2k) = F(k) * (2F(k+1) - F(k)), F(2k+1) = F(k)^2 + F(k+1)^2.
+    """
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        c = a * (2 * b - a)
+        d = a * a + b * b
+        a, b = (d, c + d) if bit == '1' else (c, d)
+    return a
+
+
+def _build_memo(size: int) -> list[int]:
+    memo = [0, 1]
+    while len(memo) <= size:
+        memo.append(memo[-1] + memo[-2])
+    return memo[: size + 1]
+
+
+_MEMO = _build_memo(MEMO_SIZE)
+
+
+def fibonacci(n: int) -> int:
+    """n-е число Фибоначчи, 0 <= n <= MAX_N."""
+    if not 0 <= n <= MAX_N:
+        raise ValueError(f'n must be between 0 and {MAX_N}')
+    if n < len(_MEMO):
+        return _MEMO[n]
+    return _fast_doubling(n)
+
+
+def fibonacci_result(n: int) -> tuple[str, bytes]:
+    """
+    F(n) десятичной строкой для ответа и в формате codec для Redis.
+
+    На больших n перевод в строку стоит не меньше самого счёта, поэтому
+    в пуле процессов выполняется и он.
+    """
+    value = fibonacci(n)
+    return str(value), encode(value)
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Hashable, Optional
+
+import redis.asyncio as redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+# Сколько результатов держать в памяти процесса; 0 — не кэшировать
+L1_CACHE_SIZE = int(os.getenv('L1_CACHE_SIZE', '1024'))
+# Суммарный размер значений: результаты для больших n весят сотни КБ
+L1_CACHE_MAX_BYTES = int(os.getenv('L1_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+# Страховка, если сообщение об инвалидации потерялось
+L1_CACHE_TTL = float(os.getenv('L1_CACHE_TTL', '60'))  # секунд
+# Канал, в который реплики публикуют ключи, изменённые в Redis
+INVALIDATION_CHANNEL = 'calc:invalidate'
+# Пауза перед переподключением к каналу после ошибки Redis
+RESUBSCRIBE_DELAY = 1.0  # секунд
+# Сколько ждать сообщения за один опрос канала. Пустой опрос — норма:
+# listen() читал бы с socket_timeout пула и падал бы в каждую паузу
+INVALIDATION_POLL_TIMEOUT = 5.0  # секунд
+
+
+@dataclass
+class CacheStats:
+    """Счётчики двухуровневого кэша: L1 в памяти, L2 — Redis."""
+
+    l1_hits: int = 0
+    l2_hits: int = 0
+    misses: int = 0
+
+    @property
+    def l1_hit_ratio(self) -> float:
+        total = self.l1_hits + self.l2_hits + self.misses
+        return self.l1_hits / total if total else 0.0
+
+    @property
+    def l2_hit_ratio(self) -> float:
+        """Доля попаданий среди запросов, дошедших до Redis."""
+        total = self.l2_hits + self.misses
+        return self.l2_hits / total if total else 0.0
+
+
+class LocalCache:
+    """LRU-кэш в памяти процесса с ограничением по числу, байтам и времени."""
+
+    def __init__(
+        self,
+        maxsize: int = L1_CACHE_SIZE,
+        max_bytes: int = L1_CACHE_MAX_BYTES,
+        ttl: float = L1_CACHE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        # Ключ -> (значение, момент истечения)
+        self._data: OrderedDict[Hashable, tuple[bytes | str, float]] = OrderedDict()
+        self.size_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[bytes | str]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at <= self._clock():
+            self.delete(key)
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: bytes | str) -> None:
+        if len(value) > self.max_bytes or self.maxsize <= 0:
+            return
+        self.delete(key)
+        self._data[key] = (value, self._clock() + self.ttl)
+        self.size_bytes += len(value)
+        while len(self._data) > self.maxsize or self.size_bytes > self.max_bytes:
+            _, (evicted, _) = self._data.popitem(last=False)
+            self.size_bytes -= len(evicted)
+
+    def delete(self, key: Hashable) -> None:
+        item = self._data.pop(key, None)
+        if item is not None:
+            self.size_bytes -= len(item[0])
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.size_bytes = 0
+
+
+async def publish_invalidation(client: redis.Redis, key: Hashable) -> None:
+    """Сообщить остальным репликам, что значение ключа в Redis изменилось."""
+    await client.publish(INVALIDATION_CHANNEL, str(key))
+
+
+async def listen_invalidations(
+    client: redis.Redis, cache: LocalCache, key_type: Callable[[str], Hashable] = int
+) -> None:
+    """
+    Удалять из L1 ключи, изменённые другими репликами.
+
+    Pub/sub не гарантирует доставку: после разрыва соединения часть
+    сообщений могла потеряться, поэтому при переподключении L1 очищается.
+    Тишина в канале разрывом не считается.
+    """
+    while True:
+        try:
+            async with client.pubsub() as pubsub:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                cache.clear()
+                while True:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True,
+                        timeout=INVALIDATION_POLL_TIMEOUT,
+                    )
+                    if message is not None and message['type'] == 'message':
+                        cache.delete(key_type(message['data'].decode()))
+        except RedisError:
+            logger.warning('L1 invalidation channel lost, resubscribing', exc_info=True)
+            await asyncio.sleep(RESUBSCRIBE_DELAY)
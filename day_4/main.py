@@ -1,31 +1,249 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from time import perf_counter_ns
 
-from fastapi import FastAPI
+from typing import Annotated
+
+from fastapi import FastAPI, HTTPException, Path
+from pydantic import BaseModel, Field
 import redis.asyncio as redis
 
+from codec import UnsupportedFormat, to_decimal
+from executor import CALC_TIMEOUT, CalcExecutor, ExecutorSaturated
+from fibonacci import MAX_N, MEMO_SIZE, fibonacci_result
+from l1_cache import (
+    INVALIDATION_CHANNEL,
+    CacheStats,
+    LocalCache,
+    listen_invalidations,
+    publish_invalidation,
+)
+from redis_pool import CALC_CACHE_TTL, create_redis_client
+from single_flight import (
+    CALC_LOCK_ENABLED,
+    CALC_LOCK_POLL,
+    SingleFlight,
+    acquire_lock,
+    release_lock,
+)
+
+logger = logging.getLogger(__name__)
+
+# Значения из Redis длиннее этого декодируем в пуле процессов:
+# перевод большого числа в десятичную строку заметно блокирует event loop
+DECODE_INLINE_BYTES = 1024
+# Сколько чисел можно запросить одним POST /calc/batch
+CALC_BATCH_MAX = 1000
+
+# Создаётся в lifespan; пул процессов — там же, в app.state.calc_executor
+redis_client: redis.Redis | None = None
+calc_flights = SingleFlight()
+l1_cache = LocalCache()
+cache_stats = CacheStats()
+
 
-app = FastAPI()
-redis_client = redis.Redis(host='redis')
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global redis_client
+
+    redis_client = create_redis_client()
+    # Пул создаётся на каждый запуск lifespan: после shutdown он уже не работает
+    app.state.calc_executor = CalcExecutor()
+    invalidations = asyncio.create_task(listen_invalidations(redis_client, l1_cache))
+    yield
+    invalidations.cancel()
+    app.state.calc_executor.shutdown()
+    await redis_client.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 @app.get('/ping')
 async def read_root():
     return {'response': 'pong'}
 
 
-def long_time_func(number: int):
-    if number <= 1:
-        return number
-    return long_time_func(number - 1) + long_time_func(number - 2)
+async def run_in_pool(func, *args):
+    """func(*args) в пуле процессов: переполнение — 429, таймаут — 504."""
+    try:
+        return await app.state.calc_executor.run(func, *args)
+    except ExecutorSaturated:
+        raise HTTPException(
+            status_code=429,
+            detail='Too many calculations in progress',
+            headers={'Retry-After': '1'},
+        )
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail='Calculation timed out')
+
+
+async def compute(number: int) -> tuple[str, bytes]:
+    """
+    F(number) строкой для ответа (в JSON большие числа теряют точность
+    у клиентов) и в двоичном формате для Redis.
+
+    Маленькие n — из таблицы сразу, остальные — в пуле процессов.
+    """
+    if number <= MEMO_SIZE:
+        return fibonacci_result(number)
+    return await run_in_pool(fibonacci_result, number)
+
+
+async def load_cached(data: bytes | None) -> str | None:
+    """Значение из Redis строкой; None — если его нет или формат незнаком."""
+    if not data:
+        return None
+    try:
+        if len(data) <= DECODE_INLINE_BYTES:
+            return to_decimal(data)
+        return await run_in_pool(to_decimal, data)
+    except UnsupportedFormat:
+        # Например, значение записала более новая версия сервиса
+        logger.warning('Cannot decode cached value', exc_info=True)
+        return None
+
+
+async def store(number: int, encoded: bytes) -> None:
+    """Записать результат в Redis и сбросить его в L1 других реплик."""
+    await redis_client.set(number, encoded, ex=CALC_CACHE_TTL)
+    await publish_invalidation(redis_client, number)
+
+
+async def compute_and_store(number: int) -> str:
+    """
+    Посчитать F(number) и положить в Redis.
+
+    С CALC_LOCK_ENABLED число считает только реплика, взявшая блокировку
+    в Redis; остальные ждут, пока результат появится в кэше.
+    """
+    if not CALC_LOCK_ENABLED:
+        result, encoded = await compute(number)
+        await store(number, encoded)
+        return result
+
+    lock_key = f'lock:calc:{number}'
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + CALC_TIMEOUT
+    while True:
+        token = await acquire_lock(redis_client, lock_key)
+        if token is not None:
+            try:
+                # Пока ждали блокировку, другая реплика могла уже посчитать
+                cached = await redis_client.get(number)
+                result = await load_cached(cached)
+                if result is None:
+                    result, encoded = await compute(number)
+                    await store(number, encoded)
+                return result
+            finally:
+                await release_lock(redis_client, lock_key, token)
+
+        if loop.time() >= deadline:
+            raise HTTPException(status_code=504, detail='Calculation timed out')
+        await asyncio.sleep(CALC_LOCK_POLL)
+        cached = await redis_client.get(number)
+        result = await load_cached(cached)
+        if result is not None:
+            return result
 
 
 @app.get('/calc/{number}')
-async def calc(number: int):
+async def calc(number: int = Path(ge=0, le=MAX_N)):
     start_time = perf_counter_ns()
-    result = await redis_client.get(number)
-    if not result:
-        result = long_time_func(number)
-        await redis_client.set(number, result)
+    result = l1_cache.get(number)
+    if result is not None:
+        cache_stats.l1_hits += 1
+    else:
+        cached = await redis_client.get(number)
+        result = await load_cached(cached)
+        if result is not None:
+            cache_stats.l2_hits += 1
+        else:
+            cache_stats.misses += 1
+            # Одновременные промахи по одному числу ждут одно вычисление
+            result = await calc_flights.do(number, lambda: compute_and_store(number))
+        l1_cache.set(number, result)
     return {
         'result': result,
         'time': (perf_counter_ns() - start_time) / 10**9,
     }
+
+
+class CalcBatchRequest(BaseModel):
+    numbers: list[Annotated[int, Field(ge=0, le=MAX_N)]] = Field(
+        min_length=1, max_length=CALC_BATCH_MAX
+    )
+
+
+@app.post('/calc/batch')
+async def calc_batch(request: CalcBatchRequest):
+    """
+    F(n) для списка чисел за два обращения к Redis: один MGET на все
+    промахи L1 и один конвейер SET EX на все посчитанные значения.
+    """
+    start_time = perf_counter_ns()
+    numbers = list(dict.fromkeys(request.numbers))
+    results: dict[int, str] = {}
+    for number in numbers:
+        result = l1_cache.get(number)
+        if result is not None:
+            cache_stats.l1_hits += 1
+            results[number] = result
+
+    # Задач в пуле от одного пакета не больше, чем процессов, иначе
+    # большой пакет сам переполнит очередь и получит 429
+    pool_slots = asyncio.Semaphore(max(app.state.calc_executor.workers, 1))
+
+    async def in_pool_slot(coro):
+        async with pool_slots:
+            return await coro
+
+    missing = [number for number in numbers if number not in results]
+    if missing:
+        cached = await redis_client.mget(missing)
+        loaded = await asyncio.gather(
+            *(in_pool_slot(load_cached(data)) for data in cached)
+        )
+        to_compute = []
+        for number, result in zip(missing, loaded):
+            if result is not None:
+                cache_stats.l2_hits += 1
+                results[number] = result
+            else:
+                cache_stats.misses += 1
+                to_compute.append(number)
+
+        computed = await asyncio.gather(
+            *(in_pool_slot(compute(number)) for number in to_compute)
+        )
+        if computed:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for number, (_, encoded) in zip(to_compute, computed):
+                    pipe.set(number, encoded, ex=CALC_CACHE_TTL)
+                    pipe.publish(INVALIDATION_CHANNEL, str(number))
+                await pipe.execute()
+        for number, (result, _) in zip(to_compute, computed):
+            results[number] = result
+        for number in missing:
+            l1_cache.set(number, results[number])
+
+    return {
+        'results': [
+            {'number': number, 'result': results[number]} for number in request.numbers
+        ],
+        'time': (perf_counter_ns() - start_time) / 10**9,
+    }
+
+
+@app.get('/cache/stats')
+async def get_cache_stats():
+    return {
+        'l1_hits': cache_stats.l1_hits,
+        'l2_hits': cache_stats.l2_hits,
+        'misses': cache_stats.misses,
+        'l1_hit_ratio': cache_stats.l1_hit_ratio,
+        'l2_hit_ratio': cache_stats.l2_hit_ratio,
+        'l1_size': len(l1_cache),
+        'l1_bytes': l1_cache.size_bytes,
+    }
@@ -0,0 +1,33 @@
+import os
+
+import redis.asyncio as redis
+
+REDIS_URL = os.getenv('REDIS_URL', 'redis://redis:6379/0')
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', '50'))
+# Сколько ждать свободного соединения, если все заняты
+REDIS_POOL_TIMEOUT = float(os.getenv('REDIS_POOL_TIMEOUT', '1'))  # секунд
+REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', '1'))  # секунд
+REDIS_CONNECT_TIMEOUT = float(os.getenv('REDIS_CONNECT_TIMEOUT', '1'))  # секунд
+# Соединение, простоявшее дольше, перед использованием проверяется PING
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv('REDIS_HEALTH_CHECK_INTERVAL', '30'))
+# Время жизни результатов в Redis, чтобы память была ограничена
+CALC_CACHE_TTL = int(os.getenv('CALC_CACHE_TTL', str(24 * 3600)))  # секунд
+
+
+def create_redis_client() -> redis.Redis:
+    """
+    Клиент Redis с общим пулом соединений.
+
+    Пул блокирующий: когда все REDIS_MAX_CONNECTIONS заняты, запрос ждёт
+    освободившееся соединение до REDIS_POOL_TIMEOUT, а не открывает новое.
+    """
+    pool = redis.BlockingConnectionPool.from_url(
+        REDIS_URL,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+        health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+    )
+    # from_pool: клиент владеет пулом и закрывает его в aclose()
+    return redis.Redis.from_pool(pool)
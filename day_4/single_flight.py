@@ -0,0 +1,68 @@
+import asyncio
+import os
+import uuid
+from typing import Awaitable, Callable, Hashable, Optional, TypeVar
+
+import redis.asyncio as redis
+from redis.exceptions import WatchError
+
+from executor import CALC_TIMEOUT
+
+# Блокировка в Redis, чтобы одно число считала одна реплика, а не все
+CALC_LOCK_ENABLED = os.getenv('CALC_LOCK_ENABLED', 'false').lower() == 'true'
+# Блокировка живёт дольше счёта, чтобы не истечь у живого владельца
+CALC_LOCK_TTL = float(os.getenv('CALC_LOCK_TTL', str(CALC_TIMEOUT + 5)))  # секунд
+# Как часто реплика без блокировки проверяет, не появился ли результат
+CALC_LOCK_POLL = float(os.getenv('CALC_LOCK_POLL', '0.05'))  # секунд
+
+T = TypeVar('T')
+
+
+class SingleFlight:
+    """
+    Схлопывание одинаковых запросов внутри процесса.
+
+    Первый вызов do(key, ...) запускает задачу, остальные с тем же ключом
+    ждут её результат. Отмена одного ожидающего (клиент ушёл) не отменяет
+    общую задачу.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(func())
+            task.add_done_callback(lambda _: self._forget(key, task))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Помечаем исключение полученным, даже если все ожидающие ушли
+            task.exception()
+
+
+async def acquire_lock(
+    client: redis.Redis, key: str, ttl: float = CALC_LOCK_TTL
+) -> Optional[str]:
+    """SET NX PX: токен владельца, если блокировка взята, иначе None."""
+    token = uuid.uuid4().hex
+    if await client.set(key, token, nx=True, px=int(ttl * 1000)):
+        return token
+    return None
+
+
+async def release_lock(client: redis.Redis, key: str, token: str) -> None:
+    """Снять блокировку, только если она всё ещё наша (не истекла и не перехвачена)."""
+    async with client.pipeline() as pipe:
+        try:
+            await pipe.watch(key)
+            if await pipe.get(key) == token.encode():
+                pipe.multi()
+                pipe.delete(key)
+                await pipe.execute()
+        except WatchError:
+            pass  # блокировку успели перехватить — она уже не наша
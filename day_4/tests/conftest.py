@@ -0,0 +1,44 @@
+import httpx
+import pytest
+from fakeredis import FakeAsyncRedis
+
+import main
+from executor import CalcExecutor
+from l1_cache import CacheStats, LocalCache
+from single_flight import SingleFlight
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    """Redis в памяти вместо настоящего и пустой L1."""
+    client = FakeAsyncRedis()
+    monkeypatch.setattr(main, 'redis_client', client)
+    monkeypatch.setattr(main, 'l1_cache', LocalCache())
+    monkeypatch.setattr(main, 'cache_stats', CacheStats())
+    return client
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Счётчик вычислений: считаем прямо в процессе теста, без пула."""
+    counter = {'n': 0}
+    fibonacci_result = main.fibonacci_result
+
+    def counting(n: int) -> tuple[str, bytes]:
+        counter['n'] += 1
+        return fibonacci_result(n)
+
+    monkeypatch.setattr(main, 'fibonacci_result', counting)
+    monkeypatch.setattr(
+        main.app.state, 'calc_executor', CalcExecutor(workers=0), raising=False
+    )
+    monkeypatch.setattr(main, 'calc_flights', SingleFlight())
+    return counter
+
+
+@pytest.fixture
+async def async_client(redis_client):
+    """Асинхронный клиент для тестирования."""
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+        yield client
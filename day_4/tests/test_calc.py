@@ -0,0 +1,241 @@
+import asyncio
+import time
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+import main
+from codec import encode
+from executor import CalcExecutor
+from fibonacci import fibonacci, fibonacci_result
+from single_flight import SingleFlight, acquire_lock, release_lock
+
+F_5000 = str(fibonacci(5000))
+SLOW_CALC_SECONDS = 0.5
+
+
+def slow_fibonacci_result(n: int) -> tuple[str, bytes]:
+    # На уровне модуля: функцию для пула процессов нужно передать через pickle
+    time.sleep(SLOW_CALC_SECONDS)
+    return fibonacci_result(n)
+
+
+# ===== /calc/{number} =====
+
+
+async def test_calc_returns_fibonacci(async_client, calls):
+    response = await async_client.get('/calc/10')
+
+    assert response.status_code == 200
+    assert response.json()['result'] == '55'
+
+
+@pytest.mark.parametrize('number', [-1, main.MAX_N + 1])
+async def test_calc_rejects_out_of_range(async_client, number):
+    response = await async_client.get(f'/calc/{number}')
+
+    assert response.status_code == 422
+
+
+async def test_calc_uses_cached_result(async_client, redis_client, calls):
+    await async_client.get('/calc/5000')
+    response = await async_client.get('/calc/5000')
+
+    assert response.json()['result'] == F_5000
+    assert calls['n'] == 1
+
+
+async def test_concurrent_identical_requests_compute_once(
+    async_client, redis_client, calls
+):
+    """100 одновременных промахов по одному числу — одно вычисление."""
+    responses = await asyncio.gather(
+        *(async_client.get('/calc/5000') for _ in range(100))
+    )
+
+    assert calls['n'] == 1
+    assert {r.json()['result'] for r in responses} == {F_5000}
+    assert await redis_client.get(5000) == encode(fibonacci(5000))
+
+
+# ===== Блокировка в Redis между репликами =====
+
+
+async def test_replicas_compute_once_with_redis_lock(redis_client, calls, monkeypatch):
+    """Две реплики с общим Redis: 50 + 50 запросов — одно вычисление."""
+    monkeypatch.setattr(main, 'CALC_LOCK_ENABLED', True)
+    replicas = [SingleFlight(), SingleFlight()]
+
+    results = await asyncio.gather(
+        *(
+            flights.do(5000, lambda: main.compute_and_store(5000))
+            for flights in replicas
+            for _ in range(50)
+        )
+    )
+
+    assert calls['n'] == 1
+    assert set(results) == {F_5000}
+    assert await redis_client.get('lock:calc:5000') is None
+
+
+async def test_waits_for_result_of_lock_holder(
+    async_client, redis_client, calls, monkeypatch
+):
+    """Пока блокировку держит другая реплика, запрос ждёт её результат."""
+    monkeypatch.setattr(main, 'CALC_LOCK_ENABLED', True)
+    monkeypatch.setattr(main, 'CALC_LOCK_POLL', 0.01)
+    await acquire_lock(redis_client, 'lock:calc:5000')
+
+    async def other_replica():
+        await asyncio.sleep(0.05)
+        await redis_client.set(5000, encode(42))
+
+    response, _ = await asyncio.gather(async_client.get('/calc/5000'), other_replica())
+
+    assert response.json()['result'] == '42'
+    assert calls['n'] == 0
+
+
+async def test_release_lock_keeps_foreign_lock(redis_client):
+    """Истёкшую и перехваченную блокировку чужой токен не снимает."""
+    await redis_client.set('lock:calc:1', 'other-owner')
+
+    await release_lock(redis_client, 'lock:calc:1', 'stale-token')
+
+    assert await redis_client.get('lock:calc:1') == b'other-owner'
+
+
+async def test_calc_reads_legacy_decimal_values(async_client, redis_client, calls):
+    """Значения, записанные строкой до появления codec, читаются как раньше."""
+    await redis_client.set(5000, F_5000)
+
+    response = await async_client.get('/calc/5000')
+
+    assert response.json()['result'] == F_5000
+    assert calls['n'] == 0
+
+
+async def test_calc_recomputes_unknown_format(async_client, redis_client, calls):
+    await redis_client.set(5000, b'\x09\x00garbage')
+
+    response = await async_client.get('/calc/5000')
+
+    assert response.json()['result'] == F_5000
+    assert calls['n'] == 1
+    assert await redis_client.get(5000) == encode(fibonacci(5000))
+
+
+async def test_calc_stores_result_with_ttl(async_client, redis_client, calls):
+    await async_client.get('/calc/5000')
+
+    assert 0 < await redis_client.ttl(5000) <= main.CALC_CACHE_TTL
+
+
+# ===== POST /calc/batch =====
+
+
+async def test_calc_batch_mixes_cache_tiers(async_client, redis_client, calls):
+    await async_client.get('/calc/5000')  # теперь в L1
+    await redis_client.set(6000, encode(fibonacci(6000)))  # только в Redis
+
+    response = await async_client.post(
+        '/calc/batch', json={'numbers': [7000, 5000, 6000, 7000, 10]}
+    )
+
+    assert response.status_code == 200
+    results = response.json()['results']
+    assert [r['number'] for r in results] == [7000, 5000, 6000, 7000, 10]
+    assert [r['result'] for r in results] == [
+        str(fibonacci(n)) for n in (7000, 5000, 6000, 7000, 10)
+    ]
+    # 5000 при первом запросе, затем 7000 и 10 — дубликаты считаются один раз
+    assert calls['n'] == 3
+    assert await redis_client.get(7000) == encode(fibonacci(7000))
+    assert await redis_client.ttl(7000) > 0
+
+
+async def test_calc_batch_uses_one_mget(async_client, redis_client, calls, monkeypatch):
+    mget_calls = []
+    mget = redis_client.mget
+
+    async def counting_mget(keys):
+        mget_calls.append(list(keys))
+        return await mget(keys)
+
+    monkeypatch.setattr(redis_client, 'mget', counting_mget)
+    monkeypatch.setattr(redis_client, 'get', None)  # поштучные GET недопустимы
+
+    response = await async_client.post('/calc/batch', json={'numbers': [1, 2, 3]})
+
+    assert response.status_code == 200
+    assert mget_calls == [[1, 2, 3]]
+
+
+@pytest.mark.parametrize('numbers', [[], [-1], [main.MAX_N + 1]])
+async def test_calc_batch_validates_numbers(async_client, numbers):
+    response = await async_client.post('/calc/batch', json={'numbers': numbers})
+
+    assert response.status_code == 422
+
+
+# ===== Пул процессов =====
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """Настоящий пул из одного процесса вместо вычислений в event loop."""
+    executors = []
+
+    def install(**options) -> CalcExecutor:
+        executor = CalcExecutor(workers=1, **options)
+        executors.append(executor)
+        monkeypatch.setattr(main.app.state, 'calc_executor', executor, raising=False)
+        monkeypatch.setattr(main, 'fibonacci_result', slow_fibonacci_result)
+        monkeypatch.setattr(main, 'calc_flights', SingleFlight())
+        return executor
+
+    yield install
+    for executor in executors:
+        executor.shutdown()
+
+
+async def test_calc_returns_429_when_pool_is_full(async_client, redis_client, pool):
+    """Процесс занят, очереди нет: второй запрос сразу получает 429."""
+    pool(queue_size=0)
+    number = main.MEMO_SIZE + 1
+
+    responses = await asyncio.gather(
+        async_client.get(f'/calc/{number}'),
+        async_client.get(f'/calc/{number + 1}'),
+    )
+
+    assert sorted(r.status_code for r in responses) == [200, 429]
+    rejected = next(r for r in responses if r.status_code == 429)
+    assert rejected.headers['Retry-After'] == '1'
+
+
+async def test_calc_returns_504_on_timeout(async_client, redis_client, pool):
+    pool(timeout=SLOW_CALC_SECONDS / 10)
+
+    response = await async_client.get(f'/calc/{main.MEMO_SIZE + 1}')
+
+    assert response.status_code == 504
+    assert await redis_client.get(main.MEMO_SIZE + 1) is None
+
+
+async def test_lifespan_creates_fresh_executor(monkeypatch):
+    """Повторный запуск lifespan на том же импорте получает рабочий пул."""
+    monkeypatch.setattr(main, 'redis_client', None)
+    monkeypatch.setattr(main.app.state, 'calc_executor', None, raising=False)
+    monkeypatch.setattr(main, 'create_redis_client', FakeAsyncRedis)
+    monkeypatch.setattr(main, 'CalcExecutor', lambda: CalcExecutor(workers=1))
+    executors = []
+
+    for _ in range(2):
+        async with main.lifespan(main.app):
+            executor = main.app.state.calc_executor
+            executors.append(executor)
+            assert await executor.run(abs, -1) == 1
+
+    assert executors[0] is not executors[1]
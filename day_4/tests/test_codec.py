@@ -0,0 +1,60 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from codec import (
+    FLAG_ZLIB,
+    FORMAT_VERSION,
+    UnsupportedFormat,
+    decode,
+    encode,
+    to_decimal,
+)
+
+
+@pytest.mark.parametrize('value', [0, 1, 255, 256, 2**64, 7**1000])
+def test_roundtrip(value):
+    assert decode(encode(value)) == value
+
+
+def test_binary_is_smaller_than_decimal():
+    value = 7**1000
+
+    assert len(encode(value)) < len(str(value)) / 2
+
+
+def test_compresses_only_when_smaller():
+    compressible = int.from_bytes(b'\x00' * 1000 + b'\x01', 'little')
+    random_like = 7**1000
+
+    compressed = encode(compressible, compress_min_bytes=100)
+    plain = encode(random_like, compress_min_bytes=100)
+
+    assert compressed[:2] == bytes((FORMAT_VERSION, FLAG_ZLIB))
+    assert len(compressed) < 100
+    assert decode(compressed) == compressible
+    assert plain[1] == 0
+
+
+def test_decodes_legacy_decimal_strings():
+    assert to_decimal(b'12586269025') == '12586269025'
+
+
+@pytest.mark.parametrize('data', [b'\x09\x00\x01', b'\x01', b''])
+def test_rejects_unknown_format(data):
+    with pytest.raises(UnsupportedFormat):
+        decode(data)
+
+
+def test_rejects_garbage_as_unsupported_format():
+    with pytest.raises(UnsupportedFormat):
+        decode(b'12abc')
+
+
+def test_to_decimal_in_spawned_process():
+    """Процесс пула, запущенный через spawn, импортирует только codec"""
+    value = 7**20000  # ~17 тысяч цифр, больше лимита Python по умолчанию
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(1, mp_context=context) as pool:
+        assert pool.submit(to_decimal, encode(value)).result() == str(value)
@@ -0,0 +1,191 @@
+import asyncio
+
+import pytest
+
+import l1_cache
+import redis_pool
+from codec import encode
+from l1_cache import LocalCache, listen_invalidations, publish_invalidation
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+# ===== LocalCache =====
+
+
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalCache(maxsize=2)
+    cache.set(1, 'a')
+    cache.set(2, 'b')
+    cache.get(1)
+    cache.set(3, 'c')
+
+    assert cache.get(1) == 'a'
+    assert cache.get(2) is None
+    assert cache.get(3) == 'c'
+
+
+def test_local_cache_limits_total_bytes():
+    cache = LocalCache(maxsize=100, max_bytes=10)
+    cache.set(1, b'x' * 6)
+    cache.set(2, b'y' * 6)
+    cache.set(3, b'z' * 11)
+
+    assert cache.get(1) is None
+    assert cache.get(2) == b'y' * 6
+    assert cache.get(3) is None, 'значение больше лимита не кэшируется'
+    assert cache.size_bytes == 6
+
+
+def test_local_cache_expires_entries():
+    clock = FakeClock()
+    cache = LocalCache(ttl=60, clock=clock)
+    cache.set(1, 'a')
+
+    clock.now = 59
+    assert cache.get(1) == 'a'
+    clock.now = 60
+    assert cache.get(1) is None
+    assert cache.size_bytes == 0
+
+
+# ===== Инвалидация через pub/sub =====
+
+
+async def test_invalidation_evicts_key_on_other_replica(redis_client):
+    cache = LocalCache()
+    listener = asyncio.create_task(listen_invalidations(redis_client, cache))
+    await asyncio.sleep(0.05)
+    cache.set(5000, 'stale')
+    cache.set(6000, 'kept')
+
+    await publish_invalidation(redis_client, 5000)
+    for _ in range(50):
+        if cache.get(5000) is None:
+            break
+        await asyncio.sleep(0.01)
+    listener.cancel()
+
+    assert cache.get(5000) is None
+    assert cache.get(6000) == 'kept'
+
+
+class RespServer:
+    """
+    Минимальный сервер по протоколу Redis (RESP2): подписки, PING и +OK
+    на остальное. В отличие от fakeredis, клиент читает из настоящего
+    сокета — с его socket_timeout.
+    """
+
+    def __init__(self):
+        self.subscriptions = 0
+        self._subscribers: list[asyncio.StreamWriter] = []
+
+    @staticmethod
+    def _bulk(value: bytes) -> bytes:
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+
+    async def _read_command(self, reader: asyncio.StreamReader) -> list[bytes]:
+        count = int((await reader.readline())[1:])
+        args = []
+        for _ in range(count):
+            size = int((await reader.readline())[1:])
+            args.append((await reader.readexactly(size + 2))[:-2])
+        return args
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                name, *args = await self._read_command(reader)
+                name = name.upper()
+                if name == b'SUBSCRIBE':
+                    self.subscriptions += 1
+                    self._subscribers.append(writer)
+                    writer.write(
+                        b'*3\r\n' + self._bulk(b'subscribe') + self._bulk(args[0])
+                    )
+                    writer.write(b':1\r\n')
+                elif name == b'UNSUBSCRIBE':
+                    writer.write(b'*3\r\n' + self._bulk(b'unsubscribe'))
+                    writer.write(self._bulk(l1_cache.INVALIDATION_CHANNEL.encode()))
+                    writer.write(b':0\r\n')
+                elif name == b'PING' and writer in self._subscribers:
+                    payload = args[0] if args else b''
+                    writer.write(b'*2\r\n' + self._bulk(b'pong') + self._bulk(payload))
+                elif name == b'PING':
+                    writer.write(b'+PONG\r\n')
+                else:
+                    writer.write(b'+OK\r\n')
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            writer.close()
+
+    def publish(self, key: str) -> None:
+        channel = l1_cache.INVALIDATION_CHANNEL.encode()
+        for writer in self._subscribers:
+            writer.write(
+                b'*3\r\n'
+                + self._bulk(b'message')
+                + self._bulk(channel)
+                + self._bulk(key.encode())
+            )
+
+
+@pytest.fixture
+async def resp_server(monkeypatch):
+    """Клиент из create_redis_client с коротким socket_timeout к RespServer."""
+    server = RespServer()
+    listener = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+    host, port = listener.sockets[0].getsockname()
+    monkeypatch.setattr(redis_pool, 'REDIS_URL', f'redis://{host}:{port}/0')
+    monkeypatch.setattr(redis_pool, 'REDIS_SOCKET_TIMEOUT', 0.1)
+    monkeypatch.setattr(l1_cache, 'INVALIDATION_POLL_TIMEOUT', 0.05)
+    client = redis_pool.create_redis_client()
+    yield server, client
+    await client.aclose()
+    listener.close()
+
+
+async def test_idle_channel_does_not_clear_l1(resp_server):
+    """Тишина в канале дольше socket_timeout — не повод очищать L1"""
+    server, client = resp_server
+    cache = LocalCache()
+    listener = asyncio.create_task(listen_invalidations(client, cache))
+    for _ in range(50):
+        if server.subscriptions:
+            break
+        await asyncio.sleep(0.01)
+    cache.set(5000, 'kept')
+    cache.set(6000, 'stale')
+
+    await asyncio.sleep(0.5)
+    server.publish('6000')
+    await asyncio.sleep(0.1)
+    listener.cancel()
+
+    assert server.subscriptions == 1
+    assert cache.get(5000) == 'kept'
+    assert cache.get(6000) is None
+
+
+# ===== /cache/stats =====
+
+
+async def test_cache_stats_counts_l1_and_l2_hits(async_client, redis_client, calls):
+    for _ in range(3):
+        await async_client.get('/calc/5000')
+    await redis_client.set(7000, encode(13))
+    await async_client.get('/calc/7000')
+
+    stats = (await async_client.get('/cache/stats')).json()
+
+    assert calls['n'] == 1
+    assert (stats['l1_hits'], stats['l2_hits'], stats['misses']) == (2, 1, 1)
+    assert stats['l1_hit_ratio'] == 0.5
+    assert stats['l2_hit_ratio'] == 0.5
@@ -1,12 +1,12 @@
 from enum import Enum
-from fastapi import APIRouter, HTTPException, Query, Response, Request
-from prometheus_client import (
-    Counter,
-    generate_latest,
-    CONTENT_TYPE_LATEST,
-)
+
+import httpx
+from fastapi import APIRouter, Depends, Query, Response, Request
+from prometheus_client import Counter
 from pydantic import BaseModel
 
+from app.exposition import MetricsCache, accepts_gzip
+from app.http_client import get_http_client
 from app.weather import fetch_weather_from_api, get_weather_description
 
 
@@ -21,9 +21,13 @@ class WeatherResponse(BaseModel):
 
 
 @router.get("/weather/{city}", response_model=WeatherResponse)
-async def get_weather(request: Request, city: str):
+async def get_weather(
+    request: Request,
+    city: str,
+    client: httpx.AsyncClient = Depends(get_http_client),
+):
     """Получение погоды для города."""
-    data = await fetch_weather_from_api(city)
+    data = await fetch_weather_from_api(city, client)
     temp = data["current"]["temperature_2m"]
     temp_description = get_weather_description(temp)
     feels_like_counter: Counter = request.app.state.feels_like_counter
@@ -56,11 +60,17 @@ def get_metrics_endpoint(
         case MetricKind.ANALYTIC:
             registry = request.app.state.analytic_metrics_registry
 
-    try:
-        metrics_output = generate_latest(registry)
-    except Exception as e:
-        raise HTTPException(
-            status_code=500, detail=f"Failed to generate metrics: {str(e)}"
+    # Ошибка отрисовки не кэшируется и уходит в стандартный 500 с трейсбеком
+    cache: MetricsCache = request.app.state.metrics_cache
+    rendered = cache.render(kind.value, registry, request.headers.get("accept"))
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if accepts_gzip(request.headers.get("accept-encoding")):
+        headers["Content-Encoding"] = "gzip"
+        return Response(
+            content=rendered.gzipped(),
+            media_type=rendered.content_type,
+            headers=headers,
         )
-
-    return Response(content=metrics_output, media_type=CONTENT_TYPE_LATEST)
+    return Response(
+        content=rendered.body, media_type=rendered.content_type, headers=headers
+    )
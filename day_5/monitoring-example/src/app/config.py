@@ -14,6 +14,23 @@ class Settings(BaseSettings):
     port: int
     environment: str
     debug: bool
+    # Пул соединений общего HTTP-клиента к внешним API
+    http_timeout: float
+    http_max_connections: int
+    http_max_keepalive_connections: int
+    http_keepalive_expiry: float
+    # HTTP/2 требует установленный пакет h2 (httpx[http2])
+    http2: bool
+    # Границы корзин гистограммы времени ответа, секунды
+    http_request_duration_buckets: list[float]
+    # Число процессов uvicorn; больше одного — метрики собираются через
+    # общие файлы в PROMETHEUS_MULTIPROC_DIR
+    workers: int
+    # Как часто воркер обновляет метрики процесса в общих файлах, секунды
+    metrics_refresh_interval: float
+    # Сколько секунд отдавать /metrics из кэша, не отрисовывая заново;
+    # 0 — отрисовывать на каждый запрос
+    metrics_cache_ttl: float
 
     @classmethod
     def from_yaml(cls) -> "Settings":
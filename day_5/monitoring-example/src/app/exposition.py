@@ -0,0 +1,89 @@
+import gzip
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry
+from prometheus_client.exposition import CONTENT_TYPE_PLAIN_0_0_4, choose_encoder
+
+# Баланс размера и CPU: уровень 9 почти не меньше, но заметно дольше
+GZIP_LEVEL = 6
+
+
+@dataclass
+class RenderedMetrics:
+    """Отрисованный ответ /metrics."""
+
+    body: bytes
+    content_type: str
+    rendered_at: float
+    _gzipped: bytes | None = field(default=None, repr=False)
+
+    def gzipped(self) -> bytes:
+        # Сжимаем один раз на отрисовку; гонка безвредна — результат одинаков
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=GZIP_LEVEL)
+        return self._gzipped
+
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    """Разрешает ли клиент ответ в gzip (gzip;q=0 — запрет)."""
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() != "gzip":
+            continue
+        quality = params.strip().removeprefix("q=")
+        try:
+            return not params or float(quality) > 0
+        except ValueError:
+            return True
+    return False
+
+
+class MetricsCache:
+    """
+    Кэш отрисовки /metrics.
+
+    Реестр отрисовывается не чаще раза в ttl секунд для каждого формата.
+    Одновременные запросы (несколько реплик Prometheus) ждут одну
+    отрисовку, а не запускают свою. Эндпоинт синхронный и выполняется в
+    пуле потоков, поэтому блокировки — потоковые.
+    """
+
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: dict[tuple[str, str], RenderedMetrics] = {}
+        self._locks: dict[tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def render(
+        self, name: str, registry: CollectorRegistry, accept: str | None
+    ) -> RenderedMetrics:
+        """Метрики registry в формате, который просит заголовок Accept."""
+        encoder, content_type = choose_encoder(accept or "")
+        if content_type == CONTENT_TYPE_PLAIN_0_0_4:
+            # Формат не запрошен явно: тот же текст, что отдавался и раньше
+            content_type = CONTENT_TYPE_LATEST
+        key = (name, content_type)
+        entry = self._fresh(key)
+        if entry is not None:
+            return entry
+        with self._lock(key):
+            # Пока ждали блокировку, ответ мог отрисовать другой поток
+            entry = self._fresh(key)
+            if entry is None:
+                entry = RenderedMetrics(encoder(registry), content_type, self._clock())
+                self._entries[key] = entry
+            return entry
+
+    def _fresh(self, key: tuple[str, str]) -> RenderedMetrics | None:
+        entry = self._entries.get(key)
+        if entry is not None and self._clock() - entry.rendered_at < self.ttl:
+            return entry
+        return None
+
+    def _lock(self, key: tuple[str, str]) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
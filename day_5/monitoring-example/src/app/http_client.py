@@ -0,0 +1,116 @@
+from time import perf_counter
+
+import httpx
+from fastapi import Request
+from prometheus_client import CollectorRegistry, Counter, Histogram
+
+from app.config import Settings
+
+# Ожидание свободного соединения обычно близко к нулю, поэтому корзины мельче
+POOL_WAIT_BUCKETS = [0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0, 5.0]
+
+
+class UpstreamMetrics:
+    """Метрики запросов к внешним API, по одному ряду на upstream."""
+
+    def __init__(self, registry: CollectorRegistry, buckets: list[float]):
+        self.duration = Histogram(
+            name="upstream_request_duration_seconds",
+            documentation="Upstream request duration until response headers",
+            labelnames=["upstream"],
+            buckets=buckets,
+            registry=registry,
+        )
+        self.pool_wait = Histogram(
+            name="upstream_pool_wait_seconds",
+            documentation="Time spent waiting for a pooled connection",
+            labelnames=["upstream"],
+            buckets=POOL_WAIT_BUCKETS,
+            registry=registry,
+        )
+        self.connections = Counter(
+            name="upstream_requests_by_connection",
+            documentation="Upstream requests sent over a new or reused connection",
+            labelnames=["upstream", "connection"],
+            registry=registry,
+        )
+        self.errors = Counter(
+            name="upstream_errors",
+            documentation="Upstream transport errors and 5xx responses",
+            labelnames=["upstream", "error"],
+            registry=registry,
+        )
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """
+    Транспорт, пишущий UpstreamMetrics для каждого запроса.
+
+    Upstream берётся из расширения запроса "upstream" (или хоста URL).
+    Новое ли соединение и сколько ждали свободного, узнаём из событий
+    trace-расширения httpcore: пул не сообщает о выдаче соединения, но
+    следующее событие после неё — либо TCP-подключение (новое
+    соединение), либо отправка заголовков (переиспользованное).
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, metrics: UpstreamMetrics):
+        self._transport = transport
+        self._metrics = metrics
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        upstream = request.extensions.get("upstream", request.url.host)
+        start = perf_counter()
+        connection: str | None = None
+        parent_trace = request.extensions.get("trace")
+
+        async def trace(event: str, info: dict) -> None:
+            nonlocal connection
+            if connection is None:
+                if event == "connection.connect_tcp.started":
+                    connection = "new"
+                elif event.endswith(".send_request_headers.started"):
+                    connection = "reused"
+                if connection is not None:
+                    self._metrics.pool_wait.labels(upstream).observe(
+                        perf_counter() - start
+                    )
+                    self._metrics.connections.labels(upstream, connection).inc()
+            if parent_trace is not None:
+                await parent_trace(event, info)
+
+        request.extensions = {**request.extensions, "trace": trace}
+        try:
+            response = await self._transport.handle_async_request(request)
+        except httpx.TransportError as exc:
+            self._metrics.errors.labels(upstream, type(exc).__name__).inc()
+            raise
+        finally:
+            self._metrics.duration.labels(upstream).observe(perf_counter() - start)
+        if response.status_code >= 500:
+            self._metrics.errors.labels(upstream, f"http_{response.status_code}").inc()
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def create_http_client(
+    settings: Settings, metrics: UpstreamMetrics | None = None
+) -> httpx.AsyncClient:
+    """Создать клиент с пулом keep-alive соединений к внешним API."""
+    transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(
+            max_connections=settings.http_max_connections,
+            max_keepalive_connections=settings.http_max_keepalive_connections,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+        http2=settings.http2,
+    )
+    if metrics is not None:
+        transport = InstrumentedTransport(transport, metrics)
+    return httpx.AsyncClient(timeout=settings.http_timeout, transport=transport)
+
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    """Dependency: общий HTTP-клиент, созданный в lifespan приложения."""
+    return request.app.state.http_client
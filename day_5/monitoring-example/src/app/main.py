@@ -1,4 +1,6 @@
+import asyncio
 import logging
+import os
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
@@ -9,8 +11,18 @@ from prometheus_client import (
     PLATFORM_COLLECTOR,
     PROCESS_COLLECTOR,
 )
+from prometheus_client.multiprocess import mark_process_dead
 
 from app.api import router
+from app.config import get_settings
+from app.exposition import MetricsCache
+from app.http_client import UpstreamMetrics, create_http_client
+from app.middleware import HttpMetrics, MetricsMiddleware
+from app.multiprocess import (
+    ProcessMetricsMirror,
+    aggregated_registry,
+    get_multiprocess_dir,
+)
 
 
 logging.basicConfig(
@@ -22,29 +34,69 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+async def refresh_process_metrics(mirror: ProcessMetricsMirror, interval: float):
+    """Периодически переписывать метрики процесса в общие файлы."""
+    while True:
+        await asyncio.sleep(interval)
+        mirror.refresh()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan контекст для управления жизненным циклом приложения"""
-    registry = CollectorRegistry()
-    registry.register(GC_COLLECTOR)
-    registry.register(PLATFORM_COLLECTOR)
-    registry.register(PROCESS_COLLECTOR)
-    app.state.system_metrics_registry = registry
+    settings = get_settings()
+    # Каталог задан — воркеров несколько, и метрики всех воркеров
+    # складываются из общих файлов (см. run.py)
+    multiprocess_dir = get_multiprocess_dir()
+
+    system_registry = CollectorRegistry()
+    if multiprocess_dir:
+        app.state.process_metrics = ProcessMetricsMirror(system_registry)
+        refresh_task = asyncio.create_task(
+            refresh_process_metrics(
+                app.state.process_metrics, settings.metrics_refresh_interval
+            )
+        )
+    else:
+        system_registry.register(GC_COLLECTOR)
+        system_registry.register(PLATFORM_COLLECTOR)
+        system_registry.register(PROCESS_COLLECTOR)
+    app.state.http_metrics = HttpMetrics(
+        system_registry, settings.http_request_duration_buckets
+    )
 
-    registry = CollectorRegistry()
+    analytic_registry = CollectorRegistry()
     app.state.feels_like_counter = Counter(
         name="temp_feels_like",
         documentation="Description of counter",
         labelnames=["feels_like"],
-        registry=registry,
+        registry=analytic_registry,
+    )
+    upstream_metrics = UpstreamMetrics(
+        analytic_registry, settings.http_request_duration_buckets
     )
-    app.state.analytic_metrics_registry = registry
+
+    if multiprocess_dir:
+        system_registry = aggregated_registry(system_registry, multiprocess_dir)
+        analytic_registry = aggregated_registry(analytic_registry, multiprocess_dir)
+    app.state.system_metrics_registry = system_registry
+    app.state.analytic_metrics_registry = analytic_registry
+    app.state.metrics_cache = MetricsCache(settings.metrics_cache_ttl)
 
     logger.info("Metrics collectors initialized")
+
+    # Один клиент на приложение: соединения к внешним API переиспользуются
+    app.state.http_client = create_http_client(settings, upstream_metrics)
     yield
+    await app.state.http_client.aclose()
+    if multiprocess_dir:
+        refresh_task.cancel()
+        # Гейджи этого воркера больше не актуальны
+        mark_process_dead(os.getpid(), multiprocess_dir)
     logger.info("Metrics collectors shutdown")
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(router)
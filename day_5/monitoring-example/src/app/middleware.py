@@ -0,0 +1,90 @@
+from time import perf_counter
+
+from prometheus_client import CollectorRegistry, Gauge, Histogram
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Метка route для запросов, не попавших ни в один маршрут (404 и т.п.):
+# сырой путь в метке дал бы неограниченное число рядов
+UNMATCHED_ROUTE = "<unmatched>"
+# Остальные методы сводим в OTHER по той же причине
+KNOWN_METHODS = frozenset(
+    {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "CONNECT", "TRACE"}
+)
+
+
+class HttpMetrics:
+    """Метрики входящих HTTP-запросов."""
+
+    def __init__(self, registry: CollectorRegistry, buckets: list[float]):
+        self.duration = Histogram(
+            name="http_request_duration_seconds",
+            documentation="HTTP request duration in seconds",
+            labelnames=["route", "method", "status"],
+            buckets=buckets,
+            registry=registry,
+        )
+        self.in_progress = Gauge(
+            name="http_requests_in_progress",
+            documentation="HTTP requests currently being processed",
+            # С несколькими воркерами — сумма по живым процессам
+            multiprocess_mode="livesum",
+            registry=registry,
+        )
+        # labels() на каждый запрос заметно дороже поиска в словаре
+        self._children: dict[tuple[str, str, int], Histogram] = {}
+
+    def observe(self, route: str, method: str, status: int, duration: float) -> None:
+        key = (route, method, status)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self.duration.labels(
+                route=route, method=method, status=str(status)
+            )
+        child.observe(duration)
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: время ответа и число запросов в обработке.
+
+    Метрики берутся из app.state.http_metrics, который создаётся в lifespan
+    вместе с реестром. Маршрут известен только после роутинга, поэтому
+    шаблон пути (/weather/{city}) читается из scope после ответа.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        metrics: HttpMetrics | None = getattr(scope["app"].state, "http_metrics", None)
+        if metrics is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Если приложение упало до начала ответа, клиент получит 500
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.in_progress.inc()
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = perf_counter() - start
+            metrics.in_progress.dec()
+            route = scope.get("route")
+            method = scope["method"]
+            metrics.observe(
+                getattr(route, "path_format", UNMATCHED_ROUTE),
+                method if method in KNOWN_METHODS else "OTHER",
+                status,
+                duration,
+            )
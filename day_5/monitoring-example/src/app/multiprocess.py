@@ -0,0 +1,138 @@
+import glob
+import os
+import re
+from typing import Iterable
+
+from prometheus_client import (
+    GC_COLLECTOR,
+    PLATFORM_COLLECTOR,
+    PROCESS_COLLECTOR,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+)
+from prometheus_client.metrics_core import Metric
+from prometheus_client.multiprocess import MultiProcessCollector, mark_process_dead
+from prometheus_client.registry import Collector
+
+# Файлы live-гейджей воркера: gauge_livesum_<pid>.db и т.п.
+_LIVE_GAUGE_FILE = re.compile(r"gauge_live\w+?_(\d+)\.db$")
+
+
+def get_multiprocess_dir() -> str | None:
+    """
+    Каталог общих mmap-файлов метрик, если сервис запущен в несколько воркеров.
+
+    prometheus_client выбирает способ хранения значений при импорте,
+    поэтому переменную задаёт run.py до запуска воркеров.
+    """
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+
+def cleanup_dead_workers(path: str) -> None:
+    """
+    Удалить live-гейджи воркеров, которых больше нет.
+
+    Упавший воркер не успевает убрать за собой файлы, и его значения
+    (например, запросы «в обработке») остались бы в сумме навсегда.
+    Счётчики мёртвых воркеров не трогаем: их значения — уже сделанная работа.
+    """
+    pids = set()
+    for file in glob.glob(os.path.join(path, "gauge_live*.db")):
+        match = _LIVE_GAUGE_FILE.search(file)
+        if match:
+            pids.add(int(match.group(1)))
+    for pid in pids:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            mark_process_dead(pid, path)
+        except PermissionError:
+            pass  # процесс жив, но принадлежит другому пользователю
+
+
+class MultiProcessRegistryView(Collector):
+    """
+    Метрики реестра, сложенные по всем воркерам.
+
+    Все воркеры пишут значения в один каталог без разделения по реестрам,
+    поэтому из общих файлов берём только метрики, зарегистрированные в
+    registry этого процесса.
+    """
+
+    def __init__(self, registry: CollectorRegistry, path: str):
+        self._registry = registry
+        self._path = path
+
+    def collect(self) -> Iterable[Metric]:
+        names = {metric.name for metric in self._registry.collect()}
+        cleanup_dead_workers(self._path)
+        for metric in MultiProcessCollector(None, self._path).collect():
+            if metric.name in names:
+                yield metric
+
+
+def aggregated_registry(registry: CollectorRegistry, path: str) -> CollectorRegistry:
+    """Реестр для /metrics: метрики registry со всех воркеров."""
+    view = CollectorRegistry(auto_describe=False)
+    view.register(MultiProcessRegistryView(registry, path))
+    return view
+
+
+class ProcessMetricsMirror:
+    """
+    Метрики GC, платформы и процесса в multiprocess-режиме.
+
+    Эти коллекторы читают состояние текущего процесса при сборе и с
+    общими файлами не работают. Поэтому каждый воркер периодически
+    переписывает их значения в обычные метрики: счётчики (CPU, сборки
+    мусора) суммируются по воркерам, гейджи (память, дескрипторы)
+    отдаются по каждому живому воркеру с меткой pid.
+    """
+
+    def __init__(
+        self,
+        registry: CollectorRegistry,
+        collectors: Iterable[Collector] = (
+            GC_COLLECTOR,
+            PLATFORM_COLLECTOR,
+            PROCESS_COLLECTOR,
+        ),
+    ):
+        self._registry = registry
+        self._collectors = tuple(collectors)
+        self._metrics: dict[str, Counter | Gauge] = {}
+        # Последнее значение счётчика: в общий Counter пишем только прирост
+        self._last: dict[tuple[str, tuple], float] = {}
+        self.refresh()
+
+    def refresh(self) -> None:
+        for collector in self._collectors:
+            for family in collector.collect():
+                for sample in family.samples:
+                    if family.type == "counter":
+                        if sample.name.endswith("_total"):
+                            self._inc_counter(family, sample.labels, sample.value)
+                    elif family.type == "gauge":
+                        self._metric(Gauge, family, sample.labels).set(sample.value)
+
+    def _inc_counter(self, family: Metric, labels: dict, value: float) -> None:
+        counter = self._metric(Counter, family, labels)
+        key = (family.name, tuple(sorted(labels.items())))
+        delta = value - self._last.get(key, 0.0)
+        self._last[key] = value
+        if delta > 0:
+            counter.inc(delta)
+
+    def _metric(self, metric_type: type, family: Metric, labels: dict):
+        metric = self._metrics.get(family.name)
+        if metric is None:
+            kwargs = {"multiprocess_mode": "liveall"} if metric_type is Gauge else {}
+            metric = self._metrics[family.name] = metric_type(
+                name=family.name,
+                documentation=family.documentation,
+                labelnames=sorted(labels),
+                registry=self._registry,
+                **kwargs,
+            )
+        return metric.labels(**labels) if labels else metric
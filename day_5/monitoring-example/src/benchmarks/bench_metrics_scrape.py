@@ -0,0 +1,80 @@
+"""
+Стоимость одного сбора /metrics на реестре с большим числом рядов.
+
+Сравнивает отрисовку на каждый запрос (как было) с MetricsCache:
+промах кэша (отрисовка + gzip) и попадание (готовые байты).
+
+Запуск (из каталога src): uv run python -m benchmarks.bench_metrics_scrape
+"""
+
+import argparse
+from time import perf_counter
+
+from prometheus_client import CollectorRegistry, Counter, generate_latest
+
+from app.exposition import MetricsCache
+
+OPENMETRICS = "application/openmetrics-text; version=1.0.0"
+
+
+def build_registry(series: int) -> CollectorRegistry:
+    registry = CollectorRegistry()
+    counter = Counter(
+        "requests", "Requests", labelnames=["route", "status"], registry=registry
+    )
+    for i in range(series):
+        counter.labels(route=f"/route/{i // 10}", status=str(200 + i % 10)).inc(i)
+    return registry
+
+
+def timed(func, repeat: int) -> float:
+    """Минимальное время одного вызова, секунды."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        func()
+        best = min(best, perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--series", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    registry = build_registry(args.series)
+    body = generate_latest(registry)
+
+    def miss(accept=None):
+        # ttl=0: каждый вызов — новая отрисовка и сжатие
+        MetricsCache(ttl=0).render("system", registry, accept).gzipped()
+
+    cache = MetricsCache(ttl=60)
+    cache.render("system", registry, None).gzipped()
+
+    rows = [
+        (
+            "generate_latest (было)",
+            timed(lambda: generate_latest(registry), args.repeat),
+        ),
+        ("промах: текст + gzip", timed(miss, args.repeat)),
+        ("промах: OpenMetrics + gzip", timed(lambda: miss(OPENMETRICS), args.repeat)),
+        (
+            "попадание в кэш",
+            timed(
+                lambda: cache.render("system", registry, None).gzipped(), args.repeat
+            ),
+        ),
+    ]
+    print(f"рядов: {args.series}")
+    print(
+        f"размер: {len(body) / 1024:.0f} КБ, "
+        f"gzip: {len(cache.render('system', registry, None).gzipped()) / 1024:.0f} КБ"
+    )
+    for name, seconds in rows:
+        print(f"{name:<28} {seconds * 1000:8.3f} мс")
+
+
+if __name__ == "__main__":
+    main()
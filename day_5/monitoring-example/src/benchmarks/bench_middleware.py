@@ -0,0 +1,79 @@
+"""
+Накладные расходы MetricsMiddleware на один запрос.
+
+Вызывает ASGI-приложение напрямую, без сети и сервера: внутреннее
+приложение сразу отдаёт пустой ответ, поэтому разница между прогонами
+с middleware и без — это её собственная стоимость.
+
+Запуск (из каталога src): uv run python -m benchmarks.bench_middleware
+"""
+
+import argparse
+import asyncio
+from time import perf_counter
+from types import SimpleNamespace
+
+from prometheus_client import CollectorRegistry
+
+from app.middleware import HttpMetrics, MetricsMiddleware
+
+BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+
+async def endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def run(app, scopes: list[dict]) -> float:
+    """Среднее время одного запроса, секунды."""
+    start = perf_counter()
+    for scope in scopes:
+        await app(scope, receive, send)
+    return (perf_counter() - start) / len(scopes)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200_000)
+    parser.add_argument("--routes", type=int, default=20, help="Разных маршрутов")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    state = SimpleNamespace(http_metrics=HttpMetrics(CollectorRegistry(), BUCKETS))
+    fake_app = SimpleNamespace(state=state)
+    routes = [
+        SimpleNamespace(path_format=f"/route/{i}/{{id}}") for i in range(args.routes)
+    ]
+    scopes = [
+        {
+            "type": "http",
+            "method": "GET",
+            "path": f"/route/{i % args.routes}/42",
+            "app": fake_app,
+            "route": routes[i % args.routes],
+        }
+        for i in range(args.requests)
+    ]
+    wrapped = MetricsMiddleware(endpoint)
+
+    # Прогрев: дочерние ряды гистограммы создаются на первом запросе
+    await run(wrapped, scopes[: args.routes])
+
+    bare = min([await run(endpoint, scopes) for _ in range(args.repeat)])
+    with_metrics = min([await run(wrapped, scopes) for _ in range(args.repeat)])
+    print(f"без middleware: {bare * 1e6:6.2f} мкс/запрос")
+    print(f"с middleware:   {with_metrics * 1e6:6.2f} мкс/запрос")
+    print(f"накладные:      {(with_metrics - bare) * 1e6:6.2f} мкс/запрос")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
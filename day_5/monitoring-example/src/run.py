@@ -1,10 +1,38 @@
+import glob
+import os
+import tempfile
+
 import uvicorn
 
 from app.config import get_settings
 
 
+def prepare_multiprocess_dir() -> None:
+    """
+    Подготовить каталог общих файлов метрик для нескольких воркеров.
+
+    Переменная окружения наследуется воркерами и должна быть задана до
+    импорта prometheus_client в них. Файлы прошлого запуска удаляются,
+    иначе их счётчики сложились бы с новыми.
+    """
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if path is None:
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="prometheus-")
+        return
+    os.makedirs(path, exist_ok=True)
+    for file in glob.glob(os.path.join(path, "*.db")):
+        os.remove(file)
+
+
 if __name__ == "__main__":
     settings = get_settings()
+    if settings.workers > 1 or "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        prepare_multiprocess_dir()
     uvicorn.run(
-        "app.main:app", host=settings.host, port=settings.port, reload=settings.debug
+        "app.main:app",
+        host=settings.host,
+        port=settings.port,
+        workers=settings.workers,
+        # Перезагрузка при изменениях работает только с одним процессом
+        reload=settings.debug and settings.workers == 1,
     )
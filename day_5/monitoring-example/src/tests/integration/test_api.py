@@ -59,7 +59,7 @@ async def test_weather_success_monkeypatch(
 ):
     """Успешное получение погоды с использованием monkeypatch."""
 
-    async def mock_fetch(city: str) -> dict:
+    async def mock_fetch(city: str, client) -> dict:
         return mock_weather_data
 
     monkeypatch.setattr("app.api.fetch_weather_from_api", mock_fetch)
@@ -76,7 +76,7 @@ async def test_weather_success_monkeypatch(
 async def test_weather_city_not_found_monkeypatch(async_client, monkeypatch):
     """Город не найден с использованием monkeypatch."""
 
-    async def mock_fetch(city: str) -> dict:
+    async def mock_fetch(city: str, client) -> dict:
         raise HTTPException(status_code=404, detail=f"City '{city}' not found")
 
     monkeypatch.setattr("app.api.fetch_weather_from_api", mock_fetch)
@@ -116,3 +116,80 @@ async def test_weather_feels_like_metric(async_client, mock_weather_data):
         [sample] = family.samples
         assert sample.value == 1.0
         assert sample.labels == {"feels_like": "warm"}
+
+
+def get_sample(content: str, name: str, labels: dict | None = None) -> float | None:
+    """Значение сэмпла метрики из ответа /metrics."""
+    for family in text_string_to_metric_families(content):
+        for sample in family.samples:
+            if sample.name == name and sample.labels == (labels or {}):
+                return sample.value
+    return None
+
+
+async def test_http_request_duration_by_route_template(async_client, mock_weather_data):
+    """Запросы считаются по шаблону маршрута, методу и статусу"""
+    with patch(
+        "app.api.fetch_weather_from_api",
+        new_callable=AsyncMock,
+        return_value=mock_weather_data,
+    ):
+        await async_client.get("/weather/London")
+        await async_client.get("/weather/Paris")
+    await async_client.get("/metrics?kind=invalid")
+
+    response = await async_client.get("/metrics?kind=system")
+
+    labels = {"route": "/weather/{city}", "method": "GET", "status": "200"}
+    assert get_sample(response.text, "http_request_duration_seconds_count", labels) == 2
+    labels = {"route": "/metrics", "method": "GET", "status": "422"}
+    assert get_sample(response.text, "http_request_duration_seconds_count", labels) == 1
+
+
+async def test_http_request_duration_bounded_labels(async_client):
+    """Неизвестные пути и методы не порождают новых рядов"""
+    await async_client.get("/no/such/path")
+    await async_client.get("/another/path")
+    await async_client.request("BREW", "/weather/London")
+
+    response = await async_client.get("/metrics?kind=system")
+
+    labels = {"route": "<unmatched>", "method": "GET", "status": "404"}
+    assert get_sample(response.text, "http_request_duration_seconds_count", labels) == 2
+    labels = {"route": "/weather/{city}", "method": "OTHER", "status": "405"}
+    assert get_sample(response.text, "http_request_duration_seconds_count", labels) == 1
+
+
+async def test_http_requests_in_progress(async_client):
+    """В момент сбора метрик в обработке только сам запрос /metrics"""
+    response = await async_client.get("/metrics?kind=system")
+
+    assert get_sample(response.text, "http_requests_in_progress") == 1
+
+
+async def test_metrics_gzip(async_client):
+    """Ответ сжимается, если клиент принимает gzip"""
+    response = await async_client.get(
+        "/metrics?kind=system", headers={"Accept-Encoding": "gzip"}
+    )
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert "python_info" in response.text
+
+    response = await async_client.get(
+        "/metrics?kind=system", headers={"Accept-Encoding": "identity"}
+    )
+
+    assert "content-encoding" not in response.headers
+    assert "python_info" in response.text
+
+
+async def test_metrics_openmetrics(async_client):
+    """Формат OpenMetrics по заголовку Accept"""
+    response = await async_client.get(
+        "/metrics?kind=system",
+        headers={"Accept": "application/openmetrics-text; version=1.0.0"},
+    )
+
+    assert response.headers["content-type"].startswith("application/openmetrics-text")
+    assert response.text.endswith("# EOF\n")
@@ -0,0 +1,87 @@
+import os
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+from asgi_lifespan import LifespanManager
+from httpx import ASGITransport
+from prometheus_client import values
+from prometheus_client.parser import text_string_to_metric_families
+
+from app.main import app
+
+# Больше максимального pid в Linux: такого процесса точно нет
+DEAD_PID = 2**22 + 1
+
+
+@pytest.fixture
+def worker_pid():
+    """pid, от имени которого пишутся метрики: так имитируем несколько воркеров."""
+    return {"value": DEAD_PID}
+
+
+@pytest.fixture
+async def multiprocess_client(tmp_path, monkeypatch, worker_pid):
+    """Клиент к приложению в multiprocess-режиме метрик."""
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    monkeypatch.setattr(
+        values, "ValueClass", values.MultiProcessValue(lambda: worker_pid["value"])
+    )
+    async with LifespanManager(app) as manager:
+        transport = ASGITransport(app=manager.app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            yield client
+
+
+def get_families(content: str) -> dict:
+    return {family.name: family for family in text_string_to_metric_families(content)}
+
+
+async def test_metrics_aggregated_across_workers(
+    multiprocess_client, worker_pid, mock_weather_data
+):
+    """Каждый реестр отдаёт свои метрики, сложенные по всем воркерам"""
+    with patch(
+        "app.api.fetch_weather_from_api",
+        new_callable=AsyncMock,
+        return_value=mock_weather_data,
+    ):
+        await multiprocess_client.get("/weather/London")
+        worker_pid["value"] = os.getpid()
+        await multiprocess_client.get("/weather/Paris")
+
+    analytic = get_families(
+        (await multiprocess_client.get("/metrics?kind=analytic")).text
+    )
+    system = get_families((await multiprocess_client.get("/metrics?kind=system")).text)
+
+    [sample] = analytic["temp_feels_like"].samples
+    assert sample.value == 2
+    assert "http_request_duration_seconds" not in analytic
+
+    [count] = [
+        sample
+        for sample in system["http_request_duration_seconds"].samples
+        if sample.name.endswith("_count")
+        and sample.labels["route"] == "/weather/{city}"
+    ]
+    assert count.value == 2
+    assert "temp_feels_like" not in system
+    assert "process_cpu_seconds" in system
+
+
+async def test_dead_worker_gauges_removed(multiprocess_client, worker_pid, tmp_path):
+    """Гейджи упавшего воркера пропадают при следующем сборе метрик"""
+    assert list(tmp_path.glob(f"gauge_live*_{DEAD_PID}.db"))
+
+    worker_pid["value"] = os.getpid()
+    app.state.process_metrics.refresh()
+    response = await multiprocess_client.get("/metrics?kind=system")
+
+    assert not list(tmp_path.glob(f"gauge_live*_{DEAD_PID}.db"))
+    family = get_families(response.text)["process_resident_memory_bytes"]
+    assert {sample.labels["pid"] for sample in family.samples} == {str(os.getpid())}
+    [in_progress] = get_families(response.text)["http_requests_in_progress"].samples
+    assert in_progress.value == 1
@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+from prometheus_client import CollectorRegistry, Counter
+from prometheus_client.registry import Collector
+
+from app.exposition import MetricsCache, accepts_gzip
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class SlowCollector(Collector):
+    """Коллектор, который считает свои вызовы и собирается не сразу."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def collect(self):
+        self.calls += 1
+        time.sleep(0.05)
+        return []
+
+
+@pytest.fixture
+def registry():
+    registry = CollectorRegistry()
+    Counter("requests", "Requests", registry=registry).inc()
+    return registry
+
+
+@pytest.mark.parametrize(
+    "header,expected",
+    [
+        (None, False),
+        ("", False),
+        ("gzip", True),
+        ("deflate, gzip;q=0.5", True),
+        ("GZIP", True),
+        ("gzip;q=0", False),
+        ("identity", False),
+        ("x-gzip", False),
+    ],
+)
+def test_accepts_gzip(header, expected):
+    """Разбор Accept-Encoding."""
+    assert accepts_gzip(header) == expected
+
+
+def test_render_cached_within_ttl(registry):
+    """В пределах ttl отдаётся прошлая отрисовка."""
+    clock = Clock()
+    cache = MetricsCache(ttl=1.0, clock=clock)
+    first = cache.render("system", registry, None)
+
+    clock.now = 0.5
+    assert cache.render("system", registry, None) is first
+
+    clock.now = 1.0
+    assert cache.render("system", registry, None) is not first
+
+
+def test_render_cached_per_format(registry):
+    """Разные форматы кэшируются отдельно."""
+    cache = MetricsCache(ttl=1.0, clock=Clock())
+    text = cache.render("system", registry, None)
+    openmetrics = cache.render(
+        "system", registry, "application/openmetrics-text; version=1.0.0"
+    )
+
+    assert openmetrics.content_type.startswith("application/openmetrics-text")
+    assert openmetrics.body.endswith(b"# EOF\n")
+    assert b"# EOF" not in text.body
+
+
+def test_concurrent_renders_shared():
+    """Одновременные запросы ждут одну отрисовку."""
+    collector = SlowCollector()
+    registry = CollectorRegistry()
+    registry.register(collector)
+    cache = MetricsCache(ttl=1.0)
+    calls_before = collector.calls
+
+    threads = [
+        threading.Thread(target=cache.render, args=("system", registry, None))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert collector.calls - calls_before == 1
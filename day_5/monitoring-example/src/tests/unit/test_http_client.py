@@ -0,0 +1,125 @@
+import asyncio
+
+import httpx
+import pytest
+from prometheus_client import CollectorRegistry
+
+from app.http_client import InstrumentedTransport, UpstreamMetrics
+from app.weather import fetch_weather_from_api
+
+BUCKETS = [0.1, 1.0]
+
+
+@pytest.fixture
+def registry():
+    return CollectorRegistry()
+
+
+@pytest.fixture
+def metrics(registry):
+    return UpstreamMetrics(registry, BUCKETS)
+
+
+@pytest.fixture
+async def keepalive_server():
+    """Локальный HTTP/1.1-сервер с keep-alive: отвечает 200 на любой запрос."""
+
+    async def handle(reader, writer):
+        while await reader.readuntil(b"\r\n\r\n"):
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+            await writer.drain()
+
+    async def safe_handle(reader, writer):
+        try:
+            await handle(reader, writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    server = await asyncio.start_server(safe_handle, "127.0.0.1", 0)
+    host, port = server.sockets[0].getsockname()
+    yield f"http://{host}:{port}"
+    server.close()
+
+
+def value(registry, name, **labels):
+    return registry.get_sample_value(name, labels) or 0.0
+
+
+async def test_connection_reuse_and_pool_wait(registry, metrics, keepalive_server):
+    """Первый запрос открывает соединение, следующие его переиспользуют"""
+    transport = InstrumentedTransport(httpx.AsyncHTTPTransport(), metrics)
+    async with httpx.AsyncClient(transport=transport) as client:
+        for _ in range(3):
+            response = await client.get(
+                keepalive_server, extensions={"upstream": "local"}
+            )
+            assert response.text == "ok"
+
+    connections = "upstream_requests_by_connection_total"
+    assert value(registry, connections, upstream="local", connection="new") == 1
+    assert value(registry, connections, upstream="local", connection="reused") == 2
+    assert value(registry, "upstream_pool_wait_seconds_count", upstream="local") == 3
+    assert (
+        value(registry, "upstream_request_duration_seconds_count", upstream="local")
+        == 3
+    )
+
+
+async def test_transport_error_counted(registry, metrics):
+    """Ошибки соединения считаются по типу"""
+
+    def refuse(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    transport = InstrumentedTransport(httpx.MockTransport(refuse), metrics)
+    async with httpx.AsyncClient(transport=transport) as client:
+        with pytest.raises(httpx.ConnectError):
+            await client.get("http://upstream.test/")
+
+    labels = {"upstream": "upstream.test", "error": "ConnectError"}
+    assert value(registry, "upstream_errors_total", **labels) == 1
+    assert (
+        value(
+            registry,
+            "upstream_request_duration_seconds_count",
+            upstream="upstream.test",
+        )
+        == 1
+    )
+
+
+async def test_server_error_counted(registry, metrics):
+    """Ответы 5xx считаются ошибками upstream, 4xx — нет"""
+    statuses = iter([503, 400])
+    transport = InstrumentedTransport(
+        httpx.MockTransport(lambda request: httpx.Response(next(statuses))), metrics
+    )
+    async with httpx.AsyncClient(transport=transport) as client:
+        await client.get("http://upstream.test/")
+        await client.get("http://upstream.test/")
+
+    labels = {"upstream": "upstream.test", "error": "http_503"}
+    assert value(registry, "upstream_errors_total", **labels) == 1
+    labels = {"upstream": "upstream.test", "error": "http_400"}
+    assert value(registry, "upstream_errors_total", **labels) == 0
+
+
+async def test_fetch_weather_upstreams(registry, metrics, mock_weather_data):
+    """Время запросов за погодой видно отдельно по каждому upstream"""
+
+    def handler(request):
+        if request.url.host == "nominatim.openstreetmap.org":
+            return httpx.Response(200, json=[{"lat": "51.5", "lon": "-0.1"}])
+        return httpx.Response(200, json=mock_weather_data)
+
+    transport = InstrumentedTransport(httpx.MockTransport(handler), metrics)
+    async with httpx.AsyncClient(transport=transport) as client:
+        await fetch_weather_from_api("London", client)
+
+    for upstream in ("nominatim", "open-meteo"):
+        assert (
+            value(
+                registry, "upstream_request_duration_seconds_count", upstream=upstream
+            )
+            == 1
+        )